@@ -2,11 +2,14 @@ from flask import Flask
 from flask_cors import CORS
 from app.extensions import db, migrate, jwt
 from app.config import Config
+from app.utils.db_routing import init_db_engines
+from app.utils.serialization import JSONProvider
 import os
 
 def create_app(config_name='development'):
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = JSONProvider(app)
     
     # Initialize CORS with frontend URL
     cors_origins = app.config['CORS_ORIGINS']
@@ -20,11 +23,12 @@ def create_app(config_name='development'):
     
     # Initialize extensions
     db.init_app(app)
+    init_db_engines(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     
     # Register blueprints
-    from app.api import auth_bp, devices_bp, weighing_scale_bp, energy_meter_bp, fuel_dispenser_bp, alerts_bp, blockchain_bp
+    from app.api import auth_bp, devices_bp, weighing_scale_bp, energy_meter_bp, fuel_dispenser_bp, alerts_bp, blockchain_bp, rules_bp, calibration_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(devices_bp, url_prefix='/api/devices')
@@ -33,15 +37,31 @@ def create_app(config_name='development'):
     app.register_blueprint(fuel_dispenser_bp, url_prefix='/api/fuel-dispenser')
     app.register_blueprint(alerts_bp, url_prefix='/api/alerts')
     app.register_blueprint(blockchain_bp, url_prefix='/api/blockchain')
+    app.register_blueprint(rules_bp, url_prefix='/api/rules')
+    app.register_blueprint(calibration_bp, url_prefix='/api/calibration')
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Prometheus metrics
+    from app.utils.metrics import init_metrics
+    init_metrics(app)
+    
+    # Opt-in request profiling
+    from app.utils.request_profiler import init_request_profiler
+    init_request_profiler(app)
+    
+    # Register management commands
+    from app.commands import register_commands
+    register_commands(app)
     
     @app.route('/health')
     def health_check():
         return {'status': 'healthy', 'message': 'Tamper Detection API is running'}, 200
     
+    @app.route('/health/ready')
+    def readiness_check():
+        from app.services.health_check import HealthCheck
+        result = HealthCheck.readiness()
+        return result, 200 if result['status'] == 'healthy' else 503
+    
     @app.route('/')
     def index():
         return {'message': 'Tamper Detection API', 'version': '1.0.0'}, 200
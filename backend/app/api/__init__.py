@@ -7,5 +7,7 @@ energy_meter_bp = Blueprint('energy_meter', __name__)
 fuel_dispenser_bp = Blueprint('fuel_dispenser', __name__)
 alerts_bp = Blueprint('alerts', __name__)
 blockchain_bp = Blueprint('blockchain', __name__)
+rules_bp = Blueprint('rules', __name__)
+calibration_bp = Blueprint('calibration', __name__)
 
-from app.api import auth, devices, weighing_scale, energy_meter, fuel_dispenser, alerts, blockchain
+from app.api import auth, devices, weighing_scale, energy_meter, fuel_dispenser, alerts, blockchain, rules, calibration
@@ -3,10 +3,20 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.api import alerts_bp
 from app.extensions import db
 from app.models import TamperAlert, Device
+from app.utils.validators import validate_alert_severity
+from app.utils.helpers import parse_utc_timestamp
+from app.utils.db_routing import read_replica
+from app.utils.serialization import fetch_records
 from datetime import datetime, timedelta
+from sqlalchemy import select
+
+# Keys accepted in a bulk-resolve filters object
+BULK_FILTERS = ('device_id', 'alert_type', 'severity', 'start_time', 'end_time')
+
 
 @alerts_bp.route('/', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_alerts():
     """Get all tamper alerts with optional filters"""
     device_id = request.args.get('device_id', type=int)
@@ -15,22 +25,22 @@ def get_alerts():
     hours = int(request.args.get('hours', 168))  # Last 7 days by default
     
     start_time = datetime.utcnow() - timedelta(hours=hours)
-    query = TamperAlert.query.filter(TamperAlert.timestamp >= start_time)
+    query = select(*TamperAlert.api_columns()).where(TamperAlert.timestamp >= start_time)
     
     if device_id:
-        query = query.filter_by(device_id=device_id)
+        query = query.where(TamperAlert.device_id == device_id)
     
     if severity:
-        query = query.filter_by(severity=severity)
+        query = query.where(TamperAlert.severity == severity)
     
     if resolved is not None:
         is_resolved = resolved.lower() == 'true'
-        query = query.filter_by(resolved=is_resolved)
+        query = query.where(TamperAlert.resolved == is_resolved)
     
-    alerts = query.order_by(TamperAlert.timestamp.desc()).all()
+    alerts = fetch_records(query.order_by(TamperAlert.timestamp.desc()))
     
     return jsonify({
-        'alerts': [alert.to_dict() for alert in alerts],
+        'alerts': alerts,
         'total': len(alerts)
     }), 200
 
@@ -102,6 +112,7 @@ def get_alert_summary():
         'total_alerts': len(alerts),
         'resolved': sum(1 for a in alerts if a.resolved),
         'unresolved': sum(1 for a in alerts if not a.resolved),
+        'total_occurrences': sum(a.occurrence_count or 1 for a in alerts),
         'by_severity': {
             'critical': sum(1 for a in alerts if a.severity == 'critical'),
             'high': sum(1 for a in alerts if a.severity == 'high'),
@@ -143,27 +154,109 @@ def get_recent_alerts():
 @alerts_bp.route('/bulk-resolve', methods=['POST'])
 @jwt_required()
 def bulk_resolve_alerts():
-    """Resolve multiple alerts at once"""
-    data = request.get_json()
-    alert_ids = data.get('alert_ids', [])
+    """Resolve multiple alerts at once, by ID list or by filter"""
+    data = request.get_json() or {}
+    alert_ids = data.get('alert_ids') or []
+    filters = data.get('filters') or {}
+    
+    if not isinstance(alert_ids, list) or not all(
+        isinstance(alert_id, int) and not isinstance(alert_id, bool) for alert_id in alert_ids
+    ):
+        return jsonify({'error': 'alert_ids must be a list of integer IDs'}), 400
+    
+    if not isinstance(filters, dict):
+        return jsonify({'error': 'filters must be an object'}), 400
+    
+    if not alert_ids and not filters:
+        return jsonify({'error': 'No alert IDs or filters provided'}), 400
+    
+    query = TamperAlert.query.filter(TamperAlert.resolved == False)  # noqa: E712
     
-    if not alert_ids:
-        return jsonify({'error': 'No alert IDs provided'}), 400
+    if alert_ids:
+        query = query.filter(TamperAlert.id.in_(alert_ids))
+    
+    if filters:
+        try:
+            query = _apply_bulk_filters(query, filters)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    # Collect the affected devices before the update so their status
+    # can be recomputed afterwards in one statement
+    device_ids = [
+        row[0] for row in query.with_entities(TamperAlert.device_id).distinct().all()
+    ]
     
     user_id = get_jwt_identity()
-    resolved_count = 0
+    resolved_count = query.update({
+        TamperAlert.resolved: True,
+        TamperAlert.resolved_at: datetime.utcnow(),
+        TamperAlert.resolved_by: user_id
+    }, synchronize_session=False)
     
-    for alert_id in alert_ids:
-        alert = TamperAlert.query.get(alert_id)
-        if alert and not alert.resolved:
-            alert.resolved = True
-            alert.resolved_at = datetime.utcnow()
-            alert.resolved_by = user_id
-            resolved_count += 1
+    reactivated_count = _reactivate_devices(device_ids)
     
     db.session.commit()
     
     return jsonify({
         'message': f'Resolved {resolved_count} alerts successfully',
-        'resolved_count': resolved_count
+        'resolved_count': resolved_count,
+        'devices_reactivated': reactivated_count
     }), 200
+
+
+def _apply_bulk_filters(query, filters):
+    """Apply device/type/severity/time-range filters to an alert query
+    
+    Raises ValueError for unknown keys, malformed values or a filters
+    object that would not narrow the query, so a typo can never resolve
+    every open alert.
+    """
+    unknown = sorted(set(filters) - set(BULK_FILTERS))
+    if unknown:
+        raise ValueError(f'Unknown filters: {", ".join(unknown)}')
+    
+    applied = {key: value for key, value in filters.items() if value is not None and value != ''}
+    if not applied:
+        raise ValueError(f'filters must set at least one of: {", ".join(BULK_FILTERS)}')
+    
+    if 'device_id' in applied:
+        device_id = applied['device_id']
+        if isinstance(device_id, bool) or not isinstance(device_id, (int, str)) or not str(device_id).isdigit():
+            raise ValueError(f'Invalid device_id: {device_id}')
+        query = query.filter(TamperAlert.device_id == int(device_id))
+    
+    if 'alert_type' in applied:
+        if not isinstance(applied['alert_type'], str):
+            raise ValueError(f"Invalid alert_type: {applied['alert_type']}")
+        query = query.filter(TamperAlert.alert_type == applied['alert_type'])
+    
+    if 'severity' in applied:
+        if not isinstance(applied['severity'], str) or not validate_alert_severity(applied['severity']):
+            raise ValueError(f"Invalid severity: {applied['severity']}")
+        query = query.filter(TamperAlert.severity == applied['severity'])
+    
+    if 'start_time' in applied:
+        query = query.filter(TamperAlert.timestamp >= parse_utc_timestamp(applied['start_time'], 'start_time'))
+    
+    if 'end_time' in applied:
+        query = query.filter(TamperAlert.timestamp <= parse_utc_timestamp(applied['end_time'], 'end_time'))
+    
+    return query
+
+
+def _reactivate_devices(device_ids):
+    """Set tampered devices back to active when they have no unresolved alerts"""
+    if not device_ids:
+        return 0
+    
+    open_alerts = db.session.query(TamperAlert.id).filter(
+        TamperAlert.device_id == Device.id,
+        TamperAlert.resolved == False  # noqa: E712
+    ).exists()
+    
+    return Device.query.filter(
+        Device.id.in_(device_ids),
+        Device.status == 'tampered',
+        ~open_alerts
+    ).update({Device.status: 'active'}, synchronize_session=False)
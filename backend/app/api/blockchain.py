@@ -4,7 +4,10 @@ from app.api import blockchain_bp
 from app.extensions import db
 from app.models import BlockchainLog, Device
 from app.services.blockchain_service import BlockchainService
+from app.utils.db_routing import read_replica
+from app.utils.serialization import fetch_records
 from datetime import datetime, timedelta
+from sqlalchemy import select
 
 @blockchain_bp.route('/logs', methods=['GET'])
 @jwt_required()
@@ -14,18 +17,18 @@ def get_blockchain_logs():
     event_type = request.args.get('event_type')
     limit = int(request.args.get('limit', 50))
     
-    query = BlockchainLog.query
+    query = select(*BlockchainLog.api_columns())
     
     if device_id:
-        query = query.filter_by(device_id=device_id)
+        query = query.where(BlockchainLog.device_id == device_id)
     
     if event_type:
-        query = query.filter_by(event_type=event_type)
+        query = query.where(BlockchainLog.event_type == event_type)
     
-    logs = query.order_by(BlockchainLog.block_number.desc()).limit(limit).all()
+    logs = fetch_records(query.order_by(BlockchainLog.block_number.desc()).limit(limit))
     
     return jsonify({
-        'logs': [log.to_dict() for log in logs],
+        'logs': logs,
         'total': len(logs)
     }), 200
 
@@ -80,6 +83,18 @@ def verify_log(log_id):
     }), 200
 
 
+@blockchain_bp.route('/verify-chain', methods=['GET'])
+@jwt_required()
+@read_replica
+def verify_chain():
+    """Verify hash and linkage integrity of the whole chain or one device's entries"""
+    device_id = request.args.get('device_id', type=int)
+    
+    result = BlockchainService.verify_chain_integrity(device_id=device_id)
+    
+    return jsonify(result), 200
+
+
 @blockchain_bp.route('/chain-status', methods=['GET'])
 @jwt_required()
 def get_chain_status():
@@ -105,6 +120,7 @@ def get_chain_status():
 
 @blockchain_bp.route('/device-history/<int:device_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_device_blockchain_history(device_id):
     """Get complete blockchain history for a device"""
     device = Device.query.get(device_id)
@@ -112,15 +128,17 @@ def get_device_blockchain_history(device_id):
     if not device:
         return jsonify({'error': 'Device not found'}), 404
     
-    logs = BlockchainLog.query.filter_by(device_id=device_id)\
-        .order_by(BlockchainLog.block_number.asc())\
-        .all()
+    logs = fetch_records(
+        select(*BlockchainLog.api_columns())
+        .where(BlockchainLog.device_id == device_id)
+        .order_by(BlockchainLog.block_number.asc())
+    )
     
     history = {
         'device_id': device_id,
         'device_type': device.device_type,
         'total_entries': len(logs),
-        'logs': [log.to_dict() for log in logs]
+        'logs': logs
     }
     
     return jsonify(history), 200
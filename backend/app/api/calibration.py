@@ -0,0 +1,102 @@
+from flask import request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import calibration_bp
+from app.extensions import db
+from app.models import CalibrationLog, Device
+from app.services.calibration_service import CalibrationService
+from app.utils.db_routing import read_replica
+from app.utils.helpers import parse_utc_timestamp
+
+
+@calibration_bp.route('/', methods=['GET'])
+@jwt_required()
+@read_replica
+def get_calibration_logs():
+    """Get recent calibration logs across the fleet"""
+    limit = min(int(request.args.get('limit', 100)), 1000)
+    query = CalibrationLog.query
+    
+    status = request.args.get('status')
+    if status:
+        query = query.filter_by(status=status)
+    
+    logs = query.order_by(CalibrationLog.calibration_date.desc()).limit(limit).all()
+    return jsonify({'logs': [log.to_dict() for log in logs], 'total': len(logs)}), 200
+
+
+@calibration_bp.route('/due', methods=['GET'])
+@jwt_required()
+@read_replica
+def get_due_calibrations():
+    """Get devices overdue or due for calibration within ?days"""
+    devices = CalibrationService.due(
+        within_days=request.args.get('days', type=int),
+        device_type=request.args.get('device_type')
+    )
+    
+    return jsonify({
+        'devices': devices,
+        'overdue': sum(1 for device in devices if device['status'] == 'overdue'),
+        'total': len(devices)
+    }), 200
+
+
+@calibration_bp.route('/<int:device_id>', methods=['GET'])
+@jwt_required()
+@read_replica
+def get_device_calibrations(device_id):
+    """Get a device's calibration schedule and history"""
+    device = Device.query.get(device_id)
+    
+    if not device:
+        return jsonify({'error': 'Device not found'}), 404
+    
+    logs = CalibrationLog.query.filter_by(device_id=device_id)\
+        .order_by(CalibrationLog.calibration_date.desc()).all()
+    
+    return jsonify({
+        'device_id': device_id,
+        'last_calibration': device.last_calibration.isoformat() if device.last_calibration else None,
+        'next_calibration_date': device.next_calibration_date.isoformat() if device.next_calibration_date else None,
+        'interval_days': CalibrationService.interval_days(device.device_type),
+        'logs': [log.to_dict() for log in logs]
+    }), 200
+
+
+@calibration_bp.route('/<int:device_id>', methods=['POST'])
+@jwt_required()
+def record_calibration(device_id):
+    """Record a calibration and reschedule the device"""
+    device = Device.query.get(device_id)
+    
+    if not device:
+        return jsonify({'error': 'Device not found'}), 404
+    
+    data = request.get_json() or {}
+    try:
+        log = CalibrationService.record(
+            device,
+            status=data.get('status', 'passed'),
+            calibrated_by=get_jwt_identity(),
+            notes=data.get('notes'),
+            calibration_date=parse_utc_timestamp(data.get('calibration_date'), 'calibration_date'),
+            next_calibration_date=parse_utc_timestamp(data.get('next_calibration_date'), 'next_calibration_date')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    db.session.commit()
+    
+    return jsonify({
+        'calibration': log.to_dict(),
+        'device': device.to_dict()
+    }), 201
+
+
+@calibration_bp.route('/scan', methods=['POST'])
+@jwt_required()
+def scan_overdue():
+    """Raise alerts for overdue devices now instead of waiting for the scheduler"""
+    result = CalibrationService.scan()
+    db.session.commit()
+    return jsonify(result), 200
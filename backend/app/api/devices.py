@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required
 from app.api import devices_bp
 from app.extensions import db
 from app.models import Device, DeviceReading, TamperAlert
+from app.services.calibration_service import CalibrationService
 from datetime import datetime, timedelta
 
 @devices_bp.route('/', methods=['GET'])
@@ -37,9 +38,9 @@ def create_device():
     device = Device(
         device_type=data.get('device_type'),
         device_id=data.get('device_id'),
-        location=data.get('location'),
-        last_calibration=datetime.utcnow()
+        location=data.get('location')
     )
+    CalibrationService.schedule(device, datetime.utcnow())
     
     db.session.add(device)
     db.session.commit()
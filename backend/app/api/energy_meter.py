@@ -3,22 +3,41 @@ from flask_jwt_extended import jwt_required
 from app.api import energy_meter_bp
 from app.extensions import db
 from app.models import Device, DeviceReading, TamperAlert
-from app.services.data_simulator import DataSimulator
-from app.services.tamper_detection import TamperDetector
+from app.services.correlation_engine import CorrelationEngine
+from app.services.energy_integrator import EnergyIntegrator
+from app.services.rule_engine import RuleEngine
+from app.utils.metrics import READINGS_INGESTED
+from app.utils.db_routing import read_replica
+from app.utils.serialization import epoch_ms, fetch_columns, fetch_rows
+from app.utils.wire_format import read_payload, respond, wants_msgpack
 from datetime import datetime, timedelta
+from sqlalchemy import case, func, select
+
+# Value order for positional (array) MessagePack reading payloads
+PAYLOAD_FIELDS = ('power', 'voltage', 'current')
 
 @energy_meter_bp.route('/live-data', methods=['GET'])
 @jwt_required()
 def get_live_data():
     """Get real-time simulated energy meter data"""
+    # numpy is only needed for simulation; import it on first use
+    from app.services.data_simulator import DataSimulator
+    
     inject_tamper = request.args.get('tamper', 'false').lower() == 'true'
     num_points = int(request.args.get('points', 50))
+    seed = request.args.get('seed', type=int)
+    columnar = request.args.get('format') == 'columnar'
     
     data = DataSimulator.generate_energy_meter_data(
         num_points=num_points,
-        inject_tamper=inject_tamper
+        inject_tamper=inject_tamper,
+        seed=seed,
+        columnar=columnar
     )
     
+    if columnar:
+        data = DataSimulator.chart_series(data, 'power', decimals=3)
+    
     return jsonify({
         'device_type': 'energy_meter',
         'data': data,
@@ -28,6 +47,7 @@ def get_live_data():
 
 @energy_meter_bp.route('/readings/<int:device_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_readings(device_id):
     """Get historical readings for energy meter"""
     device = Device.query.filter_by(id=device_id, device_type='energy_meter').first()
@@ -37,16 +57,59 @@ def get_readings(device_id):
     
     hours = int(request.args.get('hours', 24))
     start_time = datetime.utcnow() - timedelta(hours=hours)
+    # Downsample long windows to about this many points (anomalies always kept)
+    max_points = request.args.get('max_points', type=int)
     
-    readings = DeviceReading.query.filter(
-        DeviceReading.device_id == device_id,
-        DeviceReading.timestamp >= start_time
-    ).order_by(DeviceReading.timestamp.asc()).all()
+    # Chart mode: parallel arrays built in SQL, timestamps as epoch ms
+    if request.args.get('format') == 'columnar':
+        series = fetch_columns(
+            select(
+                epoch_ms(DeviceReading.timestamp).label('timestamps'),
+                DeviceReading.value.label('values'),
+                DeviceReading.is_anomaly.label('anomalies')
+            ).where(
+                DeviceReading.device_id == device_id,
+                DeviceReading.timestamp >= start_time
+            ).order_by(DeviceReading.timestamp.asc())
+        )
+        raw_total = len(series['timestamps'])
+        if max_points:
+            from app.utils.downsampling import downsample_series
+            series = downsample_series(series, max_points)
+        
+        return respond({
+            'device_id': device_id,
+            'readings': series,
+            'total': len(series['timestamps']),
+            'raw_total': raw_total
+        })
+    
+    columns, rows = fetch_rows(
+        select(*DeviceReading.api_columns()).where(
+            DeviceReading.device_id == device_id,
+            DeviceReading.timestamp >= start_time
+        ).order_by(DeviceReading.timestamp.asc())
+    )
+    raw_total = len(rows)
+    if max_points:
+        from app.utils.downsampling import downsample_rows
+        rows = downsample_rows(rows, columns.index('value'), columns.index('is_anomaly'), max_points)
+    
+    # MessagePack clients get positional rows under a single column header
+    if wants_msgpack():
+        return respond({
+            'device_id': device_id,
+            'columns': columns,
+            'readings': rows,
+            'total': len(rows),
+            'raw_total': raw_total
+        })
     
     return jsonify({
         'device_id': device_id,
-        'readings': [r.to_dict() for r in readings],
-        'total': len(readings)
+        'readings': [dict(zip(columns, row)) for row in rows],
+        'total': len(rows),
+        'raw_total': raw_total
     }), 200
 
 
@@ -59,13 +122,14 @@ def add_reading(device_id):
     if not device:
         return jsonify({'error': 'Energy meter not found'}), 404
     
-    data = request.get_json()
+    try:
+        data = read_payload(PAYLOAD_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Detect voltage spike anomaly
-    is_anomaly = TamperDetector.detect_voltage_anomaly(
-        voltage=data.get('voltage'),
-        device_id=device_id
-    )
+    # Configured tamper rules; raises their alerts
+    triggered = RuleEngine.evaluate(device, data)
+    is_anomaly = bool(triggered)
     
     reading = DeviceReading(
         device_id=device_id,
@@ -73,6 +137,8 @@ def add_reading(device_id):
         value=data.get('power'),
         unit='kW',
         is_anomaly=is_anomaly,
+        voltage=data.get('voltage'),
+        current=data.get('current'),
         extra_data={  # CHANGED
             'voltage': data.get('voltage'),
             'current': data.get('current')
@@ -81,27 +147,35 @@ def add_reading(device_id):
     
     db.session.add(reading)
     
-    # Create alert if voltage spike detected
     if is_anomaly:
-        alert = TamperAlert(
-            device_id=device_id,
-            alert_type='voltage_spike',
-            severity='critical',
-            description=f'Voltage spike detected: {data.get("voltage")} V'
-        )
-        db.session.add(alert)
         device.status = 'tampered'
     
+    # Time-weighted energy buckets; reported power vs voltage x current
+    if EnergyIntegrator.observe(
+        device,
+        power=data.get('power'),
+        voltage=data.get('voltage'),
+        current=data.get('current'),
+        is_anomaly=is_anomaly
+    ):
+        device.status = 'tampered'
+    
+    # Synchronized anomalies across devices at the same location
+    CorrelationEngine.observe(device, reading.value, is_anomaly)
+    
     db.session.commit()
+    READINGS_INGESTED.labels('energy_meter').inc()
     
-    return jsonify({
+    return respond({
         'reading': reading.to_dict(),
-        'anomaly_detected': is_anomaly
-    }), 201
+        'anomaly_detected': is_anomaly,
+        'triggered_rules': triggered
+    }, 201)
 
 
 @energy_meter_bp.route('/analytics/<int:device_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_analytics(device_id):
     """Get analytics for energy meter"""
     device = Device.query.filter_by(id=device_id, device_type='energy_meter').first()
@@ -110,35 +184,69 @@ def get_analytics(device_id):
         return jsonify({'error': 'Energy meter not found'}), 404
     
     start_time = datetime.utcnow() - timedelta(days=7)
-    readings = DeviceReading.query.filter(
+    total, anomaly_count, avg_power, peak_power, avg_voltage = db.session.query(
+        func.count(DeviceReading.id),
+        func.sum(case((DeviceReading.is_anomaly == True, 1), else_=0)),  # noqa: E712
+        func.avg(DeviceReading.value),
+        func.max(DeviceReading.value),
+        func.avg(DeviceReading.voltage)
+    ).filter(
         DeviceReading.device_id == device_id,
         DeviceReading.timestamp >= start_time
-    ).all()
+    ).one()
     
-    if not readings:
+    if not total:
         return jsonify({
             'device_id': device_id,
             'message': 'No data available'
         }), 200
     
-    power_values = [r.value for r in readings]
-    voltages = [r.metadata.get('voltage', 0) for r in readings if r.metadata]
-    anomaly_count = sum(1 for r in readings if r.is_anomaly)
+    # Trapezoidal over real timestamps; gaps past MAX_GAP_SECONDS are not interpolated
+    window = EnergyIntegrator.analyze_window(device_id, start_time)
     
     analytics = {
         'device_id': device_id,
-        'total_readings': len(readings),
+        'total_readings': total,
         'anomaly_count': anomaly_count,
-        'avg_power': round(sum(power_values) / len(power_values), 3),
-        'avg_voltage': round(sum(voltages) / len(voltages), 2) if voltages else 0,
-        'peak_power': round(max(power_values), 3),
-        'total_energy_consumed': round(sum(power_values) * 0.1, 2),  # Approximate kWh
+        'avg_power': round(avg_power, 3),
+        'avg_voltage': round(avg_voltage, 2) if avg_voltage is not None else 0,
+        'peak_power': round(peak_power, 3),
+        'total_energy_consumed': round(window['energy_kwh'], 2),  # kWh
+        'integrated_hours': window['integrated_hours'],
+        'gap_hours': window['gap_hours'],
+        'daily_energy': EnergyIntegrator.buckets(device_id, start_time, granularity='day'),
+        'power_consistency': window['power_consistency'],
         'voltage_spikes': anomaly_count
     }
     
     return jsonify(analytics), 200
 
 
+@energy_meter_bp.route('/energy/<int:device_id>', methods=['GET'])
+@jwt_required()
+@read_replica
+def get_energy(device_id):
+    """Get hourly or daily integrated energy for an energy meter"""
+    device = Device.query.filter_by(id=device_id, device_type='energy_meter').first()
+    
+    if not device:
+        return jsonify({'error': 'Energy meter not found'}), 404
+    
+    granularity = request.args.get('granularity', 'hour')
+    if granularity not in ('hour', 'day'):
+        return jsonify({'error': 'granularity must be hour or day'}), 400
+    
+    hours = int(request.args.get('hours', 24))
+    buckets = EnergyIntegrator.buckets(device_id, datetime.utcnow() - timedelta(hours=hours), granularity)
+    
+    return jsonify({
+        'device_id': device_id,
+        'granularity': granularity,
+        'buckets': buckets,
+        'total_energy_kwh': round(sum(bucket['energy_kwh'] for bucket in buckets), 4)
+    }), 200
+
+
 @energy_meter_bp.route('/status', methods=['GET'])
 @jwt_required()
 def get_all_status():
@@ -3,22 +3,42 @@ from flask_jwt_extended import jwt_required
 from app.api import fuel_dispenser_bp
 from app.extensions import db
 from app.models import Device, DeviceReading, TamperAlert
-from app.services.data_simulator import DataSimulator
-from app.services.tamper_detection import TamperDetector
+from app.services.correlation_engine import CorrelationEngine
+from app.services.meter_reconciler import MeterReconciler
+from app.services.rule_engine import RuleEngine
+from app.utils.metrics import READINGS_INGESTED
+from app.utils.db_routing import read_replica
+from app.utils.helpers import parse_utc_timestamp
+from app.utils.serialization import epoch_ms, fetch_columns, fetch_rows
+from app.utils.wire_format import read_payload, respond, wants_msgpack
 from datetime import datetime, timedelta
+from sqlalchemy import case, func, select
+
+# Value order for positional (array) MessagePack reading payloads
+PAYLOAD_FIELDS = ('flow_rate', 'totalizer', 'pulse_count', 'magnetic_field', 'pressure', 'nozzle_state', 'timestamp')
 
 @fuel_dispenser_bp.route('/live-data', methods=['GET'])
 @jwt_required()
 def get_live_data():
     """Get real-time simulated fuel dispenser data"""
+    # numpy is only needed for simulation; import it on first use
+    from app.services.data_simulator import DataSimulator
+    
     inject_tamper = request.args.get('tamper', 'false').lower() == 'true'
     num_points = int(request.args.get('points', 50))
+    seed = request.args.get('seed', type=int)
+    columnar = request.args.get('format') == 'columnar'
     
     data = DataSimulator.generate_fuel_dispenser_data(
         num_points=num_points,
-        inject_tamper=inject_tamper
+        inject_tamper=inject_tamper,
+        seed=seed,
+        columnar=columnar
     )
     
+    if columnar:
+        data = DataSimulator.chart_series(data, 'flow_rate', decimals=2)
+    
     return jsonify({
         'device_type': 'fuel_dispenser',
         'data': data,
@@ -28,6 +48,7 @@ def get_live_data():
 
 @fuel_dispenser_bp.route('/readings/<int:device_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_readings(device_id):
     """Get historical readings for fuel dispenser"""
     device = Device.query.filter_by(id=device_id, device_type='fuel_dispenser').first()
@@ -37,16 +58,59 @@ def get_readings(device_id):
     
     hours = int(request.args.get('hours', 24))
     start_time = datetime.utcnow() - timedelta(hours=hours)
+    # Downsample long windows to about this many points (anomalies always kept)
+    max_points = request.args.get('max_points', type=int)
     
-    readings = DeviceReading.query.filter(
-        DeviceReading.device_id == device_id,
-        DeviceReading.timestamp >= start_time
-    ).order_by(DeviceReading.timestamp.asc()).all()
+    # Chart mode: parallel arrays built in SQL, timestamps as epoch ms
+    if request.args.get('format') == 'columnar':
+        series = fetch_columns(
+            select(
+                epoch_ms(DeviceReading.timestamp).label('timestamps'),
+                DeviceReading.value.label('values'),
+                DeviceReading.is_anomaly.label('anomalies')
+            ).where(
+                DeviceReading.device_id == device_id,
+                DeviceReading.timestamp >= start_time
+            ).order_by(DeviceReading.timestamp.asc())
+        )
+        raw_total = len(series['timestamps'])
+        if max_points:
+            from app.utils.downsampling import downsample_series
+            series = downsample_series(series, max_points)
+        
+        return respond({
+            'device_id': device_id,
+            'readings': series,
+            'total': len(series['timestamps']),
+            'raw_total': raw_total
+        })
+    
+    columns, rows = fetch_rows(
+        select(*DeviceReading.api_columns()).where(
+            DeviceReading.device_id == device_id,
+            DeviceReading.timestamp >= start_time
+        ).order_by(DeviceReading.timestamp.asc())
+    )
+    raw_total = len(rows)
+    if max_points:
+        from app.utils.downsampling import downsample_rows
+        rows = downsample_rows(rows, columns.index('value'), columns.index('is_anomaly'), max_points)
+    
+    # MessagePack clients get positional rows under a single column header
+    if wants_msgpack():
+        return respond({
+            'device_id': device_id,
+            'columns': columns,
+            'readings': rows,
+            'total': len(rows),
+            'raw_total': raw_total
+        })
     
     return jsonify({
         'device_id': device_id,
-        'readings': [r.to_dict() for r in readings],
-        'total': len(readings)
+        'readings': [dict(zip(columns, row)) for row in rows],
+        'total': len(rows),
+        'raw_total': raw_total
     }), 200
 
 
@@ -59,14 +123,16 @@ def add_reading(device_id):
     if not device:
         return jsonify({'error': 'Fuel dispenser not found'}), 404
     
-    data = request.get_json()
+    try:
+        data = read_payload(PAYLOAD_FIELDS)
+        # Device clock, when sent; the reconciler integrates flow over it
+        reading_time = parse_utc_timestamp(data.get('timestamp'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Detect magnetic tamper or flow irregularity
-    is_anomaly = TamperDetector.detect_magnetic_tamper(
-        magnetic_field=data.get('magnetic_field'),
-        flow_rate=data.get('flow_rate'),
-        device_id=device_id
-    )
+    # Configured tamper rules; raises their alerts
+    triggered = RuleEngine.evaluate(device, data)
+    is_anomaly = bool(triggered)
     
     reading = DeviceReading(
         device_id=device_id,
@@ -74,6 +140,9 @@ def add_reading(device_id):
         value=data.get('flow_rate'),
         unit='L/min',
         is_anomaly=is_anomaly,
+        magnetic_field=data.get('magnetic_field'),
+        pressure=data.get('pressure'),
+        totalizer=data.get('totalizer'),
         extra_data={  # CHANGED
             'totalizer': data.get('totalizer'),
             'pulse_count': data.get('pulse_count'),
@@ -85,27 +154,36 @@ def add_reading(device_id):
     
     db.session.add(reading)
     
-    # Create alert if tamper detected
     if is_anomaly:
-        alert = TamperAlert(
-            device_id=device_id,
-            alert_type='magnetic_tamper',
-            severity='critical',
-            description=f'Magnetic tampering detected. Field: {data.get("magnetic_field")} T'
-        )
-        db.session.add(alert)
         device.status = 'tampered'
     
+    # Totalizer advance vs integrated flow and pulse counts
+    discrepancies = MeterReconciler.observe(
+        device,
+        flow_rate=data.get('flow_rate'),
+        totalizer=data.get('totalizer'),
+        pulse_count=data.get('pulse_count'),
+        reading_time=reading_time
+    )
+    if discrepancies:
+        device.status = 'tampered'
+    
+    # Synchronized anomalies across devices at the same location
+    CorrelationEngine.observe(device, reading.value, is_anomaly)
+    
     db.session.commit()
+    READINGS_INGESTED.labels('fuel_dispenser').inc()
     
-    return jsonify({
+    return respond({
         'reading': reading.to_dict(),
-        'anomaly_detected': is_anomaly
-    }), 201
+        'anomaly_detected': is_anomaly,
+        'triggered_rules': triggered
+    }, 201)
 
 
 @fuel_dispenser_bp.route('/analytics/<int:device_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_analytics(device_id):
     """Get analytics for fuel dispenser"""
     device = Device.query.filter_by(id=device_id, device_type='fuel_dispenser').first()
@@ -114,30 +192,33 @@ def get_analytics(device_id):
         return jsonify({'error': 'Fuel dispenser not found'}), 404
     
     start_time = datetime.utcnow() - timedelta(days=7)
-    readings = DeviceReading.query.filter(
+    total, anomaly_count, avg_flow, peak_flow, sum_flow, avg_magnetic = db.session.query(
+        func.count(DeviceReading.id),
+        func.sum(case((DeviceReading.is_anomaly == True, 1), else_=0)),  # noqa: E712
+        func.avg(DeviceReading.value),
+        func.max(DeviceReading.value),
+        func.sum(DeviceReading.value),
+        func.avg(DeviceReading.magnetic_field)
+    ).filter(
         DeviceReading.device_id == device_id,
         DeviceReading.timestamp >= start_time
-    ).all()
+    ).one()
     
-    if not readings:
+    if not total:
         return jsonify({
             'device_id': device_id,
             'message': 'No data available'
         }), 200
     
-    flow_rates = [r.value for r in readings]
-    anomaly_count = sum(1 for r in readings if r.is_anomaly)
-    magnetic_fields = [r.metadata.get('magnetic_field', 0) for r in readings if r.metadata]
-    
     analytics = {
         'device_id': device_id,
-        'total_readings': len(readings),
+        'total_readings': total,
         'anomaly_count': anomaly_count,
-        'avg_flow_rate': round(sum(flow_rates) / len(flow_rates), 2),
-        'peak_flow_rate': round(max(flow_rates), 2),
-        'total_fuel_dispensed': round(sum(flow_rates) * 0.016, 2),  # Approximate liters
+        'avg_flow_rate': round(avg_flow, 2),
+        'peak_flow_rate': round(peak_flow, 2),
+        'total_fuel_dispensed': round(sum_flow * 0.016, 2),  # Approximate liters
         'magnetic_tamper_count': anomaly_count,
-        'avg_magnetic_field': round(sum(magnetic_fields) / len(magnetic_fields), 2) if magnetic_fields else 0
+        'avg_magnetic_field': round(avg_magnetic, 2) if avg_magnetic is not None else 0
     }
     
     return jsonify(analytics), 200
@@ -168,7 +249,7 @@ def get_realtime_status(device_id):
             'status': 'No data available'
         }), 200
     
-    metadata = latest_reading.metadata or {}
+    metadata = latest_reading.extra_data or {}
     
     status = {
         'device_id': device_id,
@@ -189,6 +270,21 @@ def get_realtime_status(device_id):
     return jsonify(status), 200
 
 
+@fuel_dispenser_bp.route('/reconciliation/<int:device_id>', methods=['GET'])
+@jwt_required()
+def get_reconciliation_status(device_id):
+    """Get totalizer vs flow and pulse reconciliation state for a fuel dispenser"""
+    device = Device.query.filter_by(id=device_id, device_type='fuel_dispenser').first()
+    
+    if not device:
+        return jsonify({'error': 'Fuel dispenser not found'}), 404
+    
+    return jsonify({
+        'device_id': device_id,
+        **MeterReconciler.status(device)
+    }), 200
+
+
 @fuel_dispenser_bp.route('/status', methods=['GET'])
 @jwt_required()
 def get_all_status():
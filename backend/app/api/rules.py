@@ -0,0 +1,128 @@
+from flask import request, jsonify
+from flask_jwt_extended import jwt_required
+from app.api import rules_bp
+from app.extensions import db
+from app.models import Device, TamperRule
+from app.services.rule_engine import RuleEngine
+
+# Columns a client may set on a stored rule
+RULE_FIELDS = (
+    'name', 'device_type', 'device_id', 'field', 'condition', 'threshold', 'window_minutes',
+    'min_samples', 'fallback_threshold', 'alert_type', 'severity', 'description', 'enabled'
+)
+
+
+def _validated(data):
+    """Validate a rule payload; per-device rules take the device's type"""
+    definition = {key: data[key] for key in RULE_FIELDS if key in data}
+    
+    if definition.get('device_id') is not None:
+        device = Device.query.get(definition['device_id'])
+        if not device:
+            raise ValueError('Device not found')
+        definition['device_type'] = device.device_type
+    
+    return RuleEngine.validate(definition)
+
+
+@rules_bp.route('/', methods=['GET'])
+@jwt_required()
+def get_rules():
+    """Get stored tamper rules with optional filters"""
+    query = TamperRule.query
+    
+    device_type = request.args.get('device_type')
+    if device_type:
+        query = query.filter_by(device_type=device_type)
+    
+    device_id = request.args.get('device_id', type=int)
+    if device_id:
+        query = query.filter_by(device_id=device_id)
+    
+    rules = [rule.to_dict() for rule in query.order_by(TamperRule.id).all()]
+    return jsonify({'rules': rules, 'total': len(rules)}), 200
+
+
+@rules_bp.route('/effective/<int:device_id>', methods=['GET'])
+@jwt_required()
+def get_effective_rules(device_id):
+    """Get the compiled rules currently applied to a device's readings
+    
+    Each windowed rule's window entry shows its bucket layout and whether
+    its medians are truncated at the expected reading rate.
+    """
+    device = Device.query.get(device_id)
+    
+    if not device:
+        return jsonify({'error': 'Device not found'}), 404
+    
+    return jsonify({
+        'device_id': device_id,
+        'device_type': device.device_type,
+        'loaded_at': RuleEngine.ruleset()['loaded_at'],
+        'rules': [rule.definition for rule in RuleEngine.active_rules(device)]
+    }), 200
+
+
+@rules_bp.route('/', methods=['POST'])
+@jwt_required()
+def create_rule():
+    """Store a device type or per-device tamper rule"""
+    try:
+        definition = _validated(request.get_json() or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    rule = TamperRule(**{key: definition.get(key) for key in RULE_FIELDS if key in definition})
+    db.session.add(rule)
+    db.session.commit()
+    RuleEngine.reload()
+    
+    # Bucket layout, and a warning when medians will be truncated
+    return jsonify({**rule.to_dict(), 'window': definition['window']}), 201
+
+
+@rules_bp.route('/<int:rule_id>', methods=['PUT'])
+@jwt_required()
+def update_rule(rule_id):
+    """Update a stored tamper rule"""
+    rule = TamperRule.query.get(rule_id)
+    
+    if not rule:
+        return jsonify({'error': 'Rule not found'}), 404
+    
+    current = {key: value for key, value in rule.to_dict().items() if key in RULE_FIELDS}
+    try:
+        definition = _validated({**current, **(request.get_json() or {})})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    for key in RULE_FIELDS:
+        setattr(rule, key, definition.get(key))
+    db.session.commit()
+    RuleEngine.reload()
+    
+    return jsonify({**rule.to_dict(), 'window': definition['window']}), 200
+
+
+@rules_bp.route('/<int:rule_id>', methods=['DELETE'])
+@jwt_required()
+def delete_rule(rule_id):
+    """Delete a stored tamper rule"""
+    rule = TamperRule.query.get(rule_id)
+    
+    if not rule:
+        return jsonify({'error': 'Rule not found'}), 404
+    
+    db.session.delete(rule)
+    db.session.commit()
+    RuleEngine.reload()
+    
+    return jsonify({'message': 'Rule deleted successfully'}), 200
+
+
+@rules_bp.route('/reload', methods=['POST'])
+@jwt_required()
+def reload_rules():
+    """Recompile rules in this worker now; others reload within TAMPER_RULES_RELOAD_SECONDS"""
+    return jsonify(RuleEngine.reload()), 200
@@ -3,22 +3,41 @@ from flask_jwt_extended import jwt_required
 from app.api import weighing_scale_bp
 from app.extensions import db
 from app.models import Device, DeviceReading, TamperAlert
-from app.services.data_simulator import DataSimulator
-from app.services.tamper_detection import TamperDetector
+from app.services.correlation_engine import CorrelationEngine
+from app.services.drift_detector import DriftDetector
+from app.services.rule_engine import RuleEngine
+from app.utils.metrics import READINGS_INGESTED
+from app.utils.db_routing import read_replica
+from app.utils.serialization import epoch_ms, fetch_columns, fetch_rows
+from app.utils.wire_format import read_payload, respond, wants_msgpack
 from datetime import datetime, timedelta
+from sqlalchemy import case, func, select
+
+# Value order for positional (array) MessagePack reading payloads
+PAYLOAD_FIELDS = ('weight', 'metadata')
 
 @weighing_scale_bp.route('/live-data', methods=['GET'])
 @jwt_required()
 def get_live_data():
     """Get real-time simulated weighing scale data"""
+    # numpy is only needed for simulation; import it on first use
+    from app.services.data_simulator import DataSimulator
+    
     inject_tamper = request.args.get('tamper', 'false').lower() == 'true'
     num_points = int(request.args.get('points', 50))
+    seed = request.args.get('seed', type=int)
+    columnar = request.args.get('format') == 'columnar'
     
     data = DataSimulator.generate_weighing_scale_data(
         num_points=num_points,
-        inject_tamper=inject_tamper
+        inject_tamper=inject_tamper,
+        seed=seed,
+        columnar=columnar
     )
     
+    if columnar:
+        data = DataSimulator.chart_series(data, 'weight', decimals=2)
+    
     return jsonify({
         'device_type': 'weighing_scale',
         'data': data,
@@ -28,6 +47,7 @@ def get_live_data():
 
 @weighing_scale_bp.route('/readings/<int:device_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_readings(device_id):
     """Get historical readings for a weighing scale"""
     device = Device.query.filter_by(id=device_id, device_type='weighing_scale').first()
@@ -38,16 +58,59 @@ def get_readings(device_id):
     # Get time range from query params
     hours = int(request.args.get('hours', 24))
     start_time = datetime.utcnow() - timedelta(hours=hours)
+    # Downsample long windows to about this many points (anomalies always kept)
+    max_points = request.args.get('max_points', type=int)
+    
+    # Chart mode: parallel arrays built in SQL, timestamps as epoch ms
+    if request.args.get('format') == 'columnar':
+        series = fetch_columns(
+            select(
+                epoch_ms(DeviceReading.timestamp).label('timestamps'),
+                DeviceReading.value.label('values'),
+                DeviceReading.is_anomaly.label('anomalies')
+            ).where(
+                DeviceReading.device_id == device_id,
+                DeviceReading.timestamp >= start_time
+            ).order_by(DeviceReading.timestamp.asc())
+        )
+        raw_total = len(series['timestamps'])
+        if max_points:
+            from app.utils.downsampling import downsample_series
+            series = downsample_series(series, max_points)
+        
+        return respond({
+            'device_id': device_id,
+            'readings': series,
+            'total': len(series['timestamps']),
+            'raw_total': raw_total
+        })
     
-    readings = DeviceReading.query.filter(
-        DeviceReading.device_id == device_id,
-        DeviceReading.timestamp >= start_time
-    ).order_by(DeviceReading.timestamp.asc()).all()
+    columns, rows = fetch_rows(
+        select(*DeviceReading.api_columns()).where(
+            DeviceReading.device_id == device_id,
+            DeviceReading.timestamp >= start_time
+        ).order_by(DeviceReading.timestamp.asc())
+    )
+    raw_total = len(rows)
+    if max_points:
+        from app.utils.downsampling import downsample_rows
+        rows = downsample_rows(rows, columns.index('value'), columns.index('is_anomaly'), max_points)
+    
+    # MessagePack clients get positional rows under a single column header
+    if wants_msgpack():
+        return respond({
+            'device_id': device_id,
+            'columns': columns,
+            'readings': rows,
+            'total': len(rows),
+            'raw_total': raw_total
+        })
     
     return jsonify({
         'device_id': device_id,
-        'readings': [r.to_dict() for r in readings],
-        'total': len(readings)
+        'readings': [dict(zip(columns, row)) for row in rows],
+        'total': len(rows),
+        'raw_total': raw_total
     }), 200
 
 
@@ -60,46 +123,52 @@ def add_reading(device_id):
     if not device:
         return jsonify({'error': 'Weighing scale not found'}), 404
     
-    data = request.get_json()
+    try:
+        data = read_payload(PAYLOAD_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Detect anomaly
-    is_anomaly = TamperDetector.detect_weight_anomaly(
-        current_weight=data.get('weight'),
-        device_id=device_id
-    )
+    # Configured tamper rules; raises their alerts
+    triggered = RuleEngine.evaluate(device, data)
+    is_anomaly = bool(triggered)
+    
+    # Slow drift that moves the median itself: CUSUM against the calibrated baseline
+    DriftDetector.observe(device, data.get('weight'), is_anomaly)
+    
+    metadata = data.get('metadata', {})
     
+    # Scale metadata is free-form; typed fields it carries (e.g. magnetic_field) fill their columns
     reading = DeviceReading(
         device_id=device_id,
         reading_type='weight',
         value=data.get('weight'),
         unit='kg',
         is_anomaly=is_anomaly,
-        extra_data=data.get('metadata', {})  # CHANGED
+        extra_data=metadata,  # CHANGED
+        **DeviceReading.typed_values(metadata)
     )
     
     db.session.add(reading)
     
-    # Create alert if anomaly detected
     if is_anomaly:
-        alert = TamperAlert(
-            device_id=device_id,
-            alert_type='weight_drift',
-            severity='high',
-            description=f'Abnormal weight detected: {data.get("weight")} kg'
-        )
-        db.session.add(alert)
         device.status = 'tampered'
     
+    # Synchronized anomalies across devices at the same location
+    CorrelationEngine.observe(device, reading.value, is_anomaly)
+    
     db.session.commit()
+    READINGS_INGESTED.labels('weighing_scale').inc()
     
-    return jsonify({
+    return respond({
         'reading': reading.to_dict(),
-        'anomaly_detected': is_anomaly
-    }), 201
+        'anomaly_detected': is_anomaly,
+        'triggered_rules': triggered
+    }, 201)
 
 
 @weighing_scale_bp.route('/analytics/<int:device_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_analytics(device_id):
     """Get analytics for weighing scale"""
     device = Device.query.filter_by(id=device_id, device_type='weighing_scale').first()
@@ -107,37 +176,56 @@ def get_analytics(device_id):
     if not device:
         return jsonify({'error': 'Weighing scale not found'}), 404
     
-    # Get readings from last 7 days
+    # Aggregate readings from last 7 days
     start_time = datetime.utcnow() - timedelta(days=7)
-    readings = DeviceReading.query.filter(
+    total, anomaly_count, avg_weight, min_weight, max_weight = db.session.query(
+        func.count(DeviceReading.id),
+        func.sum(case((DeviceReading.is_anomaly == True, 1), else_=0)),  # noqa: E712
+        func.avg(DeviceReading.value),
+        func.min(DeviceReading.value),
+        func.max(DeviceReading.value)
+    ).filter(
         DeviceReading.device_id == device_id,
         DeviceReading.timestamp >= start_time
-    ).all()
+    ).one()
     
-    if not readings:
+    if not total:
         return jsonify({
             'device_id': device_id,
             'message': 'No data available'
         }), 200
     
-    weights = [r.value for r in readings]
-    anomaly_count = sum(1 for r in readings if r.is_anomaly)
-    
     analytics = {
         'device_id': device_id,
-        'total_readings': len(readings),
+        'total_readings': total,
         'anomaly_count': anomaly_count,
-        'anomaly_percentage': round((anomaly_count / len(readings)) * 100, 2),
-        'avg_weight': round(sum(weights) / len(weights), 2),
-        'min_weight': round(min(weights), 2),
-        'max_weight': round(max(weights), 2),
-        'weight_drift': round(max(weights) - min(weights), 2),
+        'anomaly_percentage': round((anomaly_count / total) * 100, 2),
+        'avg_weight': round(avg_weight, 2),
+        'min_weight': round(min_weight, 2),
+        'max_weight': round(max_weight, 2),
+        'weight_drift': round(max_weight - min_weight, 2),
         'last_calibration': device.last_calibration.isoformat() if device.last_calibration else None
     }
     
     return jsonify(analytics), 200
 
 
+@weighing_scale_bp.route('/drift/<int:device_id>', methods=['GET'])
+@jwt_required()
+def get_drift_status(device_id):
+    """Get calibration drift (CUSUM) state for a weighing scale"""
+    device = Device.query.filter_by(id=device_id, device_type='weighing_scale').first()
+    
+    if not device:
+        return jsonify({'error': 'Weighing scale not found'}), 404
+    
+    return jsonify({
+        'device_id': device_id,
+        'last_calibration': device.last_calibration.isoformat() if device.last_calibration else None,
+        **DriftDetector.status(device)
+    }), 200
+
+
 @weighing_scale_bp.route('/status', methods=['GET'])
 @jwt_required()
 def get_all_status():
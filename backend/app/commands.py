@@ -0,0 +1,200 @@
+import json
+import time
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from flask_jwt_extended import create_access_token
+from app.extensions import db
+from app.services.calibration_service import CalibrationService
+from app.services.retention_service import RetentionService
+from app.services.schema_migrations import SchemaMigrations
+
+retention_cli = AppGroup('retention', help='Manage raw device reading retention.')
+archive_cli = AppGroup('archive', help='Export readings to columnar archives.')
+schema_cli = AppGroup('schema', help='Create and upgrade the database schema.')
+loadgen_cli = AppGroup('loadgen', help='Generate fleet-scale ingest load.')
+fleet_cli = AppGroup('fleet', help='Fleet-wide analysis jobs.')
+calibration_cli = AppGroup('calibration', help='Calibration schedules and overdue alerts.')
+
+
+@retention_cli.command('run')
+@click.option('--dry-run', is_flag=True, help='Report what would be removed without deleting.')
+@click.option('--interval', type=int, default=0, show_default=True,
+              help='Repeat every INTERVAL seconds as a scheduler process; 0 runs once.')
+def run_retention(dry_run, interval):
+    """Roll up and delete readings past their retention period"""
+    while True:
+        result = RetentionService.run(dry_run=dry_run)
+        click.echo(json.dumps(result, indent=2))
+        
+        if not interval:
+            break
+        # Release the connection between passes
+        db.session.remove()
+        time.sleep(interval)
+
+
+@retention_cli.command('report')
+def retention_report():
+    """Show reading volume and retention state per device type"""
+    click.echo(json.dumps(RetentionService.report(), indent=2))
+
+
+@retention_cli.command('partition')
+@click.option('--months-ahead', default=3, show_default=True, help='Future monthly partitions to create.')
+def partition_readings(months_ahead):
+    """Partition device_readings by month (PostgreSQL only)"""
+    if RetentionService.is_partitioned():
+        created = RetentionService.ensure_partitions(months_ahead=months_ahead)
+    else:
+        created = RetentionService.partition_table(months_ahead=months_ahead)
+    click.echo(json.dumps({'partitions': created}, indent=2))
+
+
+@archive_cli.command('export')
+@click.argument('output', type=click.Path(dir_okay=False))
+@click.option('--device-id', 'device_ids', type=int, multiple=True, help='Device primary key; repeatable.')
+@click.option('--device-type', help='Only export this device type.')
+@click.option('--start', type=click.DateTime(), help='Inclusive start of the time range (UTC).')
+@click.option('--end', type=click.DateTime(), help='Exclusive end of the time range (UTC).')
+@click.option('--chunk-size', type=int, default=50000, show_default=True)
+@click.option('--compression', default='zstd', show_default=True)
+def export_archive(output, device_ids, device_type, start, end, chunk_size, compression):
+    """Stream readings into a Parquet file"""
+    # pandas/pyarrow are only needed here; keep them out of app startup
+    from app.services.archive_service import ArchiveService
+    
+    started = datetime.utcnow()
+    result = ArchiveService.export_readings(
+        output,
+        device_ids=list(device_ids),
+        device_type=device_type,
+        start_time=start,
+        end_time=end,
+        chunk_size=chunk_size,
+        compression=compression
+    )
+    result['seconds'] = round((datetime.utcnow() - started).total_seconds(), 2)
+    click.echo(json.dumps(result, indent=2))
+
+
+@schema_cli.command('upgrade')
+@click.option('--batch-size', type=int, default=SchemaMigrations.DEFAULT_BATCH_SIZE, show_default=True)
+def upgrade_schema(batch_size):
+    """Create missing tables, columns and indexes and backfill derived fields"""
+    db.create_all()
+    try:
+        added = SchemaMigrations.add_missing_columns()
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    indexes = SchemaMigrations.add_missing_indexes()
+    backfilled = SchemaMigrations.backfill_reading_columns(batch_size=batch_size)
+    scheduled = CalibrationService.backfill_schedule()
+    click.echo(json.dumps({
+        'columns_added': added,
+        'indexes_created': indexes,
+        'readings_backfilled': backfilled,
+        'calibrations_scheduled': scheduled
+    }, indent=2))
+
+
+@loadgen_cli.command('run')
+@click.option('--devices', 'devices_per_type', type=int, default=100, show_default=True,
+              help='Simulated devices per device type.')
+@click.option('--readings', 'readings_per_device', type=int, default=10, show_default=True,
+              help='Readings posted per device.')
+@click.option('--rate', type=float, default=0, show_default=True, help='Global request rate (req/s); 0 is unthrottled.')
+@click.option('--concurrency', type=int, default=16, show_default=True)
+@click.option('--tamper-fraction', type=float, default=0.05, show_default=True,
+              help='Fraction of devices that inject tamper anomalies.')
+@click.option('--url', help='Target base URL; defaults to the in-process test client.')
+@click.option('--token', help='JWT for --url targets; in-process runs mint their own.')
+@click.option('--seed', type=int, help='Seed for reproducible payloads.')
+def run_loadgen(devices_per_type, readings_per_device, rate, concurrency, tamper_fraction, url, token, seed):
+    """Simulate a device fleet posting to the ingest endpoints"""
+    from app.services.load_generator import LoadGenerator
+    
+    if url and not token:
+        raise click.UsageError('--token is required with --url')
+    
+    if url:
+        generator = LoadGenerator(base_url=url, token=token, concurrency=concurrency, seed=seed)
+    else:
+        generator = LoadGenerator(
+            app=current_app._get_current_object(),
+            token=create_access_token(identity='loadgen'),
+            concurrency=concurrency,
+            seed=seed
+        )
+    
+    try:
+        devices = generator.create_devices(devices_per_type)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    requests_list = generator.build_requests(devices, readings_per_device, tamper_fraction=tamper_fraction)
+    click.echo(f'Sending {len(requests_list)} readings from {len(devices)} devices...', err=True)
+    
+    click.echo(json.dumps(generator.run(requests_list, rate=rate or None), indent=2))
+
+
+@fleet_cli.command('scan')
+@click.option('--hours', type=int, default=24, show_default=True, help='Reading window to scan.')
+@click.option('--workers', type=int, help='Scoring processes; defaults to the CPU count, 1 runs inline.')
+@click.option('--chunk-size', type=int, default=50000, show_default=True)
+@click.option('--contamination', type=float, default=0.1, show_default=True,
+              help='Expected outlier share for the per-type Isolation Forests.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the report to a .json or .csv file.')
+@click.option('--top', type=int, default=20, show_default=True, help='Devices to print when writing to --output.')
+def scan_fleet(hours, workers, chunk_size, contamination, output, top):
+    """Score every device's recent readings and rank them by tamper risk"""
+    from app.services.fleet_scan import FleetScanService
+    
+    report = FleetScanService.run(
+        hours=hours,
+        workers=workers,
+        chunk_size=chunk_size,
+        contamination=contamination
+    )
+    
+    if output:
+        FleetScanService.write_report(report, output)
+        report = {**report, 'output': output, 'devices': report['devices'][:top]}
+    
+    click.echo(json.dumps(report, indent=2))
+
+
+@calibration_cli.command('due')
+@click.option('--days', type=int, help='Look-ahead window; defaults to CALIBRATION_DUE_SOON_DAYS.')
+@click.option('--device-type', help='Only this device type.')
+def calibration_due(days, device_type):
+    """List devices overdue or due for calibration soon"""
+    devices = CalibrationService.due(within_days=days, device_type=device_type)
+    click.echo(json.dumps({'devices': devices, 'total': len(devices)}, indent=2))
+
+
+@calibration_cli.command('scan')
+@click.option('--interval', type=int, default=0, show_default=True,
+              help='Repeat every INTERVAL seconds as a scheduler process; 0 scans once.')
+def calibration_scan(interval):
+    """Raise calibration_overdue alerts for overdue devices"""
+    while True:
+        result = CalibrationService.scan()
+        db.session.commit()
+        click.echo(json.dumps(result))
+        
+        if not interval:
+            break
+        # Release the connection between passes
+        db.session.remove()
+        time.sleep(interval)
+
+
+def register_commands(app):
+    """Attach management commands to the Flask CLI"""
+    app.cli.add_command(retention_cli)
+    app.cli.add_command(archive_cli)
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(loadgen_cli)
+    app.cli.add_command(fleet_cli)
+    app.cli.add_command(calibration_cli)
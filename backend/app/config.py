@@ -3,6 +3,49 @@ from datetime import timedelta
 from pathlib import Path
 
 
+def _parse_overrides(value):
+    """Parse "key=int,key=int" environment values into a dict"""
+    return {
+        key.strip(): int(number)
+        for key, number in (item.split('=', 1) for item in value.split(',') if '=' in item)
+    }
+
+
+def _normalize_database_url(url):
+    # Fix for SQLAlchemy 1.4+ with postgres:// URLs
+    if url and url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+def _engine_options(uri):
+    """Pool and connection options for an engine, from the environment
+    
+    Each gunicorn worker builds its own engines, so the total number of
+    connections is workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+    """
+    options = {
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    }
+    
+    # In-memory SQLite (sqlite:// or :memory:) uses a StaticPool with no sizing
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        return options
+    
+    options.update({
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30))
+    })
+    
+    statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000))
+    if uri.startswith('postgresql') and statement_timeout:
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    
+    return options
+
+
 class Config:
     BASE_DIR = Path(__file__).parent.parent
     
@@ -12,10 +55,7 @@ class Config:
     # Database - Use PostgreSQL if DATABASE_URL exists, else SQLite
     if DATABASE_URL:
         # Running on Render with PostgreSQL
-        SQLALCHEMY_DATABASE_URI = DATABASE_URL
-        # Fix for SQLAlchemy 1.4+ with postgres:// URLs
-        if SQLALCHEMY_DATABASE_URI.startswith("postgres://"):
-            SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace("postgres://", "postgresql://", 1)
+        SQLALCHEMY_DATABASE_URI = _normalize_database_url(DATABASE_URL)
     else:
         # Local development with SQLite
         INSTANCE_PATH = BASE_DIR / 'instance'
@@ -24,6 +64,23 @@ class Config:
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Engine: pool sizing, pre-ping, recycle and PostgreSQL statement timeout
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+    
+    # SQLite: WAL lets readers proceed alongside the single writer
+    SQLITE_WAL = os.getenv('SQLITE_WAL', 'true').lower() == 'true'
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    
+    # Optional read replica. Endpoints marked @read_replica are served from it
+    # while its lag is within DB_REPLICA_MAX_LAG_SECONDS, else from the primary
+    DATABASE_REPLICA_URL = _normalize_database_url(os.getenv('DATABASE_REPLICA_URL'))
+    SQLALCHEMY_BINDS = {
+        'replica': {'url': DATABASE_REPLICA_URL, **_engine_options(DATABASE_REPLICA_URL)}
+    } if DATABASE_REPLICA_URL else {}
+    DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv('DB_REPLICA_MAX_LAG_SECONDS', 30))
+    DB_REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv('DB_REPLICA_CHECK_INTERVAL_SECONDS', 5))
+    
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
@@ -32,5 +89,48 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-app-secret-key')
     DEBUG = os.getenv('FLASK_ENV', 'development') != 'production'
     
+    # Alert aggregation: repeated alerts of the same type on a device are
+    # coalesced into the open incident while it was last seen within this window
+    ALERT_SUPPRESSION_WINDOW_SECONDS = int(os.getenv('ALERT_SUPPRESSION_WINDOW_SECONDS', 3600))
+    # Per alert type overrides, e.g. "magnetic_tamper=600,weight_drift=1800"
+    ALERT_SUPPRESSION_OVERRIDES = _parse_overrides(os.getenv('ALERT_SUPPRESSION_OVERRIDES', ''))
+    
+    # Tamper rules: built-in defaults, then rules from this JSON file, then
+    # rules stored in tamper_rules; workers pick up changes within the interval
+    TAMPER_RULES_FILE = os.getenv('TAMPER_RULES_FILE')
+    TAMPER_RULES_RELOAD_SECONDS = float(os.getenv('TAMPER_RULES_RELOAD_SECONDS', 30))
+    # Fastest expected per-device reading rate; median rules whose buckets
+    # would hold more readings than they keep are reported as truncated
+    TAMPER_RULES_EXPECTED_HZ = float(os.getenv('TAMPER_RULES_EXPECTED_HZ', 1.0))
+    
+    # Calibration schedule: days between calibrations, and how far ahead
+    # /api/calibration/due looks by default
+    CALIBRATION_INTERVAL_DAYS = int(os.getenv('CALIBRATION_INTERVAL_DAYS', 365))
+    # Per device type overrides, e.g. "fuel_dispenser=180,weighing_scale=90"
+    CALIBRATION_INTERVAL_OVERRIDES = _parse_overrides(os.getenv('CALIBRATION_INTERVAL_OVERRIDES', ''))
+    CALIBRATION_DUE_SOON_DAYS = int(os.getenv('CALIBRATION_DUE_SOON_DAYS', 14))
+    
+    # Data retention: raw readings older than this are rolled up hourly and
+    # deleted (or their partitions dropped on PostgreSQL)
+    READING_RETENTION_DAYS = int(os.getenv('READING_RETENTION_DAYS', 90))
+    # Per device type overrides, e.g. "fuel_dispenser=30,energy_meter=180"
+    READING_RETENTION_OVERRIDES = _parse_overrides(os.getenv('READING_RETENTION_OVERRIDES', ''))
+    READING_RETENTION_BATCH_SIZE = int(os.getenv('READING_RETENTION_BATCH_SIZE', 5000))
+    
+    # Request profiling (opt-in): per-endpoint timing, SQL query counts and
+    # sampled cProfile/pyinstrument captures written to PROFILING_DIR
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+    PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0.0))
+    PROFILING_ENGINE = os.getenv('PROFILING_ENGINE', 'cprofile')  # cprofile, pyinstrument
+    PROFILING_DIR = os.getenv('PROFILING_DIR', str(BASE_DIR / 'instance' / 'profiles'))
+    PROFILING_N_PLUS_ONE_THRESHOLD = int(os.getenv('PROFILING_N_PLUS_ONE_THRESHOLD', 20))
+    PROFILING_SLOW_REQUEST_MS = float(os.getenv('PROFILING_SLOW_REQUEST_MS', 500))
+    
+    # Readiness thresholds for /health/ready; freshness checks are disabled at 0
+    HEALTH_DB_LATENCY_MS = float(os.getenv('HEALTH_DB_LATENCY_MS', 250))
+    HEALTH_POOL_SATURATION = float(os.getenv('HEALTH_POOL_SATURATION', 0.9))
+    HEALTH_INGEST_LAG_SECONDS = int(os.getenv('HEALTH_INGEST_LAG_SECONDS', 0))
+    HEALTH_CHAIN_HEAD_AGE_SECONDS = int(os.getenv('HEALTH_CHAIN_HEAD_AGE_SECONDS', 0))
+    
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000,http://localhost:5173').split(',')
@@ -25,9 +25,12 @@ class Device(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     device_type = db.Column(db.String(50), nullable=False)  # weighing_scale, energy_meter, fuel_dispenser
     device_id = db.Column(db.String(100), unique=True, nullable=False)
-    location = db.Column(db.String(200))
+    # Co-located devices are looked up per reading by the correlation engine
+    location = db.Column(db.String(200), index=True)
     status = db.Column(db.String(20), default='active')  # active, inactive, tampered
     last_calibration = db.Column(db.DateTime)
+    # Copied from the latest CalibrationLog so the due-soon scan is one index range
+    next_calibration_date = db.Column(db.DateTime, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -42,6 +45,7 @@ class Device(db.Model):
             'location': self.location,
             'status': self.status,
             'last_calibration': self.last_calibration.isoformat() if self.last_calibration else None,
+            'next_calibration_date': self.next_calibration_date.isoformat() if self.next_calibration_date else None,
             'created_at': self.created_at.isoformat()
         }
 
@@ -58,6 +62,20 @@ class DeviceReading(db.Model):
     is_anomaly = db.Column(db.Boolean, default=False)
     extra_data = db.Column(db.JSON)  # CHANGED FROM metadata to extra_data
     
+    # Hot extra_data fields promoted to typed columns for SQL filtering/aggregation
+    voltage = db.Column(db.Float)
+    current = db.Column(db.Float)
+    magnetic_field = db.Column(db.Float)
+    pressure = db.Column(db.Float)
+    totalizer = db.Column(db.Float)
+    
+    TYPED_FIELDS = ('voltage', 'current', 'magnetic_field', 'pressure', 'totalizer')
+    
+    __table_args__ = (
+        db.Index('ix_device_readings_device_time', 'device_id', 'timestamp'),
+        db.Index('ix_device_readings_timestamp', 'timestamp'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -69,6 +87,86 @@ class DeviceReading(db.Model):
             'is_anomaly': self.is_anomaly,
             'metadata': self.extra_data  # Return as 'metadata' for API compatibility
         }
+    
+    @classmethod
+    def typed_values(cls, extra_data):
+        """Numeric TYPED_FIELDS in extra_data, as the schema backfill copies them"""
+        if not isinstance(extra_data, dict):
+            return {}
+        return {
+            field: extra_data[field] for field in cls.TYPED_FIELDS
+            if isinstance(extra_data.get(field), (int, float)) and not isinstance(extra_data[field], bool)
+        }
+    
+    @classmethod
+    def api_columns(cls):
+        """Columns labelled like to_dict() for row-level serialization"""
+        return [
+            cls.id,
+            cls.device_id,
+            cls.timestamp,
+            cls.reading_type,
+            cls.value,
+            cls.unit,
+            cls.is_anomaly,
+            cls.extra_data.label('metadata')
+        ]
+
+
+class ReadingRollup(db.Model):
+    __tablename__ = 'reading_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), nullable=False)
+    reading_type = db.Column(db.String(50), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)  # start of the hour
+    count = db.Column(db.Integer, nullable=False, default=0)
+    sum_value = db.Column(db.Float, nullable=False, default=0.0)
+    min_value = db.Column(db.Float)
+    max_value = db.Column(db.Float)
+    anomaly_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('device_id', 'reading_type', 'bucket_start', name='uq_reading_rollup_bucket'),
+    )
+    
+    def to_dict(self):
+        return {
+            'device_id': self.device_id,
+            'reading_type': self.reading_type,
+            'bucket_start': self.bucket_start.isoformat(),
+            'count': self.count,
+            'avg_value': self.sum_value / self.count if self.count else None,
+            'min_value': self.min_value,
+            'max_value': self.max_value,
+            'anomaly_count': self.anomaly_count
+        }
+
+
+class EnergyBucket(db.Model):
+    __tablename__ = 'energy_buckets'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)  # start of the hour
+    energy_kwh = db.Column(db.Float, nullable=False, default=0.0)  # integrated reported power
+    apparent_kvah = db.Column(db.Float, nullable=False, default=0.0)  # integrated voltage x current
+    covered_seconds = db.Column(db.Float, nullable=False, default=0.0)  # time spanned by integrated intervals
+    reading_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('device_id', 'bucket_start', name='uq_energy_bucket'),
+    )
+    
+    def to_dict(self):
+        return {
+            'device_id': self.device_id,
+            'bucket_start': self.bucket_start.isoformat(),
+            'energy_kwh': round(self.energy_kwh, 4),
+            'apparent_kvah': round(self.apparent_kvah, 4),
+            'covered_seconds': round(self.covered_seconds, 1),
+            'reading_count': self.reading_count
+        }
 
 
 class TamperAlert(db.Model):
@@ -83,6 +181,18 @@ class TamperAlert(db.Model):
     resolved = db.Column(db.Boolean, default=False)
     resolved_at = db.Column(db.DateTime)
     resolved_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    # Set for location-level alerts spanning several devices
+    location = db.Column(db.String(200))
+    
+    # Aggregation of repeated occurrences into one open incident
+    occurrence_count = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    first_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    peak_value = db.Column(db.Float)
+    
+    __table_args__ = (
+        db.Index('ix_tamper_alerts_open_incident', 'device_id', 'alert_type', 'resolved'),
+    )
     
     def to_dict(self):
         return {
@@ -93,8 +203,32 @@ class TamperAlert(db.Model):
             'description': self.description,
             'timestamp': self.timestamp.isoformat(),
             'resolved': self.resolved,
-            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None
+            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
+            'occurrence_count': self.occurrence_count,
+            'first_seen': self.first_seen.isoformat() if self.first_seen else None,
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None,
+            'peak_value': self.peak_value,
+            'location': self.location
         }
+    
+    @classmethod
+    def api_columns(cls):
+        """Columns labelled like to_dict() for row-level serialization"""
+        return [
+            cls.id,
+            cls.device_id,
+            cls.alert_type,
+            cls.severity,
+            cls.description,
+            cls.timestamp,
+            cls.resolved,
+            cls.resolved_at,
+            cls.occurrence_count,
+            cls.first_seen,
+            cls.last_seen,
+            cls.peak_value,
+            cls.location
+        ]
 
 
 class BlockchainLog(db.Model):
@@ -120,6 +254,20 @@ class BlockchainLog(db.Model):
             'timestamp': self.timestamp.isoformat(),
             'metadata': self.extra_data  # Return as 'metadata' for API compatibility
         }
+    
+    @classmethod
+    def api_columns(cls):
+        """Columns labelled like to_dict() for row-level serialization"""
+        return [
+            cls.id,
+            cls.block_number,
+            cls.device_id,
+            cls.event_type,
+            cls.data_hash,
+            cls.previous_hash,
+            cls.timestamp,
+            cls.extra_data.label('metadata')
+        ]
 
 
 class CalibrationLog(db.Model):
@@ -133,6 +281,10 @@ class CalibrationLog(db.Model):
     status = db.Column(db.String(20))  # passed, failed
     notes = db.Column(db.Text)
     
+    __table_args__ = (
+        db.Index('ix_calibration_logs_device_date', 'device_id', 'calibration_date'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -143,3 +295,64 @@ class CalibrationLog(db.Model):
             'status': self.status,
             'notes': self.notes
         }
+
+
+class TamperRule(db.Model):
+    __tablename__ = 'tamper_rules'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80), nullable=False)  # rules with the same name override each other
+    device_type = db.Column(db.String(50), nullable=False)
+    device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), index=True)  # set for per-device rules
+    field = db.Column(db.String(50), nullable=False)  # reading payload field
+    condition = db.Column(db.String(30), nullable=False)  # above, below, median_deviation, zscore, drop
+    threshold = db.Column(db.Float, nullable=False)
+    window_minutes = db.Column(db.Integer)
+    min_samples = db.Column(db.Integer, nullable=False, default=5)
+    fallback_threshold = db.Column(db.Float)  # absolute ceiling while the window is too thin
+    alert_type = db.Column(db.String(50), nullable=False)
+    severity = db.Column(db.String(20), nullable=False, default='high')
+    description = db.Column(db.Text)  # format template: {value}, {metric}, {baseline}, {threshold}
+    enabled = db.Column(db.Boolean, nullable=False, default=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'device_type': self.device_type,
+            'device_id': self.device_id,
+            'field': self.field,
+            'condition': self.condition,
+            'threshold': self.threshold,
+            'window_minutes': self.window_minutes,
+            'min_samples': self.min_samples,
+            'fallback_threshold': self.fallback_threshold,
+            'alert_type': self.alert_type,
+            'severity': self.severity,
+            'description': self.description,
+            'enabled': self.enabled,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class DetectorState(db.Model):
+    __tablename__ = 'detector_states'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    detector = db.Column(db.String(50), nullable=False)  # correlation, ...
+    key = db.Column(db.String(200), nullable=False)  # device id or location
+    state = db.Column(db.JSON, nullable=False, default=dict)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('detector', 'key', name='uq_detector_state_key'),
+    )
+    
+    def to_dict(self):
+        return {
+            'detector': self.detector,
+            'key': self.key,
+            'state': self.state,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from app.extensions import db
+from app.models import TamperAlert
+from app.utils.metrics import ALERT_INCIDENTS_OPENED, ALERTS_RAISED
+
+class AlertAggregator:
+    
+    DEFAULT_SUPPRESSION_WINDOW = 3600  # seconds
+    
+    @staticmethod
+    def suppression_window(alert_type):
+        """Get the suppression window for an alert type"""
+        overrides = current_app.config.get('ALERT_SUPPRESSION_OVERRIDES', {})
+        if alert_type in overrides:
+            return timedelta(seconds=overrides[alert_type])
+        
+        return timedelta(seconds=current_app.config.get(
+            'ALERT_SUPPRESSION_WINDOW_SECONDS',
+            AlertAggregator.DEFAULT_SUPPRESSION_WINDOW
+        ))
+    
+    @staticmethod
+    def raise_alert(device_id, alert_type, severity, description, value=None, location=None):
+        """Record an alert occurrence, coalescing it into an open incident
+        
+        If the device already has an unresolved alert of the same type that
+        was last seen within the suppression window, that incident is updated
+        in place (count, last_seen, peak value). Otherwise a new alert is
+        added to the session. The caller is responsible for committing.
+        
+        Location-level alerts (location given) coalesce per location instead,
+        whichever device triggered them.
+        
+        Returns a tuple of (alert, created).
+        """
+        ALERTS_RAISED.labels(alert_type, severity).inc()
+        now = datetime.utcnow()
+        window_start = now - AlertAggregator.suppression_window(alert_type)
+        
+        scope = TamperAlert.location == location if location else TamperAlert.device_id == device_id
+        incident = TamperAlert.query.filter(
+            scope,
+            TamperAlert.alert_type == alert_type,
+            TamperAlert.resolved == False,  # noqa: E712
+            TamperAlert.last_seen >= window_start
+        ).order_by(TamperAlert.last_seen.desc()).first()
+        
+        if incident is None:
+            alert = TamperAlert(
+                device_id=device_id,
+                alert_type=alert_type,
+                severity=severity,
+                description=description,
+                timestamp=now,
+                occurrence_count=1,
+                first_seen=now,
+                last_seen=now,
+                peak_value=value,
+                location=location
+            )
+            db.session.add(alert)
+            ALERT_INCIDENTS_OPENED.labels(alert_type, severity).inc()
+            return alert, True
+        
+        incident.occurrence_count = TamperAlert.occurrence_count + 1
+        incident.last_seen = now
+        incident.description = description
+        if value is not None and (incident.peak_value is None or value > incident.peak_value):
+            incident.peak_value = value
+        
+        return incident, False
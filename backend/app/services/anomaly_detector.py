@@ -6,6 +6,8 @@ from datetime import datetime, timedelta
 
 class AnomalyDetector:
     
+    METADATA_FEATURES = ['voltage', 'current', 'pressure', 'magnetic_field']
+    
     def __init__(self, contamination=0.1):
         """Initialize anomaly detector with Isolation Forest"""
         self.contamination = contamination
@@ -29,15 +31,30 @@ class AnomalyDetector:
             ]
             
             # Add metadata features if available
-            if reading.metadata:
-                for key in ['voltage', 'current', 'pressure', 'magnetic_field']:
-                    if key in reading.metadata:
-                        feature_vector.append(reading.metadata[key])
+            if reading.extra_data:
+                for key in self.METADATA_FEATURES:
+                    if key in reading.extra_data:
+                        feature_vector.append(reading.extra_data[key])
             
             features.append(feature_vector)
         
         return np.array(features)
     
+    def prepare_frame_features(self, df):
+        """Extract the same features from an archived readings DataFrame"""
+        timestamps = df['timestamp'].dt
+        columns = [
+            df['value'].to_numpy(dtype=float),
+            timestamps.hour.to_numpy(),
+            timestamps.weekday.to_numpy()
+        ]
+        
+        for key in self.METADATA_FEATURES:
+            if key in df.columns and df[key].notna().all():
+                columns.append(df[key].to_numpy(dtype=float))
+        
+        return np.column_stack(columns)
+    
     def train(self, device_id, hours=168):
         """Train anomaly detection model on historical data"""
         start_time = datetime.utcnow() - timedelta(hours=hours)
@@ -56,6 +73,29 @@ class AnomalyDetector:
         # Prepare features
         X = self.prepare_features(readings)
         
+        return self._fit(X)
+    
+    def train_from_archive(self, paths, device_id, start_time=None, end_time=None):
+        """Train on readings exported by ArchiveService, without querying the live DB"""
+        from app.services.archive_service import ArchiveService
+        
+        df = ArchiveService.read_archive(
+            paths,
+            device_id=device_id,
+            start_time=start_time,
+            end_time=end_time
+        )
+        
+        if len(df) < 50:
+            return {
+                'success': False,
+                'message': 'Insufficient training data'
+            }
+        
+        return self._fit(self.prepare_frame_features(df))
+    
+    def _fit(self, X):
+        """Scale features and fit the Isolation Forest"""
         # Scale features
         X_scaled = self.scaler.fit_transform(X)
         
@@ -65,7 +105,7 @@ class AnomalyDetector:
         
         return {
             'success': True,
-            'samples_trained': len(readings),
+            'samples_trained': len(X),
             'message': 'Model trained successfully'
         }
     
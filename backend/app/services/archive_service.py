@@ -0,0 +1,154 @@
+import json
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select
+from app.extensions import db
+from app.models import Device, DeviceReading
+
+class ArchiveService:
+    
+    # extra_data fields flattened into typed columns; anything else, and any
+    # value that cannot be converted to its column type, is kept as JSON in
+    # the extra_json column
+    EXTRA_FIELDS = {
+        'voltage': pa.float64(),
+        'current': pa.float64(),
+        'magnetic_field': pa.float64(),
+        'pressure': pa.float64(),
+        'totalizer': pa.float64(),
+        'pulse_count': pa.int64(),
+        'nozzle_state': pa.string()
+    }
+    
+    SCHEMA = pa.schema(
+        [
+            ('id', pa.int64()),
+            ('device_id', pa.int64()),
+            ('device_type', pa.string()),
+            ('timestamp', pa.timestamp('us')),
+            ('reading_type', pa.string()),
+            ('value', pa.float64()),
+            ('unit', pa.string()),
+            ('is_anomaly', pa.bool_())
+        ] +
+        list(EXTRA_FIELDS.items()) +
+        [('extra_json', pa.string())]
+    )
+    
+    DEFAULT_CHUNK_SIZE = 50000
+    
+    @staticmethod
+    def _coerce(value, arrow_type):
+        """Convert an extra_data value to a column's Arrow type, or None if it does not fit"""
+        if isinstance(value, (dict, list)):
+            return None
+        if pa.types.is_string(arrow_type):
+            return str(value)
+        if isinstance(value, bool):
+            return None
+        if pa.types.is_integer(arrow_type) and isinstance(value, int):
+            return value
+        
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        if pa.types.is_integer(arrow_type):
+            return int(number) if number.is_integer() else None
+        return number
+    
+    @staticmethod
+    def _flatten(rows):
+        """Build an Arrow record batch from (reading columns..., extra_data) rows"""
+        columns = {name: [] for name in ArchiveService.SCHEMA.names}
+        
+        for row in rows:
+            (reading_id, device_id, device_type, timestamp, reading_type,
+             value, unit, is_anomaly, extra_data) = row
+            
+            columns['id'].append(reading_id)
+            columns['device_id'].append(device_id)
+            columns['device_type'].append(device_type)
+            columns['timestamp'].append(timestamp)
+            columns['reading_type'].append(reading_type)
+            columns['value'].append(value)
+            columns['unit'].append(unit)
+            columns['is_anomaly'].append(bool(is_anomaly))
+            
+            extra = dict(extra_data or {})
+            for field, arrow_type in ArchiveService.EXTRA_FIELDS.items():
+                raw = extra.get(field)
+                value = None if raw is None else ArchiveService._coerce(raw, arrow_type)
+                columns[field].append(value)
+                # Values that do not fit the column stay in extra_json
+                if value is not None or raw is None:
+                    extra.pop(field, None)
+            columns['extra_json'].append(json.dumps(extra, sort_keys=True) if extra else None)
+        
+        return pa.RecordBatch.from_pydict(columns, schema=ArchiveService.SCHEMA)
+    
+    @staticmethod
+    def export_readings(path, device_ids=None, device_type=None, start_time=None, end_time=None,
+                        chunk_size=None, compression='zstd'):
+        """Stream readings into a compressed Parquet file
+        
+        Rows are fetched in device/time order with a server-side cursor and
+        written one row group per chunk, so memory stays bounded by chunk_size.
+        """
+        chunk_size = chunk_size or ArchiveService.DEFAULT_CHUNK_SIZE
+        
+        stmt = select(
+            DeviceReading.id,
+            DeviceReading.device_id,
+            Device.device_type,
+            DeviceReading.timestamp,
+            DeviceReading.reading_type,
+            DeviceReading.value,
+            DeviceReading.unit,
+            DeviceReading.is_anomaly,
+            DeviceReading.extra_data
+        ).join(Device, Device.id == DeviceReading.device_id)
+        
+        if device_ids:
+            stmt = stmt.where(DeviceReading.device_id.in_(device_ids))
+        if device_type:
+            stmt = stmt.where(Device.device_type == device_type)
+        if start_time:
+            stmt = stmt.where(DeviceReading.timestamp >= start_time)
+        if end_time:
+            stmt = stmt.where(DeviceReading.timestamp < end_time)
+        
+        stmt = stmt.order_by(DeviceReading.device_id, DeviceReading.timestamp)\
+            .execution_options(yield_per=chunk_size)
+        
+        total = 0
+        with pq.ParquetWriter(path, ArchiveService.SCHEMA, compression=compression) as writer:
+            for rows in db.session.execute(stmt).partitions():
+                writer.write_batch(ArchiveService._flatten(rows))
+                total += len(rows)
+        
+        return {
+            'path': str(path),
+            'rows': total,
+            'compression': compression
+        }
+    
+    @staticmethod
+    def read_archive(paths, device_id=None, start_time=None, end_time=None, columns=None):
+        """Load archived readings into a DataFrame without touching the database"""
+        filters = []
+        if device_id is not None:
+            filters.append(('device_id', '=', device_id))
+        if start_time is not None:
+            filters.append(('timestamp', '>=', pd.Timestamp(start_time)))
+        if end_time is not None:
+            filters.append(('timestamp', '<', pd.Timestamp(end_time)))
+        
+        if isinstance(paths, (list, tuple)):
+            paths = [str(p) for p in paths]
+        else:
+            paths = str(paths)
+        
+        table = pq.read_table(paths, columns=columns, filters=filters or None)
+        return table.to_pandas()
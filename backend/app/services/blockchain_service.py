@@ -3,6 +3,7 @@ import json
 from datetime import datetime
 from app.extensions import db
 from app.models import BlockchainLog
+from app.utils.metrics import BLOCKCHAIN_APPENDS, BLOCKCHAIN_LENGTH
 
 class BlockchainService:
     
@@ -53,6 +54,9 @@ class BlockchainService:
         db.session.add(log)
         db.session.commit()
         
+        BLOCKCHAIN_APPENDS.labels(event_type).inc()
+        BLOCKCHAIN_LENGTH.set(block_number)
+        
         return log
     
     @staticmethod
@@ -0,0 +1,209 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, exists, func, insert, select, update
+from app.extensions import db
+from app.models import CalibrationLog, Device, TamperAlert
+from app.utils.metrics import ALERT_INCIDENTS_OPENED, ALERTS_RAISED
+
+class CalibrationService:
+    
+    DEFAULT_INTERVAL_DAYS = 365
+    DEFAULT_DUE_SOON_DAYS = 14
+    STATUSES = ('passed', 'failed')
+    
+    @staticmethod
+    def interval_days(device_type):
+        """Get the calibration interval for a device type"""
+        overrides = current_app.config.get('CALIBRATION_INTERVAL_OVERRIDES', {})
+        if device_type in overrides:
+            return overrides[device_type]
+        
+        return current_app.config.get('CALIBRATION_INTERVAL_DAYS', CalibrationService.DEFAULT_INTERVAL_DAYS)
+    
+    @staticmethod
+    def schedule(device, calibrated_at, next_calibration_date=None):
+        """Mark a device calibrated and set its next due date"""
+        device.last_calibration = calibrated_at
+        device.next_calibration_date = next_calibration_date or (
+            calibrated_at + timedelta(days=CalibrationService.interval_days(device.device_type))
+        )
+    
+    @staticmethod
+    def record(device, status='passed', calibrated_by=None, notes=None, calibration_date=None,
+               next_calibration_date=None):
+        """Log a calibration and update the device's schedule
+        
+        A passed calibration restarts the interval (which also resets the
+        drift baseline) and resolves open calibration_overdue alerts; a
+        failed one leaves last_calibration alone and makes the device due
+        now. A calibration dated before the device's last one is only
+        logged, so backfilled history cannot move the schedule backwards.
+        Does not commit.
+        """
+        if status not in CalibrationService.STATUSES:
+            raise ValueError(f'status must be one of: {", ".join(CalibrationService.STATUSES)}')
+        
+        calibration_date = calibration_date or datetime.utcnow()
+        if next_calibration_date is not None and next_calibration_date <= calibration_date:
+            raise ValueError('next_calibration_date must be after calibration_date')
+        
+        if device.last_calibration is not None and calibration_date < device.last_calibration:
+            # History only: log when it was due next at the time
+            if status == 'passed':
+                next_calibration_date = next_calibration_date or (
+                    calibration_date + timedelta(days=CalibrationService.interval_days(device.device_type))
+                )
+            else:
+                next_calibration_date = calibration_date
+        elif status == 'passed':
+            CalibrationService.schedule(device, calibration_date, next_calibration_date)
+            next_calibration_date = device.next_calibration_date
+            TamperAlert.query.filter_by(
+                device_id=device.id,
+                alert_type='calibration_overdue',
+                resolved=False
+            ).update({
+                'resolved': True,
+                'resolved_at': datetime.utcnow(),
+                'resolved_by': calibrated_by
+            }, synchronize_session=False)
+        else:
+            device.next_calibration_date = next_calibration_date = calibration_date
+        
+        log = CalibrationLog(
+            device_id=device.id,
+            calibrated_by=calibrated_by,
+            calibration_date=calibration_date,
+            next_calibration_date=next_calibration_date,
+            status=status,
+            notes=notes
+        )
+        db.session.add(log)
+        return log
+    
+    @staticmethod
+    def due(within_days=None, now=None, device_type=None):
+        """Devices overdue or due within the window, soonest first, from one index range scan"""
+        if within_days is None:
+            within_days = current_app.config.get('CALIBRATION_DUE_SOON_DAYS', CalibrationService.DEFAULT_DUE_SOON_DAYS)
+        now = now or datetime.utcnow()
+        
+        query = select(
+            Device.id,
+            Device.device_id,
+            Device.device_type,
+            Device.location,
+            Device.last_calibration,
+            Device.next_calibration_date
+        ).where(Device.next_calibration_date <= now + timedelta(days=within_days))
+        if device_type:
+            query = query.where(Device.device_type == device_type)
+        
+        devices = []
+        for row in db.session.execute(query.order_by(Device.next_calibration_date)):
+            days_until_due = (row.next_calibration_date - now).total_seconds() / 86400
+            devices.append({
+                'id': row.id,
+                'device_id': row.device_id,
+                'device_type': row.device_type,
+                'location': row.location,
+                'last_calibration': row.last_calibration.isoformat() if row.last_calibration else None,
+                'next_calibration_date': row.next_calibration_date.isoformat(),
+                'days_until_due': round(days_until_due, 1),
+                'status': 'overdue' if days_until_due < 0 else 'due_soon'
+            })
+        return devices
+    
+    @staticmethod
+    def scan(now=None):
+        """Raise calibration_overdue alerts for overdue devices
+        
+        Runs a fixed number of statements whatever the fleet size: one query
+        for the overdue devices and whether they already have an open alert,
+        one UPDATE counting another occurrence on the open alerts and one
+        bulk insert of the new ones. The caller commits.
+        """
+        now = now or datetime.utcnow()
+        overdue = Device.next_calibration_date < now
+        open_alert = and_(
+            TamperAlert.alert_type == 'calibration_overdue',
+            TamperAlert.resolved == False  # noqa: E712
+        )
+        rows = db.session.execute(
+            select(
+                Device.id,
+                Device.device_id,
+                Device.next_calibration_date,
+                exists().where(TamperAlert.device_id == Device.id, open_alert).label('alerted')
+            ).where(overdue).order_by(Device.next_calibration_date)
+        ).all()
+        
+        new_alerts = []
+        for row in rows:
+            if row.alerted:
+                continue
+            days_overdue = (now - row.next_calibration_date).days
+            new_alerts.append({
+                'device_id': row.id,
+                'alert_type': 'calibration_overdue',
+                'severity': 'medium',
+                'description': (
+                    f'Calibration of {row.device_id} was due {row.next_calibration_date:%Y-%m-%d} '
+                    f'({days_overdue} days overdue)'
+                ),
+                'timestamp': now,
+                'occurrence_count': 1,
+                'first_seen': now,
+                'last_seen': now,
+                'peak_value': days_overdue
+            })
+        
+        # Before the insert, so the new alerts are not counted twice
+        updated = 0
+        if len(new_alerts) < len(rows):
+            updated = db.session.execute(
+                update(TamperAlert)
+                .where(open_alert, TamperAlert.device_id.in_(select(Device.id).where(overdue)))
+                .values(occurrence_count=TamperAlert.occurrence_count + 1, last_seen=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        
+        if new_alerts:
+            db.session.execute(insert(TamperAlert), new_alerts)
+        
+        ALERTS_RAISED.labels('calibration_overdue', 'medium').inc(len(rows))
+        ALERT_INCIDENTS_OPENED.labels('calibration_overdue', 'medium').inc(len(new_alerts))
+        return {
+            'overdue_devices': len(rows),
+            'alerts_raised': len(new_alerts),
+            'alerts_updated': updated,
+            'scanned_at': now.isoformat()
+        }
+    
+    @staticmethod
+    def backfill_schedule():
+        """Set next_calibration_date from last_calibration where it is missing"""
+        scheduled = 0
+        device_types = [row[0] for row in db.session.query(Device.device_type).distinct()]
+        
+        for device_type in device_types:
+            days = CalibrationService.interval_days(device_type)
+            if db.engine.dialect.name == 'postgresql':
+                due = Device.last_calibration + timedelta(days=days)
+            else:
+                due = func.datetime(Device.last_calibration, f'+{days} days')
+            
+            result = db.session.execute(
+                update(Device)
+                .where(
+                    Device.device_type == device_type,
+                    Device.next_calibration_date.is_(None),
+                    Device.last_calibration.isnot(None)
+                )
+                .values(next_calibration_date=due)
+                .execution_options(synchronize_session=False)
+            )
+            scheduled += result.rowcount
+        
+        db.session.commit()
+        return scheduled
@@ -0,0 +1,200 @@
+import math
+from datetime import datetime
+from sqlalchemy import String, and_, cast, select
+from app.extensions import db
+from app.models import DetectorState, Device
+from app.services.alert_aggregator import AlertAggregator
+from app.services.detector_state import DetectorStateStore
+
+class CorrelationEngine:
+    """Flags synchronized anomalies across co-located devices
+    
+    Each device keeps its own state row holding an exponentially weighted
+    mean/variance of its readings and, for each co-located device seen
+    recently, the EW covariance and both EW variances of their z-scores.
+    Samples are paired only when the peer's latest reading is new and within
+    ALIGN_SECONDS of this one, and the covariance is normalised into a
+    correlation once MIN_JOINT_SAMPLES pairs were seen. A reading locks
+    only its device's row and reads the other devices' latest z-scores in
+    one unlocked query, so ingest at a busy location does not serialize.
+    
+    The location row only records which devices were recently hot (an
+    anomaly or a large z-score) and is locked only by hot readings, so
+    near-simultaneous excursions still see each other. A location alert
+    needs MIN_DEVICES devices anomalous within the sync window, and either
+    all of them confirmed by their per-device detectors or their z-scores
+    moving together (pair correlation at or above CORRELATION_THRESHOLD);
+    chance coincidences of noisy excursions are not enough.
+    """
+    
+    DETECTOR = 'correlation'
+    DEVICE_DETECTOR = 'correlation_device'
+    
+    ALPHA = 0.05  # weight of the newest sample in the moving statistics
+    PAIR_ALPHA = 0.01  # slower for pairs, so one joint noise excursion can't dominate
+    WARMUP_READINGS = 10  # readings before a device's z-scores are trusted
+    Z_THRESHOLD = 3.0
+    SYNC_WINDOW_SECONDS = 300  # anomalies this close together count as synchronized
+    MIN_DEVICES = 2
+    CORRELATION_THRESHOLD = 0.5  # pair correlation of correlated excursions
+    ALIGN_SECONDS = 60  # peer samples this close count as simultaneous
+    MIN_JOINT_SAMPLES = 30  # aligned pairs before a correlation is trusted
+    STALE_SECONDS = 86400  # devices silent this long are dropped from the pairs
+    
+    @staticmethod
+    def _update_device(stats, value):
+        """Update EW mean/variance and return the z-score of value against the prior baseline"""
+        if not stats.get('n'):
+            stats.update({'n': 1, 'mean': value, 'var': 0.0, 'z': 0.0})
+            return 0.0
+        
+        std = math.sqrt(stats['var'])
+        z = (value - stats['mean']) / std if std > 0 and stats['n'] >= CorrelationEngine.WARMUP_READINGS else 0.0
+        
+        diff = value - stats['mean']
+        increment = CorrelationEngine.ALPHA * diff
+        stats['mean'] += increment
+        stats['var'] = (1 - CorrelationEngine.ALPHA) * (stats['var'] + diff * increment)
+        stats['n'] += 1
+        stats['z'] = z
+        return z
+    
+    @staticmethod
+    def _update_pair(pair, z, other_z):
+        """Fold a time-aligned pair of z-scores into EW covariance and variances"""
+        alpha = CorrelationEngine.PAIR_ALPHA
+        pair['cov'] += alpha * (z * other_z - pair['cov'])
+        pair['var'] += alpha * (z * z - pair['var'])
+        pair['other_var'] += alpha * (other_z * other_z - pair['other_var'])
+        pair['n'] += 1
+    
+    @staticmethod
+    def _correlation(pair):
+        """Normalised pair correlation, 0 until enough aligned samples"""
+        if pair is None or pair['n'] < CorrelationEngine.MIN_JOINT_SAMPLES:
+            return 0.0
+        scale = math.sqrt(pair['var'] * pair['other_var'])
+        return pair['cov'] / scale if scale > 0 else 0.0
+    
+    @staticmethod
+    def _peers(device):
+        """Latest (n, z, seen) of the other devices at the device's location, without locking"""
+        state = DetectorState.state
+        rows = db.session.execute(
+            select(
+                Device.id,
+                state['n'].as_integer(),
+                state['z'].as_float(),
+                state['seen'].as_float()
+            ).join(DetectorState, and_(
+                DetectorState.detector == CorrelationEngine.DEVICE_DETECTOR,
+                DetectorState.key == cast(Device.id, String)
+            )).where(Device.location == device.location, Device.id != device.id)
+        ).all()
+        return {str(device_id): (n, z, seen) for device_id, n, z, seen in rows if n is not None and seen is not None}
+    
+    @staticmethod
+    def _mark_hot(device, ts, is_anomaly):
+        """Record a hot reading in the location row; return the recently (hot, flagged) device ids"""
+        engine = CorrelationEngine
+        row = DetectorStateStore.load(engine.DETECTOR, device.location)
+        
+        state = {}
+        for field in ('hot', 'flagged'):
+            state[field] = {
+                key: seen for key, seen in (row.state or {}).get(field, {}).items()
+                if ts - seen <= engine.SYNC_WINDOW_SECONDS
+            }
+        state['hot'][str(device.id)] = ts
+        if is_anomaly:
+            state['flagged'][str(device.id)] = ts
+        DetectorStateStore.save(row, state)
+        
+        return sorted(map(int, state['hot'])), sorted(map(int, state['flagged']))
+    
+    @staticmethod
+    def recent_hot(location, now=None):
+        """Device ids at a location hot within the sync window"""
+        ts = (now or datetime.utcnow()).timestamp()
+        row = DetectorStateStore.peek(CorrelationEngine.DETECTOR, location)
+        hot = (row.state or {}).get('hot', {}) if row is not None else {}
+        return sorted(int(key) for key, seen in hot.items() if ts - seen <= CorrelationEngine.SYNC_WINDOW_SECONDS)
+    
+    @staticmethod
+    def observe(device, value, is_anomaly, now=None):
+        """Fold a reading into its device's state and alert on synchronized anomalies
+        
+        Returns the list of device ids anomalous within the sync window, or
+        None when the device has no location.
+        """
+        if not device.location or value is None:
+            return None
+        
+        now = now or datetime.utcnow()
+        ts = now.timestamp()
+        engine = CorrelationEngine
+        
+        row = DetectorStateStore.load(engine.DEVICE_DETECTOR, device.id)
+        stats = row.state or {}
+        z = engine._update_device(stats, float(value))
+        stats['seen'] = ts
+        
+        # Incremental z-score correlation with devices seen recently, from this device's side
+        peers = engine._peers(device)
+        pairs = {
+            other: pair for other, pair in stats.get('pairs', {}).items()
+            if isinstance(pair, dict) and other in peers and ts - peers[other][2] <= engine.STALE_SECONDS
+        }
+        if stats['n'] > engine.WARMUP_READINGS:
+            for other, (other_n, other_z, other_seen) in peers.items():
+                if other_n <= engine.WARMUP_READINGS or abs(ts - other_seen) > engine.ALIGN_SECONDS:
+                    continue
+                pair = pairs.setdefault(other, {'n': 0, 'cov': 0.0, 'var': 0.0, 'other_var': 0.0, 'seen': None})
+                # Each peer sample is paired once, or a quiet peer's last spike would count again
+                if pair['seen'] is not None and other_seen <= pair['seen']:
+                    continue
+                engine._update_pair(pair, z, other_z or 0.0)
+                pair['seen'] = other_seen
+        stats['pairs'] = pairs
+        DetectorStateStore.save(row, stats)
+        
+        if not is_anomaly and abs(z) <= engine.Z_THRESHOLD:
+            return engine.recent_hot(device.location, now)
+        
+        hot, flagged = engine._mark_hot(device, ts, is_anomaly)
+        if len(hot) < engine.MIN_DEVICES:
+            return hot
+        
+        # Devices whose z-scores moved together with this one
+        correlations = {other: engine._correlation(pairs.get(str(other))) for other in hot if other != device.id}
+        correlated = [other for other, value in correlations.items() if value >= engine.CORRELATION_THRESHOLD]
+        
+        group = set()
+        if len(correlated) + 1 >= engine.MIN_DEVICES:
+            group.update(correlated, [device.id])
+        if device.id in flagged and len(flagged) >= engine.MIN_DEVICES:
+            group.update(flagged)
+        if not group:
+            return hot
+        
+        group = sorted(group)
+        if correlated:
+            correlation = max(correlations[other] for other in correlated)
+            evidence = f'peak correlation {correlation:.2f}'
+            value = round(correlation, 4)
+        else:
+            evidence = f'flagged by their detectors: {", ".join(map(str, sorted(flagged)))}'
+            value = None
+        
+        AlertAggregator.raise_alert(
+            device_id=device.id,
+            alert_type='coordinated_tamper',
+            severity='critical' if correlated else 'high',
+            description=(
+                f'{len(group)} devices at {device.location} anomalous within '
+                f'{engine.SYNC_WINDOW_SECONDS}s (devices {", ".join(map(str, group))}; {evidence})'
+            ),
+            value=value,
+            location=device.location
+        )
+        return hot
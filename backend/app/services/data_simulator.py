@@ -1,107 +1,153 @@
-import random
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 
 class DataSimulator:
     
     @staticmethod
-    def generate_weighing_scale_data(num_points=100, inject_tamper=False):
+    def _timestamps(num_points, step):
+        """Evenly spaced timestamps ending one step before now"""
+        now = np.datetime64(datetime.utcnow(), 'us')
+        offsets = np.arange(num_points, 0, -1) * np.timedelta64(1, step)
+        return now - offsets
+    
+    @staticmethod
+    def _tamper_mask(rng, num_points, start_fraction, probability, inject_tamper):
+        """Mask of points with injected tamper after start_fraction of the series"""
+        if not inject_tamper:
+            return np.zeros(num_points, dtype=bool)
+        
+        index = np.arange(num_points)
+        return (index > num_points * start_fraction) & (rng.random(num_points) < probability)
+    
+    @staticmethod
+    def _records(columns, rounding, constants):
+        """Convert column arrays into the list-of-dicts API format"""
+        values = {}
+        for key, column in columns.items():
+            if key == 'timestamp':
+                values[key] = np.datetime_as_string(column, unit='us').tolist()
+            elif key in rounding:
+                values[key] = np.round(column, rounding[key]).tolist()
+            else:
+                values[key] = column.tolist()
+        
+        keys = list(values)
+        return [
+            {**dict(zip(keys, row)), **constants}
+            for row in zip(*(values[key] for key in keys))
+        ]
+    
+    @staticmethod
+    def chart_series(columns, value_key, decimals=2):
+        """Parallel timestamp (epoch ms), value and anomaly arrays for charts"""
+        return {
+            'timestamps': columns['timestamp'].astype('datetime64[ms]').astype(np.int64).tolist(),
+            'values': np.round(columns[value_key], decimals).tolist(),
+            'anomalies': columns['is_anomaly'].tolist()
+        }
+    
+    @staticmethod
+    def generate_weighing_scale_data(num_points=100, inject_tamper=False, seed=None, columnar=False):
         """Generate simulated weighing scale data"""
-        data = []
+        rng = np.random.default_rng(seed)
         base_weight = 50.0  # kg
         
-        for i in range(num_points):
-            timestamp = datetime.utcnow() - timedelta(minutes=num_points - i)
-            
-            # Normal operation with small variations
-            weight = base_weight + np.random.normal(0, 0.5)
-            
-            # Inject tamper anomaly
-            is_anomaly = False
-            if inject_tamper and i > num_points * 0.7 and random.random() < 0.3:
-                weight += random.uniform(5, 15)  # Significant weight drift
-                is_anomaly = True
-            
-            data.append({
-                'timestamp': timestamp.isoformat(),
-                'weight': round(weight, 2),
-                'unit': 'kg',
-                'is_anomaly': is_anomaly,
-                'calibration_drift': round(abs(weight - base_weight), 2)
-            })
-        
-        return data
+        # Normal operation with small variations
+        weight = base_weight + rng.normal(0, 0.5, num_points)
+        
+        # Inject tamper anomaly: significant weight drift
+        is_anomaly = DataSimulator._tamper_mask(rng, num_points, 0.7, 0.3, inject_tamper)
+        weight[is_anomaly] += rng.uniform(5, 15, is_anomaly.sum())
+        
+        columns = {
+            'timestamp': DataSimulator._timestamps(num_points, 'm'),
+            'weight': weight,
+            'is_anomaly': is_anomaly,
+            'calibration_drift': np.abs(weight - base_weight)
+        }
+        
+        if columnar:
+            return columns
+        
+        return DataSimulator._records(
+            columns,
+            rounding={'weight': 2, 'calibration_drift': 2},
+            constants={'unit': 'kg'}
+        )
     
     @staticmethod
-    def generate_energy_meter_data(num_points=100, inject_tamper=False):
+    def generate_energy_meter_data(num_points=100, inject_tamper=False, seed=None, columnar=False):
         """Generate simulated energy meter data"""
-        data = []
+        rng = np.random.default_rng(seed)
         base_voltage = 230.0  # V
         base_current = 5.0    # A
         
-        for i in range(num_points):
-            timestamp = datetime.utcnow() - timedelta(minutes=num_points - i)
-            
-            # Normal operation
-            voltage = base_voltage + np.random.normal(0, 2)
-            current = base_current + np.random.normal(0, 0.5)
-            power = (voltage * current) / 1000  # kW
-            
-            # Inject tamper anomaly
-            is_anomaly = False
-            if inject_tamper and i > num_points * 0.6 and random.random() < 0.25:
-                voltage += random.uniform(20, 50)  # Voltage spike
-                is_anomaly = True
-            
-            data.append({
-                'timestamp': timestamp.isoformat(),
-                'voltage': round(voltage, 2),
-                'current': round(current, 2),
-                'power': round(power, 3),
-                'unit': 'kW',
-                'is_anomaly': is_anomaly
-            })
-        
-        return data
+        # Normal operation
+        voltage = base_voltage + rng.normal(0, 2, num_points)
+        current = base_current + rng.normal(0, 0.5, num_points)
+        power = (voltage * current) / 1000  # kW
+        
+        # Inject tamper anomaly: voltage spike
+        is_anomaly = DataSimulator._tamper_mask(rng, num_points, 0.6, 0.25, inject_tamper)
+        voltage[is_anomaly] += rng.uniform(20, 50, is_anomaly.sum())
+        
+        columns = {
+            'timestamp': DataSimulator._timestamps(num_points, 'm'),
+            'voltage': voltage,
+            'current': current,
+            'power': power,
+            'is_anomaly': is_anomaly
+        }
+        
+        if columnar:
+            return columns
+        
+        return DataSimulator._records(
+            columns,
+            rounding={'voltage': 2, 'current': 2, 'power': 3},
+            constants={'unit': 'kW'}
+        )
     
     @staticmethod
-    def generate_fuel_dispenser_data(num_points=100, inject_tamper=False):
+    def generate_fuel_dispenser_data(num_points=100, inject_tamper=False, seed=None, columnar=False):
         """Generate simulated fuel dispenser data"""
-        data = []
+        rng = np.random.default_rng(seed)
         base_flow_rate = 3.2  # L/min
-        totalizer = 1000.0    # L
-        
-        for i in range(num_points):
-            timestamp = datetime.utcnow() - timedelta(seconds=num_points - i)
-            
-            # Normal operation
-            flow_rate = base_flow_rate + np.random.normal(0, 0.2)
-            totalizer += flow_rate / 60  # Add per second
-            
-            pulse_count = int(flow_rate * 10)
-            magnetic_field = random.uniform(0.1, 0.5)
-            pressure = 2.5 + np.random.normal(0, 0.1)
-            
-            # Inject tamper anomaly
-            is_anomaly = False
-            if inject_tamper and i > num_points * 0.7 and random.random() < 0.3:
-                magnetic_field += random.uniform(2, 5)  # Magnetic tampering
-                flow_rate *= random.uniform(0.7, 0.9)   # Flow irregularity
-                is_anomaly = True
-            
-            data.append({
-                'timestamp': timestamp.isoformat(),
-                'flow_rate': round(flow_rate, 2),
-                'totalizer': round(totalizer, 2),
-                'pulse_count': pulse_count,
-                'magnetic_field': round(magnetic_field, 2),
-                'pressure': round(pressure, 2),
-                'nozzle_state': 'open' if flow_rate > 1 else 'closed',
-                'unit': 'L/min',
-                'is_anomaly': is_anomaly
-            })
-        
-        return data
+        base_totalizer = 1000.0    # L
+        
+        # Normal operation
+        flow_rate = base_flow_rate + rng.normal(0, 0.2, num_points)
+        totalizer = base_totalizer + np.cumsum(flow_rate / 60)  # Add per second
+        
+        pulse_count = (flow_rate * 10).astype(np.int64)
+        magnetic_field = rng.uniform(0.1, 0.5, num_points)
+        pressure = 2.5 + rng.normal(0, 0.1, num_points)
+        
+        # Inject tamper anomaly: magnetic tampering with flow irregularity
+        is_anomaly = DataSimulator._tamper_mask(rng, num_points, 0.7, 0.3, inject_tamper)
+        tampered = is_anomaly.sum()
+        magnetic_field[is_anomaly] += rng.uniform(2, 5, tampered)
+        flow_rate[is_anomaly] *= rng.uniform(0.7, 0.9, tampered)
+        
+        columns = {
+            'timestamp': DataSimulator._timestamps(num_points, 's'),
+            'flow_rate': flow_rate,
+            'totalizer': totalizer,
+            'pulse_count': pulse_count,
+            'magnetic_field': magnetic_field,
+            'pressure': pressure,
+            'nozzle_state': np.where(flow_rate > 1, 'open', 'closed'),
+            'is_anomaly': is_anomaly
+        }
+        
+        if columnar:
+            return columns
+        
+        return DataSimulator._records(
+            columns,
+            rounding={'flow_rate': 2, 'totalizer': 2, 'magnetic_field': 2, 'pressure': 2},
+            constants={'unit': 'L/min'}
+        )
     
     @staticmethod
     def detect_anomalies(data_points, threshold=2.5):
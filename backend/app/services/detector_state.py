@@ -0,0 +1,57 @@
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm.attributes import flag_modified
+from app.extensions import db
+from app.models import DetectorState
+
+class DetectorStateStore:
+    """Persisted state for incremental detectors, one JSON row per (detector, key)"""
+    
+    @staticmethod
+    def _locked(detector, key):
+        return DetectorState.query.filter_by(detector=detector, key=key).with_for_update().first()
+    
+    @staticmethod
+    def load(detector, key):
+        """Get the state row, creating it if needed
+        
+        The row is locked FOR UPDATE on PostgreSQL so concurrent workers
+        updating the same key serialize instead of losing updates.
+        """
+        key = str(key)
+        row = DetectorStateStore._locked(detector, key)
+        if row is not None:
+            return row
+        
+        # Insert-if-absent so two workers creating the same key don't collide
+        dialect = db.engine.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            db.session.execute(
+                insert(DetectorState)
+                .values(detector=detector, key=key, state={}, updated_at=datetime.utcnow())
+                .on_conflict_do_nothing(index_elements=['detector', 'key'])
+            )
+            return DetectorStateStore._locked(detector, key)
+        
+        row = DetectorState(detector=detector, key=key, state={})
+        db.session.add(row)
+        return row
+    
+    @staticmethod
+    def peek(detector, key):
+        """Get the state row without locking or creating it"""
+        return DetectorState.query.filter_by(detector=detector, key=str(key)).first()
+    
+    @staticmethod
+    def save(row, state):
+        """Store updated state; the caller commits with the rest of the request"""
+        row.state = state
+        row.updated_at = datetime.utcnow()
+        # In-place edits to the JSON dict are invisible to change tracking
+        flag_modified(row, 'state')
+    
+    @staticmethod
+    def reset(detector, key):
+        """Drop the stored state for a key"""
+        DetectorState.query.filter_by(detector=detector, key=str(key)).delete()
@@ -0,0 +1,264 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from app.extensions import db
+from app.models import DeviceReading, EnergyBucket
+from app.services.alert_aggregator import AlertAggregator
+from app.services.detector_state import DetectorStateStore
+from app.utils.serialization import epoch_ms, fetch_columns
+
+class EnergyIntegrator:
+    """Time-weighted energy and power consistency for energy meters
+    
+    Each reading closes an interval with the previous one; its energy is
+    the trapezoid of the two power values over the real time between them,
+    split at hour boundaries into EnergyBucket rows, so hourly and daily
+    totals never rescan readings. Intervals longer than MAX_GAP_SECONDS
+    are not integrated.
+    
+    Reported power is also compared with voltage x current: the ratio is
+    the power factor, learned per meter, and a reading whose power falls
+    well below what its voltage and current imply suggests part of the
+    load bypasses the measuring element.
+    """
+    
+    DETECTOR = 'energy'
+    
+    MAX_GAP_SECONDS = 900  # longer silences are unknown consumption, not interpolated
+    PF_WARMUP_READINGS = 20  # readings averaged into the power factor baseline
+    PF_ALPHA = 0.02  # weight of a consistent reading in the baseline afterwards
+    BYPASS_TOLERANCE = 0.15  # relative shortfall of power factor below baseline
+    PF_CEILING = 1.02  # real power cannot exceed apparent power beyond sensor error
+    
+    @staticmethod
+    def _apparent(voltage, current):
+        """Apparent power in kVA, or None when either input is missing"""
+        if voltage is None or current is None:
+            return None
+        return float(voltage) * float(current) / 1000
+    
+    @staticmethod
+    def _split_hours(start, end):
+        """Yield (bucket_start, segment_start, segment_end) for each hour in [start, end)"""
+        cursor = start
+        while cursor < end:
+            bucket = cursor.replace(minute=0, second=0, microsecond=0)
+            stop = min(bucket + timedelta(hours=1), end)
+            yield bucket, cursor, stop
+            cursor = stop
+    
+    @staticmethod
+    def _bucket(cache, device_id, bucket_start):
+        # Safe without upsert: the state row lock serializes writers per meter
+        if bucket_start not in cache:
+            bucket = EnergyBucket.query.filter_by(device_id=device_id, bucket_start=bucket_start).first()
+            if bucket is None:
+                bucket = EnergyBucket(
+                    device_id=device_id,
+                    bucket_start=bucket_start,
+                    energy_kwh=0.0,
+                    apparent_kvah=0.0,
+                    covered_seconds=0.0,
+                    reading_count=0
+                )
+                db.session.add(bucket)
+            cache[bucket_start] = bucket
+        return cache[bucket_start]
+    
+    @staticmethod
+    def _integrate(device_id, state, now, power, apparent, cache):
+        """Add the trapezoid between the previous reading and this one to the hour buckets"""
+        start = datetime.fromisoformat(state['last_at'])
+        elapsed = (now - start).total_seconds()
+        if elapsed <= 0 or elapsed > EnergyIntegrator.MAX_GAP_SECONDS:
+            return 0.0
+        
+        last_power, last_apparent = state['last_power'], state.get('last_apparent')
+        
+        def interpolate(first, last, at):
+            return first + (last - first) * (at - start).total_seconds() / elapsed
+        
+        total = 0.0
+        for bucket_start, seg_start, seg_end in EnergyIntegrator._split_hours(start, now):
+            seconds = (seg_end - seg_start).total_seconds()
+            bucket = EnergyIntegrator._bucket(cache, device_id, bucket_start)
+            
+            kwh = (interpolate(last_power, power, seg_start) + interpolate(last_power, power, seg_end)) / 2 * seconds / 3600
+            bucket.energy_kwh += kwh
+            bucket.covered_seconds += seconds
+            total += kwh
+            
+            if apparent is not None and last_apparent is not None:
+                bucket.apparent_kvah += (
+                    interpolate(last_apparent, apparent, seg_start) +
+                    interpolate(last_apparent, apparent, seg_end)
+                ) / 2 * seconds / 3600
+        
+        return total
+    
+    @staticmethod
+    def _check_power_factor(device, state, power, apparent):
+        """Update the power factor baseline; return True when power is short of V x I"""
+        if apparent is None or apparent <= 0:
+            return False
+        
+        integrator = EnergyIntegrator
+        pf = power / apparent
+        
+        if state['pf_n'] < integrator.PF_WARMUP_READINGS:
+            state['pf_n'] += 1
+            state['pf_mean'] += (pf - state['pf_mean']) / state['pf_n']
+            return False
+        
+        expected = state['pf_mean'] * apparent
+        if pf < state['pf_mean'] * (1 - integrator.BYPASS_TOLERANCE):
+            state['bypass_readings'] += 1
+            AlertAggregator.raise_alert(
+                device_id=device.id,
+                alert_type='power_bypass',
+                severity='high',
+                description=(
+                    f'Reported {power:.3f} kW while voltage x current implies {expected:.3f} kW '
+                    f'at the learned power factor {state["pf_mean"]:.2f}'
+                ),
+                value=round(expected - power, 3)
+            )
+            return True
+        
+        state['pf_mean'] += integrator.PF_ALPHA * (pf - state['pf_mean'])
+        return False
+    
+    @staticmethod
+    def observe(device, power, voltage=None, current=None, is_anomaly=False, now=None):
+        """Integrate a power reading into the hour buckets and check it against V x I
+        
+        Readings already flagged as voltage spikes are integrated but do not
+        move the power factor baseline. Returns True when a bypass alert was
+        raised.
+        """
+        if power is None:
+            return False
+        
+        integrator = EnergyIntegrator
+        now = now or datetime.utcnow()
+        power = float(power)
+        apparent = integrator._apparent(voltage, current)
+        
+        row = DetectorStateStore.load(integrator.DETECTOR, device.id)
+        state = row.state or {'pf_n': 0, 'pf_mean': 0.0, 'bypass_readings': 0}
+        
+        cache = {}
+        if 'last_at' in state:
+            integrator._integrate(device.id, state, now, power, apparent, cache)
+        integrator._bucket(cache, device.id, now.replace(minute=0, second=0, microsecond=0)).reading_count += 1
+        
+        bypass = False
+        if not is_anomaly:
+            bypass = integrator._check_power_factor(device, state, power, apparent)
+        
+        state.update({'last_at': now.isoformat(), 'last_power': power, 'last_apparent': apparent})
+        DetectorStateStore.save(row, state)
+        return bypass
+    
+    @staticmethod
+    def buckets(device_id, start_time, granularity='hour'):
+        """Stored energy per hour, or per day summed from the hours"""
+        rows = EnergyBucket.query.filter(
+            EnergyBucket.device_id == device_id,
+            EnergyBucket.bucket_start >= start_time.replace(minute=0, second=0, microsecond=0)
+        ).order_by(EnergyBucket.bucket_start.asc()).all()
+        
+        if granularity == 'hour':
+            return [row.to_dict() for row in rows]
+        
+        days = {}
+        for row in rows:
+            day = days.setdefault(row.bucket_start.date(), {
+                'device_id': device_id,
+                'bucket_start': row.bucket_start.date().isoformat(),
+                'energy_kwh': 0.0,
+                'apparent_kvah': 0.0,
+                'covered_seconds': 0.0,
+                'reading_count': 0
+            })
+            day['energy_kwh'] += row.energy_kwh
+            day['apparent_kvah'] += row.apparent_kvah
+            day['covered_seconds'] += row.covered_seconds
+            day['reading_count'] += row.reading_count
+        
+        for day in days.values():
+            day['energy_kwh'] = round(day['energy_kwh'], 4)
+            day['apparent_kvah'] = round(day['apparent_kvah'], 4)
+            day['covered_seconds'] = round(day['covered_seconds'], 1)
+        return list(days.values())
+    
+    @staticmethod
+    def analyze_window(device_id, start_time):
+        """Integrate energy and check power against V x I over raw readings, vectorized
+        
+        Returns None when the window has no readings.
+        """
+        import numpy as np
+        
+        integrator = EnergyIntegrator
+        series = fetch_columns(
+            select(
+                epoch_ms(DeviceReading.timestamp).label('timestamps'),
+                DeviceReading.value.label('power'),
+                DeviceReading.voltage,
+                DeviceReading.current,
+                DeviceReading.is_anomaly
+            ).where(
+                DeviceReading.device_id == device_id,
+                DeviceReading.timestamp >= start_time
+            ).order_by(DeviceReading.timestamp.asc())
+        )
+        if not series['timestamps']:
+            return None
+        
+        seconds = np.asarray(series['timestamps'], dtype=float) / 1000
+        power = np.asarray(series['power'], dtype=float)
+        # Missing voltage or current become NaN and drop out of the checks
+        apparent = np.asarray(series['voltage'], dtype=float) * np.asarray(series['current'], dtype=float) / 1000
+        anomalous = np.asarray(series['is_anomaly'], dtype=object).astype(bool)
+        
+        dt = np.diff(seconds)
+        integrated = (dt > 0) & (dt <= integrator.MAX_GAP_SECONDS)
+        energy = float(np.sum(((power[:-1] + power[1:]) / 2 * dt)[integrated]) / 3600)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pf = np.where(apparent > 0, power / apparent, np.nan)
+        checked = np.isfinite(pf) & ~anomalous
+        
+        # Prefer the meter's learned baseline; a long bypass would drag a window median down
+        row = DetectorStateStore.peek(integrator.DETECTOR, device_id)
+        learned = row.state if row is not None and row.state else {}
+        if learned.get('pf_n', 0) >= integrator.PF_WARMUP_READINGS:
+            baseline = learned['pf_mean']
+        elif checked.any():
+            baseline = float(np.median(pf[checked]))
+        else:
+            baseline = None
+        
+        consistency = {'readings_checked': int(checked.sum()), 'baseline_power_factor': None}
+        if baseline is not None:
+            shortfall = checked & (pf < baseline * (1 - integrator.BYPASS_TOLERANCE))
+            excess = checked & (pf > integrator.PF_CEILING)
+            
+            # Energy the meter would have reported at the baseline power factor
+            missing = np.where(shortfall, np.clip(baseline * apparent - power, 0, None), 0.0)
+            unreported = float(np.sum(((missing[:-1] + missing[1:]) / 2 * dt)[integrated]) / 3600)
+            
+            consistency.update({
+                'baseline_power_factor': round(baseline, 4),
+                'median_power_factor': round(float(np.median(pf[checked])), 4) if checked.any() else None,
+                'shortfall_readings': int(shortfall.sum()),
+                'excess_readings': int(excess.sum()),
+                'unreported_energy_kwh': round(unreported, 4)
+            })
+        
+        return {
+            'energy_kwh': round(energy, 4),
+            'integrated_hours': round(float(dt[integrated].sum()) / 3600, 3),
+            'gap_hours': round(float(dt[~integrated & (dt > 0)].sum()) / 3600, 3),
+            'power_consistency': consistency
+        }
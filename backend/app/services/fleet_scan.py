@@ -0,0 +1,265 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from app.extensions import db
+from app.models import Device, DeviceReading, TamperAlert
+from app.services.anomaly_detector import AnomalyDetector
+
+# Fitted (detector, fill values) per device type, set in each pool worker
+_worker_models = {}
+
+
+def _init_worker(models):
+    global _worker_models
+    _worker_models = models
+
+
+def _score_chunk(frame):
+    """Per-device statistics and ML outlier rates for a chunk of whole devices"""
+    frame = frame.assign(
+        is_anomaly=frame['is_anomaly'].fillna(False).astype(bool),
+        ml_outlier=np.nan,
+        ml_score=np.nan
+    )
+    
+    for device_type, rows in frame.groupby('device_type', sort=False):
+        if device_type not in _worker_models:
+            continue
+        detector, fill_values = _worker_models[device_type]
+        X = detector.scaler.transform(FleetScanService._features(rows, device_type, fill_values))
+        frame.loc[rows.index, 'ml_outlier'] = (detector.model.predict(X) == -1).astype(float)
+        frame.loc[rows.index, 'ml_score'] = -detector.model.score_samples(X)
+    
+    grouped = frame.groupby('device_id', sort=False)
+    stats = grouped.agg(
+        device_type=('device_type', 'first'),
+        readings=('value', 'size'),
+        mean_value=('value', 'mean'),
+        min_value=('value', 'min'),
+        max_value=('value', 'max'),
+        anomaly_count=('is_anomaly', 'sum'),
+        ml_outlier_rate=('ml_outlier', 'mean'),
+        ml_score=('ml_score', 'mean'),
+        last_reading=('timestamp', 'max')
+    )
+    stats['std_value'] = grouped['value'].std(ddof=0)
+    return stats
+
+
+class FleetScanService:
+    
+    DEFAULT_CHUNK_SIZE = 50000
+    FIT_SAMPLE_SIZE = 20000
+    MIN_READINGS = 10
+    
+    # Typed columns used as model features alongside value, hour and weekday
+    FEATURES = {
+        'weighing_scale': [],
+        'energy_meter': ['voltage', 'current'],
+        'fuel_dispenser': ['pressure', 'magnetic_field']
+    }
+    
+    # Weights of the 0-100 component scores in the overall risk score
+    RISK_WEIGHTS = {
+        'anomaly_score': 0.5,
+        'ml_outlier_pct': 0.3,
+        'alert_score': 0.2
+    }
+    
+    @staticmethod
+    def _select():
+        return select(
+            DeviceReading.device_id,
+            Device.device_type,
+            DeviceReading.timestamp,
+            DeviceReading.value,
+            DeviceReading.is_anomaly,
+            DeviceReading.voltage,
+            DeviceReading.current,
+            DeviceReading.pressure,
+            DeviceReading.magnetic_field
+        ).join(Device, Device.id == DeviceReading.device_id)
+    
+    @staticmethod
+    def _frame(result_keys, rows):
+        return pd.DataFrame.from_records([tuple(row) for row in rows], columns=result_keys)
+    
+    @staticmethod
+    def _features(frame, device_type, fill_values):
+        """Feature matrix matching AnomalyDetector: value, hour, weekday, typed metadata"""
+        timestamps = pd.to_datetime(frame['timestamp']).dt
+        columns = [frame['value'], timestamps.hour, timestamps.weekday]
+        columns += [frame[key].fillna(fill_values[key]) for key in FleetScanService.FEATURES[device_type]]
+        return np.column_stack([np.asarray(column, dtype=float) for column in columns])
+    
+    @staticmethod
+    def fit_models(start_time, contamination=0.1, sample_size=None):
+        """Fit one Isolation Forest per device type on a random fleet sample
+        
+        A shared model per type makes ML scores comparable across devices:
+        a device scores high when it behaves unlike its peers.
+        """
+        sample_size = sample_size or FleetScanService.FIT_SAMPLE_SIZE
+        models = {}
+        
+        for device_type in FleetScanService.FEATURES:
+            result = db.session.execute(
+                FleetScanService._select()
+                .where(Device.device_type == device_type, DeviceReading.timestamp >= start_time)
+                .order_by(func.random())
+                .limit(sample_size)
+            )
+            sample = FleetScanService._frame(list(result.keys()), result.all())
+            if len(sample) < 50:
+                continue
+            
+            fill_values = {}
+            for key in FleetScanService.FEATURES[device_type]:
+                mean = sample[key].mean()
+                fill_values[key] = 0.0 if pd.isna(mean) else float(mean)
+            
+            detector = AnomalyDetector(contamination=contamination)
+            detector._fit(FleetScanService._features(sample, device_type, fill_values))
+            models[device_type] = (detector, fill_values)
+        
+        return models
+    
+    @staticmethod
+    def iter_device_frames(start_time, chunk_size=None):
+        """Stream readings in device order, yielding DataFrames of whole devices
+        
+        One server-side cursor covers the fleet; the trailing device of each
+        partition is held back until its last reading has arrived.
+        """
+        chunk_size = chunk_size or FleetScanService.DEFAULT_CHUNK_SIZE
+        stmt = FleetScanService._select()\
+            .where(DeviceReading.timestamp >= start_time)\
+            .order_by(DeviceReading.device_id, DeviceReading.timestamp)\
+            .execution_options(yield_per=chunk_size)
+        
+        result = db.session.execute(stmt)
+        keys = list(result.keys())
+        carry = None
+        
+        for rows in result.partitions():
+            frame = FleetScanService._frame(keys, rows)
+            if carry is not None:
+                frame = pd.concat([carry, frame], ignore_index=True)
+            
+            split = int(frame['device_id'].searchsorted(frame['device_id'].iat[-1]))
+            carry = frame.iloc[split:].reset_index(drop=True)
+            if split:
+                yield frame.iloc[:split]
+        
+        if carry is not None and len(carry):
+            yield carry
+    
+    @staticmethod
+    def _score_frames(frames, models, workers):
+        """Score chunks in a process pool, keeping at most 2 chunks per worker in flight"""
+        if workers <= 1:
+            _init_worker(models)
+            return [_score_chunk(frame) for frame in frames]
+        
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(models,)) as pool:
+            pending = []
+            for frame in frames:
+                pending.append(pool.submit(_score_chunk, frame))
+                if len(pending) >= workers * 2:
+                    results.append(pending.pop(0).result())
+            results.extend(future.result() for future in pending)
+        return results
+    
+    @staticmethod
+    def run(hours=24, workers=None, chunk_size=None, contamination=0.1, now=None):
+        """Scan every device's recent readings and rank them by tamper risk"""
+        started = time.perf_counter()
+        now = now or datetime.utcnow()
+        start_time = now - timedelta(hours=hours)
+        workers = workers or os.cpu_count() or 1
+        
+        models = FleetScanService.fit_models(start_time, contamination=contamination)
+        chunks = FleetScanService._score_frames(
+            FleetScanService.iter_device_frames(start_time, chunk_size),
+            models,
+            workers
+        )
+        
+        report = {
+            'generated_at': now.isoformat(),
+            'window_hours': hours,
+            'models': sorted(models),
+            'devices_scanned': 0,
+            'readings_scanned': 0,
+            'devices': []
+        }
+        
+        if chunks:
+            stats = pd.concat(chunks)
+            report['devices_scanned'] = len(stats)
+            report['readings_scanned'] = int(stats['readings'].sum())
+            report['devices'] = FleetScanService._rank(stats)
+        
+        report['elapsed_seconds'] = round(time.perf_counter() - started, 2)
+        return report
+    
+    @staticmethod
+    def _rank(stats):
+        """Combine statistics, ML scores and open alerts into a ranked device list"""
+        devices = dict(db.session.query(Device.id, Device.device_id).filter(Device.id.in_(stats.index.tolist())))
+        open_alerts = dict(
+            db.session.query(TamperAlert.device_id, func.count(TamperAlert.id))
+            .filter(TamperAlert.resolved == False)  # noqa: E712
+            .group_by(TamperAlert.device_id)
+        )
+        
+        stats = stats.assign(
+            serial=stats.index.map(devices),
+            open_alerts=stats.index.map(lambda device_id: open_alerts.get(device_id, 0)),
+            anomaly_rate=stats['anomaly_count'] / stats['readings']
+        )
+        
+        # Same 0-100 scale as TamperDetector.analyze_pattern
+        anomaly_score = (stats['anomaly_rate'] * 200).clip(upper=100).astype(int)
+        ml_outlier_pct = (stats['ml_outlier_rate'] * 100).fillna(0)
+        alert_score = (stats['open_alerts'] * 25).clip(upper=100)
+        weights = FleetScanService.RISK_WEIGHTS
+        
+        risk = (
+            weights['anomaly_score'] * anomaly_score +
+            weights['ml_outlier_pct'] * ml_outlier_pct +
+            weights['alert_score'] * alert_score
+        )
+        enough = stats['readings'] >= FleetScanService.MIN_READINGS
+        
+        stats = stats.assign(
+            status=np.where(enough, 'analyzed', 'insufficient_data'),
+            anomaly_score=anomaly_score,
+            risk_score=risk.where(enough, 0).round(1),
+            last_reading=stats['last_reading'].map(lambda ts: ts.isoformat())
+        ).sort_values(['risk_score', 'anomaly_count'], ascending=False)
+        
+        columns = [
+            'serial', 'device_type', 'status', 'risk_score', 'anomaly_score', 'readings',
+            'anomaly_count', 'anomaly_rate', 'ml_outlier_rate', 'ml_score', 'open_alerts',
+            'mean_value', 'std_value', 'min_value', 'max_value', 'last_reading'
+        ]
+        ranked = stats[columns].round(4).reset_index()
+        ranked = ranked.astype(object).where(ranked.notna(), None)
+        return ranked.to_dict('records')
+    
+    @staticmethod
+    def write_report(report, path):
+        """Write the report as CSV (ranked devices only) or JSON, by file extension"""
+        if str(path).endswith('.csv'):
+            pd.DataFrame(report['devices']).to_csv(path, index=False)
+        else:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+        return str(path)
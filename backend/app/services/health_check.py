@@ -0,0 +1,123 @@
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func, text
+from app.extensions import db
+from app.models import BlockchainLog, DeviceReading
+from app.utils.db_routing import REPLICA_BIND, replica_lag
+
+class HealthCheck:
+    
+    @staticmethod
+    def _check(status, **details):
+        return {'status': status, **details}
+    
+    @staticmethod
+    def check_database():
+        """Round-trip latency of a trivial query"""
+        started = time.perf_counter()
+        try:
+            db.session.execute(text('SELECT 1'))
+        except Exception as e:
+            db.session.rollback()
+            return HealthCheck._check('down', error=str(e))
+        latency_ms = (time.perf_counter() - started) * 1000
+        
+        threshold = current_app.config['HEALTH_DB_LATENCY_MS']
+        status = 'ok' if latency_ms <= threshold else 'degraded'
+        return HealthCheck._check(status, latency_ms=round(latency_ms, 2), threshold_ms=threshold)
+    
+    @staticmethod
+    def check_pool():
+        """Fraction of pool capacity (size + overflow) currently checked out"""
+        pool = db.engine.pool
+        if not hasattr(pool, 'checkedout') or not hasattr(pool, 'size'):
+            return HealthCheck._check('ok', pool=type(pool).__name__)
+        
+        capacity = pool.size() + max(getattr(pool, '_max_overflow', 0), 0)
+        checked_out = pool.checkedout()
+        saturation = checked_out / capacity if capacity else 0.0
+        
+        threshold = current_app.config['HEALTH_POOL_SATURATION']
+        status = 'ok' if saturation < threshold else 'degraded'
+        return HealthCheck._check(
+            status,
+            checked_out=checked_out,
+            capacity=capacity,
+            saturation=round(saturation, 3),
+            threshold=threshold
+        )
+    
+    @staticmethod
+    def _freshness(latest, threshold):
+        if latest is None:
+            return HealthCheck._check('unknown', age_seconds=None)
+        
+        age = (datetime.utcnow() - latest).total_seconds()
+        status = 'ok' if not threshold or age <= threshold else 'degraded'
+        return HealthCheck._check(
+            status,
+            latest=latest.isoformat(),
+            age_seconds=round(age, 1),
+            threshold_seconds=threshold or None
+        )
+    
+    @staticmethod
+    def check_ingest_lag():
+        """Age of the newest stored reading"""
+        latest = db.session.query(func.max(DeviceReading.timestamp)).scalar()
+        return HealthCheck._freshness(latest, current_app.config['HEALTH_INGEST_LAG_SECONDS'])
+    
+    @staticmethod
+    def check_chain_head():
+        """Age and height of the newest audit ledger block"""
+        head = BlockchainLog.query.order_by(BlockchainLog.block_number.desc()).first()
+        result = HealthCheck._freshness(
+            head.timestamp if head else None,
+            current_app.config['HEALTH_CHAIN_HEAD_AGE_SECONDS']
+        )
+        result['block_number'] = head.block_number if head else 0
+        return result
+    
+    @staticmethod
+    def check_replica():
+        """Replica lag; reads fall back to the primary, so this never degrades readiness"""
+        lag = replica_lag(force=True)
+        tolerance = current_app.config['DB_REPLICA_MAX_LAG_SECONDS']
+        if lag is None:
+            return HealthCheck._check('down', serving='primary')
+        
+        status = 'ok' if lag <= tolerance else 'lagging'
+        return HealthCheck._check(
+            status,
+            lag_seconds=round(lag, 1),
+            max_lag_seconds=tolerance,
+            serving='replica' if status == 'ok' else 'primary'
+        )
+    
+    @staticmethod
+    def readiness():
+        """Run every dependency check and derive an overall status
+        
+        'unhealthy' if the database is unreachable, 'degraded' if any
+        check breaches its threshold, otherwise 'healthy'.
+        """
+        started = time.perf_counter()
+        checks = {'database': HealthCheck.check_database()}
+        
+        if checks['database']['status'] == 'down':
+            status = 'unhealthy'
+        else:
+            checks['pool'] = HealthCheck.check_pool()
+            checks['ingest'] = HealthCheck.check_ingest_lag()
+            checks['chain_head'] = HealthCheck.check_chain_head()
+            if REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {}):
+                checks['replica'] = HealthCheck.check_replica()
+            degraded = any(check['status'] == 'degraded' for check in checks.values())
+            status = 'degraded' if degraded else 'healthy'
+        
+        return {
+            'status': status,
+            'checks': checks,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
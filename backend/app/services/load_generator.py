@@ -0,0 +1,183 @@
+import json
+import time
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app.services.data_simulator import DataSimulator
+
+class LoadGenerator:
+    
+    DEVICE_TYPES = {
+        'weighing_scale': ('weighing-scale', DataSimulator.generate_weighing_scale_data),
+        'energy_meter': ('energy-meter', DataSimulator.generate_energy_meter_data),
+        'fuel_dispenser': ('fuel-dispenser', DataSimulator.generate_fuel_dispenser_data)
+    }
+    
+    PAYLOAD_FIELDS = {
+        'weighing_scale': ['weight'],
+        'energy_meter': ['power', 'voltage', 'current'],
+        'fuel_dispenser': ['flow_rate', 'totalizer', 'pulse_count', 'magnetic_field', 'pressure', 'nozzle_state']
+    }
+    
+    def __init__(self, base_url=None, token=None, app=None, concurrency=16, seed=None):
+        """Drive the ingest endpoints over HTTP (base_url) or in-process (app)"""
+        if not base_url and app is None:
+            raise ValueError('Either base_url or app is required')
+        
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.app = app
+        self.token = token
+        self.concurrency = concurrency
+        self.seed = seed
+        self._local = threading.local()
+    
+    def _client(self):
+        """Per-thread HTTP session or Flask test client"""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            if self.app is not None:
+                client = self.app.test_client()
+            else:
+                import requests
+                client = requests.Session()
+            self._local.client = client
+        return client
+    
+    def _post(self, path, payload):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        client = self._client()
+        
+        started = time.perf_counter()
+        try:
+            if self.app is not None:
+                status = client.post(path, json=payload, headers=headers).status_code
+            else:
+                status = client.post(self.base_url + path, json=payload, headers=headers, timeout=30).status_code
+        except Exception:
+            status = 'connection_error'
+        
+        return status, time.perf_counter() - started
+    
+    def create_devices(self, devices_per_type, prefix='LOAD', devices_per_site=4):
+        """Register simulated devices through the API, returning (type, id) pairs
+        
+        Raises RuntimeError with the response body if any device is rejected.
+        """
+        run_id = int(time.time())
+        specs = [
+            (device_type, f'{prefix}-{device_type[:3].upper()}-{run_id}-{index:06d}', index // devices_per_site)
+            for device_type in self.DEVICE_TYPES
+            for index in range(devices_per_type)
+        ]
+        
+        def create(spec):
+            device_type, serial, site = spec
+            client = self._client()
+            headers = {'Authorization': f'Bearer {self.token}'}
+            # Small co-located groups, like real stations, for the correlation engine
+            payload = {'device_type': device_type, 'device_id': serial, 'location': f'{prefix}-{run_id}-{site:05d}'}
+            
+            if self.app is not None:
+                response = client.post('/api/devices/', json=payload, headers=headers)
+                text = response.get_data(as_text=True)
+            else:
+                response = client.post(self.base_url + '/api/devices/', json=payload, headers=headers, timeout=30)
+                text = response.text
+            
+            # An expired token or a clashing serial would otherwise surface as a KeyError
+            if response.status_code != 201:
+                raise RuntimeError(f'Creating device {serial} failed with HTTP {response.status_code}: {" ".join(text.split())}')
+            return device_type, json.loads(text)['id']
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return list(pool.map(create, specs))
+    
+    def build_requests(self, devices, readings_per_device, tamper_fraction=0.0):
+        """Pre-generate (device_type, path, payload) requests, interleaved across devices"""
+        rng = np.random.default_rng(self.seed)
+        per_device = []
+        
+        for device_type, device_id in devices:
+            prefix, generator = self.DEVICE_TYPES[device_type]
+            columns = generator(
+                num_points=readings_per_device,
+                inject_tamper=bool(rng.random() < tamper_fraction),
+                seed=int(rng.integers(2 ** 32)),
+                columnar=True
+            )
+            
+            fields = self.PAYLOAD_FIELDS[device_type]
+            values = [columns[field].tolist() for field in fields]
+            path = f'/api/{prefix}/readings/{device_id}'
+            per_device.append([
+                (device_type, path, dict(zip(fields, row)))
+                for row in zip(*values)
+            ])
+        
+        # Round-robin so every device sends at roughly the same rate
+        return [batch[i] for i in range(readings_per_device) for batch in per_device]
+    
+    def run(self, requests_list, rate=None):
+        """Send requests with bounded concurrency and an optional global rate (req/s)"""
+        results = [None] * len(requests_list)
+        started = time.perf_counter()
+        
+        def send(index):
+            if rate:
+                delay = started + index / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            
+            device_type, path, payload = requests_list[index]
+            status, latency = self._post(path, payload)
+            results[index] = (device_type, status, latency)
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            list(pool.map(send, range(len(requests_list))))
+        
+        return self.report(results, time.perf_counter() - started)
+    
+    @staticmethod
+    def _latency_summary(latencies):
+        if not latencies:
+            return {}
+        
+        ms = np.asarray(latencies) * 1000
+        p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+        return {
+            'p50_ms': round(float(p50), 2),
+            'p90_ms': round(float(p90), 2),
+            'p99_ms': round(float(p99), 2),
+            'max_ms': round(float(ms.max()), 2)
+        }
+    
+    @staticmethod
+    def report(results, elapsed):
+        """Summarize throughput, latency percentiles and error rates"""
+        by_type = defaultdict(list)
+        statuses = Counter()
+        
+        for device_type, status, latency in results:
+            by_type[device_type].append((status, latency))
+            statuses[str(status)] += 1
+        
+        errors = sum(count for status, count in statuses.items() if status != '201')
+        total = len(results)
+        
+        return {
+            'total_requests': total,
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput_rps': round(total / elapsed, 1) if elapsed else 0,
+            'error_rate': round(errors / total, 4) if total else 0,
+            'status_codes': dict(statuses),
+            'latency': LoadGenerator._latency_summary([latency for _, _, latency in results]),
+            'by_device_type': {
+                device_type: {
+                    'requests': len(rows),
+                    'errors': sum(1 for status, _ in rows if status != 201),
+                    'latency': LoadGenerator._latency_summary([latency for _, latency in rows])
+                }
+                for device_type, rows in by_type.items()
+            }
+        }
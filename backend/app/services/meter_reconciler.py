@@ -0,0 +1,169 @@
+from datetime import datetime
+from app.services.alert_aggregator import AlertAggregator
+from app.services.detector_state import DetectorStateStore
+
+class MeterReconciler:
+    """Reconciles fuel dispenser totalizers against integrated flow and pulse counts
+    
+    Between consecutive readings the flow rate is integrated with the
+    trapezoidal rule and compared to the totalizer delta; pulse_count (pulses
+    since the previous reading) is compared to the same delta through a
+    per-dispenser pulses-per-litre factor learned from the first windows.
+    Only running sums for the current window are kept, so each reading costs
+    O(1). A pulser that is slowed or bypassed shows up as the totalizer
+    drifting away from flow or pulses.
+    
+    Flow is integrated over the device's own reading timestamps when the
+    payload carries them. Otherwise the server receive time is used, which
+    batching or replaying gateways distort, so a window integrated that way
+    that disagrees with the totalizer is counted as unverified rather than
+    alerted; the pulse check does not depend on timing and still runs.
+    """
+    
+    DETECTOR = 'fuel_reconciliation'
+    
+    WINDOW_LITRES = 20.0  # volume reconciled per check
+    FLOW_TOLERANCE = 0.05  # relative totalizer vs integrated flow error
+    PULSE_TOLERANCE = 0.05  # relative pulse vs totalizer error
+    K_WARMUP_WINDOWS = 3  # windows averaged into the pulses-per-litre factor
+    K_ALPHA = 0.1  # weight of a healthy window in the factor afterwards
+    MAX_GAP_SECONDS = 300  # longer gaps cannot be integrated; the window restarts
+    ROLLBACK_TOLERANCE = 0.01  # litres; totalizer rounding
+    
+    @staticmethod
+    def _reset_window(state):
+        state.update({'window_flow': 0.0, 'window_totalizer': 0.0, 'window_pulses': 0, 'window_timed': True})
+    
+    @staticmethod
+    def _check_window(device, state):
+        """Compare the closed window's volumes and return detected discrepancy types"""
+        reconciler = MeterReconciler
+        found = []
+        volume = max(state['window_flow'], state['window_totalizer'])
+        
+        flow_error = (state['window_totalizer'] - state['window_flow']) / volume
+        state['last_flow_error'] = round(flow_error, 4)
+        if abs(flow_error) > reconciler.FLOW_TOLERANCE and not state.get('window_timed'):
+            # Receive-time gaps can't tell tampering from batched delivery
+            state['windows_unverified'] = state.get('windows_unverified', 0) + 1
+        elif abs(flow_error) > reconciler.FLOW_TOLERANCE:
+            found.append('meter_discrepancy')
+            AlertAggregator.raise_alert(
+                device_id=device.id,
+                alert_type='meter_discrepancy',
+                severity='high',
+                description=(
+                    f'Totalizer advanced {state["window_totalizer"]:.2f} L while integrated flow '
+                    f'was {state["window_flow"]:.2f} L ({flow_error:+.1%})'
+                ),
+                value=round(abs(flow_error) * 100, 2)
+            )
+        
+        if state['window_pulses'] > 0 and state['window_totalizer'] > 0:
+            ratio = state['window_pulses'] / state['window_totalizer']
+            
+            if state['k_windows'] < reconciler.K_WARMUP_WINDOWS:
+                state['k_windows'] += 1
+                state['pulses_per_litre'] += (ratio - state['pulses_per_litre']) / state['k_windows']
+            else:
+                pulse_error = ratio / state['pulses_per_litre'] - 1
+                state['last_pulse_error'] = round(pulse_error, 4)
+                if abs(pulse_error) > reconciler.PULSE_TOLERANCE:
+                    found.append('pulser_mismatch')
+                    AlertAggregator.raise_alert(
+                        device_id=device.id,
+                        alert_type='pulser_mismatch',
+                        severity='critical',
+                        description=(
+                            f'{state["window_pulses"]} pulses for {state["window_totalizer"]:.2f} L '
+                            f'({ratio:.1f}/L vs calibrated {state["pulses_per_litre"]:.1f}/L)'
+                        ),
+                        value=round(abs(pulse_error) * 100, 2)
+                    )
+                else:
+                    state['pulses_per_litre'] += reconciler.K_ALPHA * (ratio - state['pulses_per_litre'])
+        
+        state['windows_checked'] += 1
+        if found:
+            state['windows_flagged'] += 1
+        return found
+    
+    @staticmethod
+    def observe(device, flow_rate, totalizer, pulse_count=None, reading_time=None, now=None):
+        """Fold a fuel reading into the dispenser's reconciliation window
+        
+        reading_time is the device-supplied timestamp, if any; now is the
+        receive time used without one. Returns the discrepancy alert types
+        raised by this reading.
+        """
+        if flow_rate is None or totalizer is None:
+            return []
+        
+        reconciler = MeterReconciler
+        timed = reading_time is not None
+        ts = (reading_time or now or datetime.utcnow()).timestamp()
+        flow_rate, totalizer = float(flow_rate), float(totalizer)
+        
+        row = DetectorStateStore.load(reconciler.DETECTOR, device.id)
+        state = row.state
+        found = []
+        
+        if not state:
+            state = {
+                'pulses_per_litre': 0.0,
+                'k_windows': 0,
+                'windows_checked': 0,
+                'windows_flagged': 0,
+                'windows_unverified': 0
+            }
+            reconciler._reset_window(state)
+        else:
+            elapsed = ts - state['last_ts']
+            
+            if totalizer < state['last_totalizer'] - reconciler.ROLLBACK_TOLERANCE:
+                found.append('totalizer_rollback')
+                AlertAggregator.raise_alert(
+                    device_id=device.id,
+                    alert_type='totalizer_rollback',
+                    severity='critical',
+                    description=f'Totalizer went back from {state["last_totalizer"]:.2f} L to {totalizer:.2f} L',
+                    value=round(state['last_totalizer'] - totalizer, 2)
+                )
+                reconciler._reset_window(state)
+            elif elapsed <= 0 or elapsed > reconciler.MAX_GAP_SECONDS or timed != state.get('last_timed', False):
+                # Gaps and switches between device and receive clocks can't be integrated
+                reconciler._reset_window(state)
+            else:
+                state['window_timed'] = state.get('window_timed', False) and timed
+                state['window_flow'] += (state['last_flow'] + flow_rate) / 2 * elapsed / 60
+                state['window_totalizer'] += totalizer - state['last_totalizer']
+                state['window_pulses'] += int(pulse_count or 0)
+                
+                if max(state['window_flow'], state['window_totalizer']) >= reconciler.WINDOW_LITRES:
+                    found.extend(reconciler._check_window(device, state))
+                    reconciler._reset_window(state)
+        
+        state.update({'last_ts': ts, 'last_timed': timed, 'last_flow': flow_rate, 'last_totalizer': totalizer})
+        DetectorStateStore.save(row, state)
+        return found
+    
+    @staticmethod
+    def status(device):
+        """Current reconciliation window and calibration for a dispenser"""
+        row = DetectorStateStore.peek(MeterReconciler.DETECTOR, device.id)
+        if row is None or not row.state:
+            return {'status': 'no_data'}
+        
+        state = row.state
+        return {
+            'status': 'monitoring' if state['windows_checked'] else 'collecting',
+            'window_flow_litres': round(state['window_flow'], 3),
+            'window_totalizer_litres': round(state['window_totalizer'], 3),
+            'window_pulses': state['window_pulses'],
+            'pulses_per_litre': round(state['pulses_per_litre'], 3) if state['k_windows'] else None,
+            'last_flow_error': state.get('last_flow_error'),
+            'last_pulse_error': state.get('last_pulse_error'),
+            'windows_checked': state['windows_checked'],
+            'windows_flagged': state['windows_flagged'],
+            'windows_unverified': state.get('windows_unverified', 0)
+        }
@@ -0,0 +1,379 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import case, func, text
+from sqlalchemy.schema import CreateIndex
+from app.extensions import db
+from app.models import Device, DeviceReading, ReadingRollup
+
+class RetentionService:
+    
+    DEFAULT_RETENTION_DAYS = 90
+    DEFAULT_BATCH_SIZE = 5000
+    PARTITION_PREFIX = 'device_readings_p'
+    DEFAULT_PARTITION = 'device_readings_default'
+    
+    @staticmethod
+    def retention_days(device_type):
+        """Get the raw reading retention period for a device type"""
+        overrides = current_app.config.get('READING_RETENTION_OVERRIDES', {})
+        if device_type in overrides:
+            return overrides[device_type]
+        
+        return current_app.config.get('READING_RETENTION_DAYS', RetentionService.DEFAULT_RETENTION_DAYS)
+    
+    @staticmethod
+    def device_types():
+        """Device types present in the fleet"""
+        return [row[0] for row in db.session.query(Device.device_type).distinct().all()]
+    
+    @staticmethod
+    def run(dry_run=False, now=None):
+        """Roll up and remove raw readings that are past their retention period"""
+        now = now or datetime.utcnow()
+        result = {
+            'dry_run': dry_run,
+            'partitions_dropped': [],
+            'device_types': {}
+        }
+        
+        if RetentionService.is_partitioned():
+            if not dry_run:
+                RetentionService.ensure_partitions(now=now)
+            result['partitions_dropped'] = RetentionService.drop_expired_partitions(now=now, dry_run=dry_run)
+        
+        for device_type in RetentionService.device_types():
+            days = RetentionService.retention_days(device_type)
+            cutoff = now - timedelta(days=days)
+            
+            if dry_run:
+                deleted = RetentionService._expired_query(device_type, cutoff).count()
+            else:
+                deleted = RetentionService._purge_device_type(device_type, cutoff)
+            
+            result['device_types'][device_type] = {
+                'retention_days': days,
+                'cutoff': cutoff.isoformat(),
+                'readings_deleted': deleted
+            }
+        
+        return result
+    
+    @staticmethod
+    def report(now=None):
+        """Summarize raw reading volume and retention state per device type"""
+        now = now or datetime.utcnow()
+        report = {
+            'partitioned': RetentionService.is_partitioned(),
+            'partitions': [],
+            'rollup_buckets': ReadingRollup.query.count(),
+            'device_types': {}
+        }
+        
+        if report['partitioned']:
+            report['partitions'] = [
+                {'name': name, 'start': start.isoformat(), 'end': end.isoformat()}
+                for name, start, end in RetentionService.list_partitions()
+            ]
+        
+        rows = db.session.query(
+            Device.device_type,
+            func.count(DeviceReading.id),
+            func.min(DeviceReading.timestamp),
+            func.max(DeviceReading.timestamp)
+        ).join(Device, Device.id == DeviceReading.device_id)\
+            .group_by(Device.device_type)\
+            .all()
+        
+        for device_type, total, oldest, newest in rows:
+            days = RetentionService.retention_days(device_type)
+            cutoff = now - timedelta(days=days)
+            report['device_types'][device_type] = {
+                'retention_days': days,
+                'total_readings': total,
+                'expired_readings': RetentionService._expired_query(device_type, cutoff).count(),
+                'oldest_reading': oldest.isoformat() if oldest else None,
+                'newest_reading': newest.isoformat() if newest else None
+            }
+        
+        return report
+    
+    @staticmethod
+    def _expired_query(device_type, cutoff):
+        device_ids = db.session.query(Device.id).filter(Device.device_type == device_type)
+        return db.session.query(DeviceReading.id).filter(
+            DeviceReading.device_id.in_(device_ids),
+            DeviceReading.timestamp < cutoff
+        )
+    
+    @staticmethod
+    def _purge_device_type(device_type, cutoff):
+        """Roll up and delete expired readings in bounded batches
+        
+        Each batch is rolled up and deleted in the same transaction, so a
+        reading is never removed before its hourly aggregate is stored.
+        """
+        batch_size = current_app.config.get('READING_RETENTION_BATCH_SIZE', RetentionService.DEFAULT_BATCH_SIZE)
+        deleted = 0
+        
+        while True:
+            ids = [
+                row[0] for row in RetentionService._expired_query(device_type, cutoff)
+                .order_by(DeviceReading.id)
+                .limit(batch_size)
+                .all()
+            ]
+            if not ids:
+                break
+            
+            RetentionService.rollup(DeviceReading.id.in_(ids))
+            DeviceReading.query.filter(DeviceReading.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            deleted += len(ids)
+        
+        return deleted
+    
+    @staticmethod
+    def _hour_bucket():
+        if db.engine.dialect.name == 'postgresql':
+            return func.date_trunc('hour', DeviceReading.timestamp)
+        return func.strftime('%Y-%m-%d %H:00:00', DeviceReading.timestamp)
+    
+    @staticmethod
+    def rollup(*criteria):
+        """Merge hourly aggregates of the matching readings into ReadingRollup
+        
+        Does not commit; callers delete the rolled-up rows in the same transaction.
+        """
+        bucket = RetentionService._hour_bucket()
+        rows = db.session.query(
+            DeviceReading.device_id,
+            DeviceReading.reading_type,
+            bucket,
+            func.count(DeviceReading.id),
+            func.sum(DeviceReading.value),
+            func.min(DeviceReading.value),
+            func.max(DeviceReading.value),
+            func.sum(case((DeviceReading.is_anomaly == True, 1), else_=0))  # noqa: E712
+        ).filter(*criteria).group_by(
+            DeviceReading.device_id, DeviceReading.reading_type, bucket
+        ).all()
+        
+        if not rows:
+            return 0
+        
+        aggregates = {}
+        for device_id, reading_type, bucket_start, count, total, low, high, anomalies in rows:
+            if isinstance(bucket_start, str):
+                bucket_start = datetime.strptime(bucket_start, '%Y-%m-%d %H:%M:%S')
+            aggregates[(device_id, reading_type, bucket_start)] = (count, total or 0.0, low, high, anomalies or 0)
+        
+        buckets = [key[2] for key in aggregates]
+        existing = {
+            (r.device_id, r.reading_type, r.bucket_start): r
+            for r in ReadingRollup.query.filter(
+                ReadingRollup.device_id.in_({key[0] for key in aggregates}),
+                ReadingRollup.bucket_start >= min(buckets),
+                ReadingRollup.bucket_start <= max(buckets)
+            ).all()
+        }
+        
+        for key, (count, total, low, high, anomalies) in aggregates.items():
+            rollup = existing.get(key)
+            if rollup is None:
+                db.session.add(ReadingRollup(
+                    device_id=key[0],
+                    reading_type=key[1],
+                    bucket_start=key[2],
+                    count=count,
+                    sum_value=total,
+                    min_value=low,
+                    max_value=high,
+                    anomaly_count=anomalies
+                ))
+                continue
+            
+            rollup.count += count
+            rollup.sum_value += total
+            rollup.min_value = low if rollup.min_value is None else min(rollup.min_value, low)
+            rollup.max_value = high if rollup.max_value is None else max(rollup.max_value, high)
+            rollup.anomaly_count += anomalies
+        
+        return len(aggregates)
+    
+    # PostgreSQL monthly range partitioning
+    
+    @staticmethod
+    def _month_start(dt):
+        return datetime(dt.year, dt.month, 1)
+    
+    @staticmethod
+    def _next_month(dt):
+        return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+    
+    @staticmethod
+    def is_partitioned():
+        """Whether device_readings is a PostgreSQL partitioned table"""
+        if db.engine.dialect.name != 'postgresql':
+            return False
+        
+        return db.session.execute(text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = 'device_readings'"
+        )).first() is not None
+    
+    @staticmethod
+    def list_partitions():
+        """List (name, start, end) of monthly device_readings partitions"""
+        rows = db.session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'device_readings' ORDER BY c.relname"
+        )).all()
+        
+        partitions = []
+        for (name,) in rows:
+            if not name.startswith(RetentionService.PARTITION_PREFIX):
+                continue
+            start = datetime.strptime(name[len(RetentionService.PARTITION_PREFIX):], '%Y%m')
+            partitions.append((name, start, RetentionService._next_month(start)))
+        
+        return partitions
+    
+    @staticmethod
+    def _create_partition(start):
+        """Create the monthly partition starting at start unless it exists
+        
+        Rows that already landed in the default partition for that month
+        are moved into the new one before it is attached, since PostgreSQL
+        refuses to attach a range the default partition has rows for.
+        """
+        end = RetentionService._next_month(start)
+        name = f"{RetentionService.PARTITION_PREFIX}{start:%Y%m}"
+        if db.session.execute(text(f"SELECT to_regclass('{name}')")).scalar() is not None:
+            return name
+        
+        bounds = f"\"timestamp\" >= '{start:%Y-%m-%d}' AND \"timestamp\" < '{end:%Y-%m-%d}'"
+        for statement in (
+            f"CREATE TABLE {name} (LIKE device_readings INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+            f"WITH moved AS (DELETE FROM {RetentionService.DEFAULT_PARTITION} WHERE {bounds} RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            f"ALTER TABLE device_readings ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')",
+        ):
+            db.session.execute(text(statement))
+        return name
+    
+    @staticmethod
+    def _create_default_partition():
+        """Catch readings outside every monthly partition instead of rejecting them"""
+        db.session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {RetentionService.DEFAULT_PARTITION} "
+            f"PARTITION OF device_readings DEFAULT"
+        ))
+    
+    @staticmethod
+    def ensure_partitions(months_ahead=3, now=None):
+        """Create monthly partitions from the current month up to months_ahead"""
+        month = RetentionService._month_start(now or datetime.utcnow())
+        created = []
+        
+        RetentionService._create_default_partition()
+        for _ in range(months_ahead + 1):
+            created.append(RetentionService._create_partition(month))
+            month = RetentionService._next_month(month)
+        
+        db.session.commit()
+        return created
+    
+    @staticmethod
+    def drop_expired_partitions(now=None, dry_run=False):
+        """Roll up and drop partitions older than every device type's retention"""
+        now = now or datetime.utcnow()
+        longest = max(
+            [RetentionService.retention_days(t) for t in RetentionService.device_types()] or
+            [current_app.config.get('READING_RETENTION_DAYS', RetentionService.DEFAULT_RETENTION_DAYS)]
+        )
+        cutoff = now - timedelta(days=longest)
+        dropped = []
+        
+        for name, start, end in RetentionService.list_partitions():
+            if end > cutoff:
+                continue
+            
+            if not dry_run:
+                RetentionService.rollup(DeviceReading.timestamp >= start, DeviceReading.timestamp < end)
+                db.session.execute(text(f"DROP TABLE {name}"))
+                db.session.commit()
+            dropped.append(name)
+        
+        return dropped
+    
+    @staticmethod
+    def _model_indexes():
+        """The DeviceReading model's indexes, by name"""
+        return sorted(DeviceReading.__table__.indexes, key=lambda index: index.name)
+    
+    @staticmethod
+    def _index_statements():
+        """CREATE INDEX statements for the model's indexes, under the model's names
+        
+        'flask schema upgrade' looks indexes up by name, so any other name
+        would have it add a duplicate.
+        """
+        return [
+            str(CreateIndex(index).compile(dialect=db.engine.dialect))
+            for index in RetentionService._model_indexes()
+        ]
+    
+    @staticmethod
+    def partition_table(months_ahead=3):
+        """Convert device_readings into a monthly range-partitioned table
+        
+        One-off PostgreSQL migration. Existing rows are copied into
+        partitions covering their timestamps; the id sequence is kept. A
+        default partition takes readings beyond the last monthly one, e.g.
+        when the scheduled retention run has not created it yet.
+        """
+        if db.engine.dialect.name != 'postgresql':
+            raise RuntimeError('Table partitioning requires PostgreSQL')
+        if RetentionService.is_partitioned():
+            return []
+        
+        oldest = db.session.query(func.min(DeviceReading.timestamp)).scalar()
+        now = datetime.utcnow()
+        
+        # Index names are schema-wide: the legacy copy gives up the model's names
+        # so the partitioned parent can take them
+        for statement in (
+            "ALTER TABLE device_readings RENAME TO device_readings_legacy",
+            "ALTER SEQUENCE device_readings_id_seq OWNED BY NONE",
+            *(f"DROP INDEX IF EXISTS {index.name}" for index in RetentionService._model_indexes()),
+            "CREATE TABLE device_readings (LIKE device_readings_legacy "
+            "INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (\"timestamp\")",
+            "ALTER TABLE device_readings ADD PRIMARY KEY (id, \"timestamp\")",
+            "ALTER TABLE device_readings ADD FOREIGN KEY (device_id) REFERENCES devices (id)",
+            *RetentionService._index_statements(),
+        ):
+            db.session.execute(text(statement))
+        
+        created = []
+        month = RetentionService._month_start(oldest or now)
+        last = RetentionService._month_start(now)
+        for _ in range(months_ahead):
+            last = RetentionService._next_month(last)
+        RetentionService._create_default_partition()
+        while month <= last:
+            created.append(RetentionService._create_partition(month))
+            month = RetentionService._next_month(month)
+        
+        for statement in (
+            "INSERT INTO device_readings SELECT * FROM device_readings_legacy",
+            "ALTER SEQUENCE device_readings_id_seq OWNED BY device_readings.id",
+            "DROP TABLE device_readings_legacy",
+        ):
+            db.session.execute(text(statement))
+        
+        db.session.commit()
+        return created
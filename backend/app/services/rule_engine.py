@@ -0,0 +1,465 @@
+import json
+import math
+import os
+import statistics
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func, select
+from app.extensions import db
+from app.models import TamperRule
+from app.services.alert_aggregator import AlertAggregator
+from app.services.detector_state import DetectorStateStore
+from app.utils.metrics import timed_detector
+
+# DeviceReading column behind each payload field
+FIELD_COLUMNS = {
+    'weighing_scale': {'weight': 'value'},
+    'energy_meter': {'power': 'value', 'voltage': 'voltage', 'current': 'current'},
+    'fuel_dispenser': {
+        'flow_rate': 'value',
+        'magnetic_field': 'magnetic_field',
+        'pressure': 'pressure',
+        'totalizer': 'totalizer'
+    }
+}
+
+SEVERITIES = ('low', 'medium', 'high', 'critical')
+
+# Accepted spellings of enabled in JSON payloads and rule files
+BOOLEAN_STRINGS = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+
+# Built-in rules; TAMPER_RULES_FILE and stored rules override them by name
+DEFAULT_RULES = [
+    {
+        'name': 'weight_drift',
+        'device_type': 'weighing_scale',
+        'field': 'weight',
+        'condition': 'median_deviation',
+        'threshold': 5.0,  # kg
+        'window_minutes': 30,
+        'alert_type': 'weight_drift',
+        'severity': 'high',
+        'description': 'Abnormal weight detected: {value} kg'
+    },
+    {
+        'name': 'voltage_spike',
+        'device_type': 'energy_meter',
+        'field': 'voltage',
+        'condition': 'zscore',
+        'threshold': 3.0,
+        'window_minutes': 30,
+        'fallback_threshold': 250.0,  # V
+        'alert_type': 'voltage_spike',
+        'severity': 'critical',
+        'description': 'Voltage spike detected: {value} V'
+    },
+    {
+        'name': 'magnetic_field',
+        'device_type': 'fuel_dispenser',
+        'field': 'magnetic_field',
+        'condition': 'above',
+        'threshold': 1.0,  # T
+        'alert_type': 'magnetic_tamper',
+        'severity': 'critical',
+        'description': 'Magnetic tampering detected. Field: {value} T'
+    },
+    {
+        'name': 'flow_rate_drop',
+        'device_type': 'fuel_dispenser',
+        'field': 'flow_rate',
+        'condition': 'drop',
+        'threshold': 0.3,  # 30% below the window average
+        'window_minutes': 30,
+        'alert_type': 'magnetic_tamper',
+        'severity': 'critical',
+        'description': 'Flow rate {value} L/min is {metric:.0%} below the recent average of {baseline:.2f}'
+    }
+]
+
+
+def _fallback(ceiling, value):
+    return ceiling is not None and value > ceiling, value, None
+
+
+def _above(threshold, min_samples, fallback):
+    return lambda value, window: (value > threshold, value, None)
+
+
+def _below(threshold, min_samples, fallback):
+    return lambda value, window: (value < threshold, value, None)
+
+
+def _median_deviation(threshold, min_samples, fallback):
+    def evaluate(value, window):
+        if window.count < min_samples:
+            return _fallback(fallback, value)
+        deviation = abs(value - window.median)
+        return deviation > threshold, deviation, window.median
+    return evaluate
+
+
+def _zscore(threshold, min_samples, fallback):
+    def evaluate(value, window):
+        if window.count < min_samples:
+            return _fallback(fallback, value)
+        if window.std == 0:
+            return _fallback(fallback, value)
+        z_score = abs(value - window.mean) / window.std
+        return z_score > threshold, z_score, window.mean
+    return evaluate
+
+
+def _drop(threshold, min_samples, fallback):
+    def evaluate(value, window):
+        if window.count < min_samples:
+            return _fallback(fallback, value)
+        if window.mean <= 0:
+            return False, 0.0, window.mean
+        drop = (window.mean - value) / window.mean
+        return drop > threshold, drop, window.mean
+    return evaluate
+
+
+# condition -> (evaluator factory, needs a window)
+CONDITIONS = {
+    'above': (_above, False),
+    'below': (_below, False),
+    'median_deviation': (_median_deviation, True),
+    'zscore': (_zscore, True),
+    'drop': (_drop, True)
+}
+# Windowed conditions that need a median rather than count/sum/sumsq
+MEDIAN_CONDITIONS = {'median_deviation'}
+
+CompiledRule = namedtuple('CompiledRule', 'definition field column window_seconds bucket_seconds keeps_samples evaluate')
+Window = namedtuple('Window', 'count mean std median')
+EMPTY_WINDOW = Window(0, None, None, None)
+
+_rules_state = {'checked_at': None, 'version': None, 'ruleset': None}
+_rules_lock = threading.Lock()
+
+
+class RuleEngine:
+    """Declarative tamper rules compiled once per worker and evaluated per reading
+    
+    Rules come from DEFAULT_RULES, then TAMPER_RULES_FILE, then the
+    tamper_rules table; a later rule with the same name replaces an earlier
+    one, and a per-device rule replaces the device type's rule for that
+    device only. Each definition is compiled into a closure. Workers
+    recompile when the table or file changes, checked at most every
+    TAMPER_RULES_RELOAD_SECONDS.
+    
+    Each windowed rule keeps its rolling window in the device's detector
+    state row as WINDOW_BUCKETS time buckets of count, sum, sum of squares
+    and median, so a reading costs the same whatever the window length or
+    reading rate; a window spans its length to within one bucket. Median
+    rules keep the raw values of the open bucket, up to BUCKET_SAMPLES;
+    validate reports when the expected reading rate would exceed that.
+    """
+    
+    DETECTOR = 'rule_windows'
+    WINDOW_BUCKETS = 30  # buckets per window
+    MIN_BUCKET_SECONDS = 60
+    BUCKET_SAMPLES = 64  # raw values per bucket behind a median
+    
+    @staticmethod
+    def window_plan(rule):
+        """Bucket layout of a windowed rule and whether its medians are truncated
+        
+        Returns None for rules without a window.
+        """
+        if not CONDITIONS[rule['condition']][1]:
+            return None
+        
+        engine = RuleEngine
+        window_seconds = rule['window_minutes'] * 60
+        bucket_seconds = max(engine.MIN_BUCKET_SECONDS, math.ceil(window_seconds / engine.WINDOW_BUCKETS))
+        plan = {
+            'bucket_seconds': bucket_seconds,
+            'buckets': math.ceil(window_seconds / bucket_seconds),
+            'truncated': False
+        }
+        if rule['condition'] in MEDIAN_CONDITIONS:
+            expected = bucket_seconds * current_app.config.get('TAMPER_RULES_EXPECTED_HZ', 1.0)
+            plan.update(samples_per_bucket=engine.BUCKET_SAMPLES, truncated=expected > engine.BUCKET_SAMPLES)
+            if plan['truncated']:
+                plan['warning'] = (
+                    f'Medians use the first {engine.BUCKET_SAMPLES} of about {expected:.0f} readings '
+                    f'per {bucket_seconds}s bucket at the expected reading rate'
+                )
+        return plan
+    
+    @staticmethod
+    def validate(definition):
+        """Normalized copy of a rule definition; raises ValueError if it is invalid"""
+        rule = dict(definition)
+        device_type = rule.get('device_type')
+        
+        for key in ('name', 'device_type', 'field', 'condition', 'threshold', 'alert_type'):
+            if rule.get(key) in (None, ''):
+                raise ValueError(f'Rule is missing {key}')
+        if device_type not in FIELD_COLUMNS:
+            raise ValueError(f'Unknown device type: {device_type}')
+        if rule['field'] not in FIELD_COLUMNS[device_type]:
+            raise ValueError(f'{device_type} readings have no field {rule["field"]}')
+        if rule['condition'] not in CONDITIONS:
+            raise ValueError(f'Unknown condition: {rule["condition"]}')
+        
+        rule.setdefault('severity', 'high')
+        if rule['severity'] not in SEVERITIES:
+            raise ValueError(f'Unknown severity: {rule["severity"]}')
+        
+        try:
+            rule['threshold'] = float(rule['threshold'])
+            rule['min_samples'] = int(rule.get('min_samples') or 5)
+            if rule.get('fallback_threshold') is not None:
+                rule['fallback_threshold'] = float(rule['fallback_threshold'])
+            if rule.get('window_minutes') is not None:
+                rule['window_minutes'] = int(rule['window_minutes'])
+        except (TypeError, ValueError):
+            raise ValueError(f'Rule {rule["name"]} has a non-numeric threshold, window or sample count')
+        
+        if CONDITIONS[rule['condition']][1] and not (rule.get('window_minutes') or 0) > 0:
+            raise ValueError(f'Condition {rule["condition"]} needs a positive window_minutes')
+        
+        if rule.get('description'):
+            try:
+                rule['description'].format(value=1.0, metric=1.0, baseline=1.0, threshold=1.0)
+            except (KeyError, IndexError, ValueError) as e:
+                raise ValueError(f'Invalid description template: {e}')
+        
+        enabled = rule.get('enabled', True)
+        if isinstance(enabled, str) and enabled.strip().lower() in BOOLEAN_STRINGS:
+            enabled = BOOLEAN_STRINGS[enabled.strip().lower()]
+        elif enabled is None:
+            enabled = True
+        elif not isinstance(enabled, bool):
+            raise ValueError(f'Rule {rule["name"]} has a non-boolean enabled: {enabled!r}')
+        rule['enabled'] = enabled
+        rule['window'] = RuleEngine.window_plan(rule)
+        return rule
+    
+    @staticmethod
+    def compile(definition):
+        """Compile a validated definition into a CompiledRule"""
+        factory, windowed = CONDITIONS[definition['condition']]
+        return CompiledRule(
+            definition=definition,
+            field=definition['field'],
+            column=FIELD_COLUMNS[definition['device_type']][definition['field']],
+            window_seconds=definition['window_minutes'] * 60 if windowed else 0,
+            bucket_seconds=definition['window']['bucket_seconds'] if windowed else 0,
+            keeps_samples=definition['condition'] in MEDIAN_CONDITIONS,
+            evaluate=factory(definition['threshold'], definition['min_samples'], definition.get('fallback_threshold'))
+        )
+    
+    @staticmethod
+    def _file_rules(path):
+        with open(path) as f:
+            rules = json.load(f)
+        return rules['rules'] if isinstance(rules, dict) else rules
+    
+    @staticmethod
+    def _version():
+        """Cheap fingerprint of the rule sources; changes whenever a rule does"""
+        count, updated_at = db.session.execute(
+            select(func.count(TamperRule.id), func.max(TamperRule.updated_at))
+        ).one()
+        path = current_app.config.get('TAMPER_RULES_FILE')
+        mtime = os.path.getmtime(path) if path and os.path.exists(path) else None
+        return count, updated_at, path, mtime
+    
+    @staticmethod
+    def _build(version):
+        """Compile all rule sources into {'by_type': ..., 'by_device': ...}"""
+        logger = current_app.logger
+        by_type = {}
+        by_device = {}
+        
+        def add(target, definition, source):
+            try:
+                rule = RuleEngine.validate(definition)
+            except ValueError as e:
+                logger.error('Skipping tamper rule from %s: %s', source, e)
+                return
+            if rule['window'] and rule['window']['truncated']:
+                logger.warning('Tamper rule %s from %s: %s', rule['name'], source, rule['window']['warning'])
+            target[rule['name']] = RuleEngine.compile(rule) if rule['enabled'] else None
+        
+        sources = [(rule, 'defaults') for rule in DEFAULT_RULES]
+        path = version[2]
+        if path:
+            try:
+                sources += [(rule, path) for rule in RuleEngine._file_rules(path)]
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error('Could not load tamper rules from %s: %s', path, e)
+        
+        for definition, source in sources:
+            add(by_type.setdefault(definition.get('device_type'), {}), definition, source)
+        
+        for row in TamperRule.query.order_by(TamperRule.id).all():
+            definition = {key: value for key, value in row.to_dict().items() if value is not None}
+            if row.device_id is None:
+                add(by_type.setdefault(row.device_type, {}), definition, f'tamper_rules #{row.id}')
+            else:
+                add(by_device.setdefault(row.device_id, {}), definition, f'tamper_rules #{row.id}')
+        
+        # Disabled type rules only matter as overrides of earlier sources
+        by_type = {
+            device_type: {name: rule for name, rule in rules.items() if rule is not None}
+            for device_type, rules in by_type.items()
+        }
+        return {'version': version, 'loaded_at': datetime.utcnow().isoformat(), 'by_type': by_type, 'by_device': by_device}
+    
+    @staticmethod
+    def ruleset(force=False):
+        """Compiled rules, recompiled when a source changed since the last check"""
+        interval = current_app.config.get('TAMPER_RULES_RELOAD_SECONDS', 30)
+        now = time.monotonic()
+        with _rules_lock:
+            checked_at, ruleset = _rules_state['checked_at'], _rules_state['ruleset']
+            if not force and ruleset is not None and now - checked_at < interval:
+                return ruleset
+        
+        version = RuleEngine._version()
+        if force or ruleset is None or version != _rules_state['version']:
+            ruleset = RuleEngine._build(version)
+        with _rules_lock:
+            _rules_state.update(checked_at=now, version=version, ruleset=ruleset)
+        return ruleset
+    
+    @staticmethod
+    def reload():
+        """Recompile this worker's rules now; other workers follow within the reload interval"""
+        ruleset = RuleEngine.ruleset(force=True)
+        return {
+            'loaded_at': ruleset['loaded_at'],
+            'device_type_rules': sum(len(rules) for rules in ruleset['by_type'].values()),
+            'device_rule_sets': len(ruleset['by_device'])
+        }
+    
+    @staticmethod
+    def active_rules(device):
+        """Compiled rules in effect for a device"""
+        ruleset = RuleEngine.ruleset()
+        rules = ruleset['by_type'].get(device.device_type, {})
+        overrides = ruleset['by_device'].get(device.id)
+        if overrides:
+            rules = {**rules, **overrides}
+        return [rule for rule in rules.values() if rule is not None]
+    
+    @staticmethod
+    def _window(rule, buckets, ts):
+        """Aggregate a rule's buckets still inside its window at ts"""
+        oldest = ts - rule.window_seconds
+        live = [bucket for bucket in buckets if bucket[0] + rule.bucket_seconds > oldest and bucket[1]]
+        count = sum(bucket[1] for bucket in live)
+        if not count:
+            return EMPTY_WINDOW
+        
+        mean = sum(bucket[2] for bucket in live) / count
+        std = math.sqrt(max(sum(bucket[3] for bucket in live) / count - mean * mean, 0.0))
+        
+        median = None
+        if rule.keeps_samples:
+            # Bucket medians weighted by their reading counts
+            weighted = sorted((bucket[4], bucket[1]) for bucket in live)
+            seen = 0
+            for median, weight in weighted:
+                seen += weight
+                if seen * 2 >= count:
+                    break
+        return Window(count, mean, std, median)
+    
+    @staticmethod
+    def _roll(rule, state, value, ts):
+        """Current window of a rule before value, and its state with value added"""
+        if not isinstance(state, dict) or state.get('bucket_seconds') != rule.bucket_seconds \
+                or state.get('column') != rule.column:
+            state = {'column': rule.column, 'bucket_seconds': rule.bucket_seconds, 'buckets': [], 'open': None}
+        
+        closed, current = state['buckets'], state['open']
+        bucket_start = ts - ts % rule.bucket_seconds
+        if current is not None and current[0] < bucket_start:
+            closed = closed + [current[:4] + [statistics.median(current[4]) if current[4] else None]]
+            current = None
+        closed = [bucket for bucket in closed if bucket[0] + rule.bucket_seconds > ts - rule.window_seconds]
+        
+        buckets = closed
+        if current is not None:
+            median = statistics.median(current[4]) if current[4] else None
+            buckets = closed + [current[:4] + [median]]
+        window = RuleEngine._window(rule, buckets, ts)
+        
+        if value is not None:
+            if current is None:
+                current = [bucket_start, 0, 0.0, 0.0, []]
+            current = [current[0], current[1] + 1, current[2] + value, current[3] + value * value, current[4]]
+            if rule.keeps_samples and len(current[4]) < RuleEngine.BUCKET_SAMPLES:
+                current[4] = current[4] + [value]
+        
+        return window, {**state, 'buckets': closed, 'open': current}
+    
+    @staticmethod
+    @timed_detector
+    def evaluate(device, data, now=None):
+        """Evaluate the device's rules against a reading payload and raise their alerts
+        
+        The reading is compared with the earlier readings in the device's
+        rolling windows and then added to them. Returns the triggered rules
+        as dicts; one alert is raised per alert type.
+        """
+        ts = (now or datetime.utcnow()).timestamp()
+        active = RuleEngine.active_rules(device)
+        rules = [rule for rule in active if data.get(rule.field) is not None]
+        
+        windows = {}
+        windowed = [rule for rule in active if rule.window_seconds]
+        if windowed:
+            row = DetectorStateStore.load(RuleEngine.DETECTOR, device.id)
+            previous = row.state or {}
+            state = {}
+            for rule in windowed:
+                name = rule.definition['name']
+                value = float(data[rule.field]) if data.get(rule.field) is not None else None
+                windows[name], state[name] = RuleEngine._roll(rule, previous.get(name), value, ts)
+            DetectorStateStore.save(row, state)
+        
+        triggered = []
+        alerted = set()
+        for rule in rules:
+            value = float(data[rule.field])
+            fired, metric, baseline = rule.evaluate(value, windows.get(rule.definition['name'], EMPTY_WINDOW))
+            if not fired:
+                continue
+            
+            definition = rule.definition
+            triggered.append({
+                'rule': definition['name'],
+                'alert_type': definition['alert_type'],
+                'field': rule.field,
+                'value': value,
+                'metric': round(metric, 4)
+            })
+            if definition['alert_type'] in alerted:
+                continue
+            alerted.add(definition['alert_type'])
+            
+            description = definition.get('description') or f'{definition["name"]}: {rule.field} = {value}'
+            AlertAggregator.raise_alert(
+                device_id=device.id,
+                alert_type=definition['alert_type'],
+                severity=definition['severity'],
+                description=description.format(
+                    value=value,
+                    metric=metric,
+                    baseline=baseline if baseline is not None else float('nan'),
+                    threshold=definition['threshold']
+                ),
+                value=value
+            )
+        
+        return triggered
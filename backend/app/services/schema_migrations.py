@@ -0,0 +1,119 @@
+from sqlalchemy import func, inspect, text
+from app.extensions import db
+from app.models import DeviceReading
+
+class SchemaMigrations:
+    
+    DEFAULT_BATCH_SIZE = 10000
+    
+    @staticmethod
+    def _server_default(column):
+        """SQL DEFAULT clause for a column's server default, or None"""
+        if column.server_default is None:
+            return None
+        default = column.server_default.arg
+        if isinstance(default, str):
+            return "DEFAULT '{}'".format(default.replace("'", "''"))
+        return f'DEFAULT {default.compile(dialect=db.engine.dialect)}'
+    
+    @staticmethod
+    def add_missing_columns():
+        """Add model columns that db.create_all() cannot add to existing tables
+        
+        Nullable columns are added as is and NOT NULL columns with their
+        server default. Raises RuntimeError, before altering anything, if a
+        NOT NULL column without a server default is missing, since existing
+        rows could not satisfy it.
+        """
+        inspector = inspect(db.engine)
+        missing = []
+        
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            missing += [(table, column) for column in table.columns if column.name not in existing]
+        
+        unsupported = [
+            f'{table.name}.{column.name}' for table, column in missing
+            if not column.nullable and SchemaMigrations._server_default(column) is None
+        ]
+        if unsupported:
+            raise RuntimeError(
+                f'Cannot add NOT NULL columns without a server default: {", ".join(unsupported)}'
+            )
+        
+        added = []
+        for table, column in missing:
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            constraint = '' if column.nullable else f' NOT NULL {SchemaMigrations._server_default(column)}'
+            db.session.execute(text(
+                f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}{constraint}'
+            ))
+            added.append(f'{table.name}.{column.name}')
+        
+        db.session.commit()
+        return added
+    
+    @staticmethod
+    def add_missing_indexes():
+        """Create model indexes missing from existing tables, such as those on added columns"""
+        inspector = inspect(db.engine)
+        created = []
+        
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                index.create(bind=db.engine)
+                created.append(index.name)
+        
+        return created
+    
+    @staticmethod
+    def _json_number(field):
+        """SQL expression extracting a numeric extra_data field, NULL otherwise"""
+        if db.engine.dialect.name == 'postgresql':
+            return (
+                f"CASE WHEN json_typeof(extra_data -> '{field}') = 'number' "
+                f"THEN (extra_data ->> '{field}')::double precision END"
+            )
+        return (
+            f"CASE WHEN json_type(extra_data, '$.{field}') IN ('integer', 'real') "
+            f"THEN json_extract(extra_data, '$.{field}') END"
+        )
+    
+    @staticmethod
+    def backfill_reading_columns(batch_size=None):
+        """Copy hot extra_data fields into the typed DeviceReading columns
+        
+        Runs as set-based UPDATEs over primary key ranges so each
+        transaction stays small on large tables.
+        """
+        batch_size = batch_size or SchemaMigrations.DEFAULT_BATCH_SIZE
+        assignments = ', '.join(
+            f'"{field}" = COALESCE("{field}", {SchemaMigrations._json_number(field)})'
+            for field in DeviceReading.TYPED_FIELDS
+        )
+        statement = text(
+            f'UPDATE device_readings SET {assignments} '
+            f'WHERE id >= :low AND id < :high AND extra_data IS NOT NULL'
+        )
+        
+        low, high = db.session.query(func.min(DeviceReading.id), func.max(DeviceReading.id)).one()
+        if low is None:
+            return 0
+        
+        updated = 0
+        while low <= high:
+            result = db.session.execute(statement, {'low': low, 'high': low + batch_size})
+            db.session.commit()
+            updated += result.rowcount
+            low += batch_size
+        
+        return updated
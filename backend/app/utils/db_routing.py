@@ -0,0 +1,138 @@
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, func, select, text
+from sqlalchemy.exc import DBAPIError
+
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """Session that serves reads from the replica bind when the request allows it
+    
+    Flushes and DML statements always go to the primary.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not getattr(clause, 'is_dml', False)
+            and has_request_context()
+            and g.get('db_use_replica', False)
+            and REPLICA_BIND in self._db.engines
+        ):
+            return self._db.engines[REPLICA_BIND]
+        
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_db_engines(app):
+    """Apply SQLite pragmas to every engine"""
+    wal = app.config.get('SQLITE_WAL', True)
+    synchronous = app.config.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    busy_timeout = int(app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA busy_timeout = {busy_timeout}')
+        if wal:
+            cursor.execute('PRAGMA journal_mode = WAL')
+            cursor.execute(f'PRAGMA synchronous = {synchronous}')
+        cursor.close()
+    
+    with app.app_context():
+        from app.extensions import db
+        for engine in db.engines.values():
+            event.listen(engine, 'connect', set_sqlite_pragmas)
+
+
+_replica_state = {'checked_at': None, 'lag': None}
+_replica_lock = threading.Lock()
+
+
+def _measure_replica_lag(db):
+    """Replica lag in seconds, or None if the replica is unreachable"""
+    replica = db.engines[REPLICA_BIND]
+    try:
+        with replica.connect() as conn:
+            if replica.dialect.name == 'postgresql':
+                lag = conn.execute(text(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+                )).scalar()
+                return float(lag or 0)
+            
+            # No replication catalog: compare the newest reading on both sides
+            from app.models import DeviceReading
+            newest = select(func.max(DeviceReading.timestamp))
+            replica_newest = conn.execute(newest).scalar()
+        with db.engines[None].connect() as conn:
+            primary_newest = conn.execute(newest).scalar()
+    except DBAPIError:
+        return None
+    
+    if primary_newest is None or replica_newest is None:
+        return 0.0 if primary_newest is None else float('inf')
+    return max((primary_newest - replica_newest).total_seconds(), 0.0)
+
+
+def replica_lag(force=False):
+    """Cached replica lag, refreshed at most every DB_REPLICA_CHECK_INTERVAL_SECONDS"""
+    from app.extensions import db
+    
+    interval = current_app.config.get('DB_REPLICA_CHECK_INTERVAL_SECONDS', 5)
+    now = time.monotonic()
+    with _replica_lock:
+        checked_at = _replica_state['checked_at']
+        if not force and checked_at is not None and now - checked_at < interval:
+            return _replica_state['lag']
+    
+    lag = _measure_replica_lag(db)
+    with _replica_lock:
+        _replica_state.update(checked_at=now, lag=lag)
+    return lag
+
+
+def _mark_replica_unavailable():
+    with _replica_lock:
+        _replica_state.update(checked_at=time.monotonic(), lag=None)
+
+
+def read_replica(view=None, max_lag=None):
+    """Serve a read-only view from the replica when it is fresh enough
+    
+    Falls back to the primary when no replica is configured, when its lag
+    exceeds max_lag (DB_REPLICA_MAX_LAG_SECONDS by default), or when a
+    replica query fails, in which case the view is retried on the primary.
+    """
+    if view is None:
+        return lambda func: read_replica(func, max_lag=max_lag)
+    
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from app.extensions import db
+        
+        if REPLICA_BIND not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+            return view(*args, **kwargs)
+        
+        tolerance = max_lag if max_lag is not None else current_app.config['DB_REPLICA_MAX_LAG_SECONDS']
+        lag = replica_lag()
+        g.db_use_replica = lag is not None and lag <= tolerance
+        
+        try:
+            return view(*args, **kwargs)
+        except DBAPIError:
+            if not g.db_use_replica:
+                raise
+            db.session.rollback()
+            _mark_replica_unavailable()
+            g.db_use_replica = False
+            return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,42 @@
+import numpy as np
+
+
+def min_max_indices(values, anomalies, max_points):
+    """Indices of a shape-preserving subset of roughly max_points points
+    
+    The series is split into equal-count buckets and each bucket keeps its
+    minimum and maximum, so spikes survive. The first and last points and
+    every anomalous point are always kept, which means the result can exceed
+    max_points by the number of anomalies.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    
+    buckets = max((max_points - 2) // 2, 1)
+    bucket = np.arange(n) * buckets // n
+    starts = np.searchsorted(bucket, np.arange(buckets))
+    ends = np.append(starts[1:], n)
+    
+    # Sorting by (bucket, value) puts each bucket's min first and max last
+    order = np.lexsort((values, bucket))
+    
+    keep = np.asarray(anomalies, dtype=bool).copy()
+    keep[order[starts]] = True
+    keep[order[ends - 1]] = True
+    keep[[0, -1]] = True
+    return np.flatnonzero(keep)
+
+
+def downsample_rows(rows, value_index, anomaly_index, max_points):
+    """Reduce row tuples to a min/max-per-bucket subset, keeping anomalies"""
+    values = np.fromiter((row[value_index] for row in rows), dtype=float, count=len(rows))
+    anomalies = [row[anomaly_index] for row in rows]
+    return [rows[i] for i in min_max_indices(values, anomalies, max_points).tolist()]
+
+
+def downsample_series(series, max_points, value_key='values', anomaly_key='anomalies'):
+    """Reduce parallel arrays to a min/max-per-bucket subset, keeping anomalies"""
+    indices = min_max_indices(series[value_key], series[anomaly_key], max_points).tolist()
+    return {key: [column[i] for i in indices] for key, column in series.items()}
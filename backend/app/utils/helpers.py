@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 import random
 import string
 
@@ -16,6 +16,27 @@ def format_timestamp(dt):
     return None
 
 
+def parse_utc_timestamp(value, field='timestamp'):
+    """Parse an ISO 8601 timestamp from a request payload as naive UTC
+    
+    Returns None for a missing value and raises ValueError naming ``field``
+    when it cannot be parsed.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f'{field} must be an ISO 8601 timestamp: {value}')
+    # Stored timestamps are naive UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
 def calculate_uptime(last_calibration):
     """Calculate device uptime since last calibration"""
     if not last_calibration:
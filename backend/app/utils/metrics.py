@@ -0,0 +1,106 @@
+import os
+import time
+from functools import wraps
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) makes
+# every worker write its samples to shared mmap files that /metrics merges.
+
+READINGS_INGESTED = Counter(
+    'readings_ingested_total',
+    'Device readings ingested',
+    ['device_type']
+)
+
+DETECTOR_LATENCY = Histogram(
+    'detector_latency_seconds',
+    'Tamper detector method latency',
+    ['method'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+ALERTS_RAISED = Counter(
+    'alerts_raised_total',
+    'Tamper alert occurrences, including ones coalesced into open incidents',
+    ['alert_type', 'severity']
+)
+
+ALERT_INCIDENTS_OPENED = Counter(
+    'alert_incidents_opened_total',
+    'New tamper alert incidents',
+    ['alert_type', 'severity']
+)
+
+BLOCKCHAIN_APPENDS = Counter(
+    'blockchain_appends_total',
+    'Blocks appended to the audit ledger',
+    ['event_type']
+)
+
+BLOCKCHAIN_LENGTH = Gauge(
+    'blockchain_chain_length',
+    'Block number of the latest appended block',
+    multiprocess_mode='max'
+)
+
+
+def timed_detector(func):
+    """Record a detector method's latency in DETECTOR_LATENCY"""
+    histogram = DETECTOR_LATENCY.labels(func.__name__)
+    
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+    return wrapper
+
+
+class PoolCollector:
+    """Report SQLAlchemy pool usage of the scraping worker at collection time"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    def collect(self):
+        from app.extensions import db
+        
+        with self.app.app_context():
+            pool = db.engine.pool
+        
+        labels = ['pid']
+        pid = str(os.getpid())
+        for name, method, doc in (
+            ('db_pool_size', 'size', 'Configured pool size'),
+            ('db_pool_checked_out', 'checkedout', 'Connections currently checked out'),
+            ('db_pool_overflow', 'overflow', 'Connections above pool size'),
+        ):
+            if hasattr(pool, method):
+                metric = GaugeMetricFamily(name, doc, labels=labels)
+                metric.add_metric([pid], getattr(pool, method)())
+                yield metric
+
+
+def init_metrics(app):
+    """Expose Prometheus metrics at /metrics"""
+    multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    
+    pool_registry = CollectorRegistry()
+    pool_registry.register(PoolCollector(app))
+    
+    @app.route('/metrics')
+    def metrics():
+        if multiproc_dir:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        
+        output = generate_latest(registry) + generate_latest(pool_registry)
+        return output, 200, {'Content-Type': CONTENT_TYPE_LATEST}
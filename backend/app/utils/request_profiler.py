@@ -0,0 +1,179 @@
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from flask import g, has_request_context, jsonify, request
+from flask_jwt_extended import jwt_required
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_stats_lock = threading.Lock()
+# Held while a sampled profile runs: Python 3.12+ allows one cProfile
+# profiler per process, so concurrent requests skip sampling instead
+_sampler_lock = threading.Lock()
+_endpoint_stats = defaultdict(lambda: {
+    'requests': 0,
+    'total_ms': 0.0,
+    'max_ms': 0.0,
+    'queries': 0,
+    'db_ms': 0.0,
+    'n_plus_one': 0
+})
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile_queries' in g:
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile_queries' in g:
+        started = conn.info['profile_query_start'].pop()
+        g.profile_db_time += time.perf_counter() - started
+        g.profile_queries[statement] += 1
+
+
+def _start_sampled_profile(app):
+    """Start a profiler for this request, or return None if another one is running"""
+    if not _sampler_lock.acquire(blocking=False):
+        return None
+    
+    try:
+        if app.config['PROFILING_ENGINE'] == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+                profiler = Profiler()
+                profiler.start()
+                return profiler
+            except ImportError:
+                pass
+        
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    except (RuntimeError, ValueError):
+        # Another profiling tool outside this module is active
+        _sampler_lock.release()
+        return None
+
+
+def _stop_sampled_profile(profiler):
+    try:
+        if hasattr(profiler, 'output_html'):
+            profiler.stop()
+        else:
+            profiler.disable()
+    finally:
+        _sampler_lock.release()
+
+
+def _save_sampled_profile(app, profiler, endpoint):
+    _stop_sampled_profile(profiler)
+    
+    directory = app.config['PROFILING_DIR']
+    os.makedirs(directory, exist_ok=True)
+    name = f"{endpoint or 'unknown'}-{datetime.utcnow():%Y%m%dT%H%M%S%f}".replace('/', '_')
+    
+    if hasattr(profiler, 'output_html'):
+        with open(os.path.join(directory, f'{name}.html'), 'w') as f:
+            f.write(profiler.output_html())
+    else:
+        profiler.dump_stats(os.path.join(directory, f'{name}.prof'))
+
+
+def endpoint_stats():
+    """Snapshot of per-endpoint timing and query aggregates"""
+    with _stats_lock:
+        return {
+            endpoint: {
+                **stats,
+                'avg_ms': round(stats['total_ms'] / stats['requests'], 2) if stats['requests'] else 0,
+                'avg_queries': round(stats['queries'] / stats['requests'], 2) if stats['requests'] else 0
+            }
+            for endpoint, stats in _endpoint_stats.items()
+        }
+
+
+def init_request_profiler(app):
+    """Install per-request timing, SQL counting and sampled profiling
+    
+    Nothing is registered unless PROFILING_ENABLED is set, so disabled
+    deployments pay no per-request or per-query cost.
+    """
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+    
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    
+    sample_rate = app.config['PROFILING_SAMPLE_RATE']
+    n_plus_one_threshold = app.config['PROFILING_N_PLUS_ONE_THRESHOLD']
+    slow_request_ms = app.config['PROFILING_SLOW_REQUEST_MS']
+    
+    @app.before_request
+    def start_request_profile():
+        g.profile_started = time.perf_counter()
+        g.profile_queries = Counter()
+        g.profile_db_time = 0.0
+        g.profile_sampler = _start_sampled_profile(app) if random.random() < sample_rate else None
+    
+    @app.after_request
+    def finish_request_profile(response):
+        if 'profile_started' not in g:
+            return response
+        
+        elapsed_ms = (time.perf_counter() - g.profile_started) * 1000
+        db_ms = g.profile_db_time * 1000
+        query_count = sum(g.profile_queries.values())
+        endpoint = request.endpoint or request.path
+        
+        repeated = {
+            statement: count for statement, count in g.profile_queries.items()
+            if count >= n_plus_one_threshold
+        }
+        
+        sampler, g.profile_sampler = g.profile_sampler, None
+        if sampler is not None:
+            _save_sampled_profile(app, sampler, endpoint)
+        
+        with _stats_lock:
+            stats = _endpoint_stats[endpoint]
+            stats['requests'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['queries'] += query_count
+            stats['db_ms'] += db_ms
+            stats['n_plus_one'] += 1 if repeated else 0
+        
+        for statement, count in repeated.items():
+            app.logger.warning(
+                'Possible N+1 on %s: statement executed %d times: %s',
+                endpoint, count, ' '.join(statement.split())[:200]
+            )
+        
+        if elapsed_ms >= slow_request_ms:
+            app.logger.warning(
+                'Slow request %s %s: %.1f ms, %d queries, %.1f ms in DB',
+                request.method, request.path, elapsed_ms, query_count, db_ms
+            )
+        
+        response.headers['Server-Timing'] = (
+            f'app;dur={elapsed_ms:.1f}, db;dur={db_ms:.1f};desc="{query_count} queries"'
+        )
+        return response
+    
+    @app.teardown_request
+    def stop_unfinished_profile(exc):
+        # Unhandled errors skip after_request; never leave a profiler running
+        sampler = g.pop('profile_sampler', None)
+        if sampler is not None:
+            _stop_sampled_profile(sampler)
+    
+    @app.route('/debug/profile')
+    @jwt_required()
+    def profile_stats():
+        return jsonify(endpoint_stats()), 200
@@ -0,0 +1,87 @@
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Integer, cast, func
+from app.extensions import db
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _default(o):
+    # ISO 8601 like the models' to_dict(), not Flask's HTTP date format
+    if isinstance(o, date):
+        return o.isoformat()
+    # numpy scalars and arrays
+    if hasattr(o, 'tolist'):
+        return o.tolist()
+    return DefaultJSONProvider.default(o)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, falling back to the stdlib json module"""
+    
+    default = staticmethod(_default)
+    
+    def _orjson_options(self, indent=False):
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+    
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs.keys() - {'separators', 'indent'}:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_options(kwargs.get('indent'))).decode()
+    
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def fetch_rows(statement):
+    """Execute a column select and return (column labels, row tuples)"""
+    result = db.session.execute(statement)
+    return list(result.keys()), [tuple(row) for row in result]
+
+
+def fetch_records(statement):
+    """Execute a column select and return one dict per row keyed by column label
+    
+    Skips building ORM instances and to_dict() copies for large list responses;
+    datetimes are left for the JSON provider to encode.
+    """
+    keys, rows = fetch_rows(statement)
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def fetch_columns(statement):
+    """Execute a select and return {label: [values]} parallel arrays"""
+    keys, rows = fetch_rows(statement)
+    columns = list(zip(*rows)) if rows else [()] * len(keys)
+    return {key: list(values) for key, values in zip(keys, columns)}
+
+
+def epoch_ms(column):
+    """SQL expression for a naive UTC timestamp column as integer epoch milliseconds"""
+    if db.engine.dialect.name == 'postgresql':
+        return cast(func.floor(func.extract('epoch', column) * 1000), db.BigInteger)
+    # SQLite stores 'YYYY-MM-DD HH:MM:SS.ffffff' text; slice it rather than use
+    # strftime('%f'), which rounds and can carry into the next second
+    return (
+        cast(func.strftime('%s', func.substr(column, 1, 19)), Integer) * 1000 +
+        cast(func.substr(column, 21, 3), Integer)
+    )
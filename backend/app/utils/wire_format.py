@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from flask import current_app, jsonify, request
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, 'application/x-msgpack')
+
+
+def _default(o):
+    # Naive datetimes are UTC throughout the app; send them as the 8-12 byte
+    # MessagePack timestamp extension instead of ISO strings
+    if isinstance(o, datetime):
+        return msgpack.Timestamp.from_datetime(o if o.tzinfo else o.replace(tzinfo=timezone.utc))
+    if hasattr(o, 'tolist'):
+        return o.tolist()
+    raise TypeError(f'Object of type {type(o).__name__} is not MessagePack serializable')
+
+
+def is_msgpack_request():
+    return request.mimetype in MSGPACK_MIMETYPES
+
+
+def wants_msgpack():
+    """True when the client prefers MessagePack over JSON in its Accept header"""
+    if msgpack is None:
+        return False
+    best = request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES)
+    return best in MSGPACK_MIMETYPES
+
+
+def read_payload(fields):
+    """Decode a reading body sent as JSON or MessagePack
+    
+    MessagePack bodies may be a map with the JSON keys or, more compactly,
+    an array of values in ``fields`` order.
+    """
+    if not is_msgpack_request():
+        return request.get_json()
+    
+    if msgpack is None:
+        raise ValueError('MessagePack payloads are not supported by this server')
+    
+    try:
+        data = msgpack.unpackb(request.get_data(), raw=False, timestamp=3)
+    except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as e:
+        raise ValueError('Invalid MessagePack payload') from e
+    
+    if isinstance(data, (list, tuple)):
+        if len(data) > len(fields):
+            raise ValueError(f'Expected at most {len(fields)} values: {", ".join(fields)}')
+        return dict(zip(fields, data))
+    if not isinstance(data, dict):
+        raise ValueError('MessagePack payload must be a map or an array')
+    return data
+
+
+def respond(obj, status=200):
+    """Serialize obj as MessagePack or JSON according to the Accept header"""
+    if wants_msgpack():
+        body = msgpack.packb(obj, default=_default, use_bin_type=True)
+        return current_app.response_class(body, status=status, mimetype=MSGPACK_MIMETYPE)
+    return jsonify(obj), status
@@ -0,0 +1,27 @@
+"""/analytics over the 7-day window and /status across the idle fleet"""
+import pytest
+
+PREFIXES = {
+    'weighing_scale': 'weighing-scale',
+    'energy_meter': 'energy-meter',
+    'fuel_dispenser': 'fuel-dispenser'
+}
+
+
+@pytest.mark.parametrize('device_type', list(PREFIXES))
+def bench_analytics(benchmark, client, auth_headers, fleet, device_type):
+    path = f'/api/{PREFIXES[device_type]}/analytics/{fleet[device_type]}'
+    
+    def get():
+        response = client.get(path, headers=auth_headers)
+        assert response.status_code == 200
+    
+    benchmark(get)
+
+
+def bench_weighing_scale_status(benchmark, client, auth_headers, fleet):
+    def get():
+        response = client.get('/api/weighing-scale/status', headers=auth_headers)
+        assert response.status_code == 200
+    
+    benchmark.pedantic(get, rounds=5, iterations=1)
@@ -0,0 +1,19 @@
+"""Isolation Forest training and batch scoring"""
+import pytest
+from app.services.anomaly_detector import AnomalyDetector
+
+
+@pytest.fixture(scope='module')
+def trained_detector(fleet):
+    detector = AnomalyDetector()
+    assert detector.train(fleet['energy_meter'])['success']
+    return detector
+
+
+def bench_train(benchmark, fleet):
+    result = benchmark.pedantic(lambda: AnomalyDetector().train(fleet['energy_meter']), rounds=3, iterations=1)
+    assert result['success']
+
+
+def bench_batch_predict(benchmark, fleet, trained_detector):
+    benchmark.pedantic(trained_detector.batch_predict, args=(fleet['energy_meter'],), rounds=3, iterations=1)
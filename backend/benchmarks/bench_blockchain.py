@@ -0,0 +1,12 @@
+"""Ledger append and full-chain verification"""
+from app.services.blockchain_service import BlockchainService
+
+
+def bench_create_log_entry(benchmark, fleet):
+    benchmark(BlockchainService.create_log_entry, device_id=fleet['fuel_dispenser'],
+              event_type='reading', event_data={'flow_rate': 3.2})
+
+
+def bench_verify_chain_integrity(benchmark, fleet):
+    result = benchmark.pedantic(BlockchainService.verify_chain_integrity, rounds=3, iterations=1)
+    assert result['total_blocks'] > 0
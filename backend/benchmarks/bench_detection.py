@@ -0,0 +1,24 @@
+"""Tamper rules against their rolling-window state, and pattern analysis against the seeded history"""
+from app.extensions import db
+from app.models import Device
+from app.services.rule_engine import RuleEngine
+from app.services.tamper_detection import TamperDetector
+
+
+def bench_rules_weighing_scale(benchmark, fleet):
+    device = db.session.get(Device, fleet['weighing_scale'])
+    benchmark(RuleEngine.evaluate, device, {'weight': 50.2})
+
+
+def bench_rules_energy_meter(benchmark, fleet):
+    device = db.session.get(Device, fleet['energy_meter'])
+    benchmark(RuleEngine.evaluate, device, {'power': 1.15, 'voltage': 231.0, 'current': 5.0})
+
+
+def bench_rules_fuel_dispenser(benchmark, fleet):
+    device = db.session.get(Device, fleet['fuel_dispenser'])
+    benchmark(RuleEngine.evaluate, device, {'flow_rate': 3.1, 'magnetic_field': 0.3})
+
+
+def bench_analyze_pattern(benchmark, fleet):
+    benchmark(TamperDetector.analyze_pattern, device_id=fleet['energy_meter'], hours=24 * 7)
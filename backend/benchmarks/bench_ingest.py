@@ -0,0 +1,25 @@
+"""POST /readings/<device_id> for each device type"""
+import itertools
+import pytest
+
+PAYLOADS = {
+    'weighing_scale': ('weighing-scale', lambda i: {'weight': 50.0 + (i % 7) * 0.1}),
+    'energy_meter': ('energy-meter', lambda i: {'power': 1.15, 'voltage': 230.0 + (i % 5), 'current': 5.0}),
+    'fuel_dispenser': ('fuel-dispenser', lambda i: {
+        'flow_rate': 3.2, 'totalizer': 1000.0 + i * 0.05, 'pulse_count': 32,
+        'magnetic_field': 0.3, 'pressure': 2.5, 'nozzle_state': 'open'
+    })
+}
+
+
+@pytest.mark.parametrize('device_type', list(PAYLOADS))
+def bench_add_reading(benchmark, client, auth_headers, fleet, device_type):
+    prefix, payload = PAYLOADS[device_type]
+    path = f'/api/{prefix}/readings/{fleet[device_type]}'
+    counter = itertools.count()
+    
+    def post():
+        response = client.post(path, json=payload(next(counter)), headers=auth_headers)
+        assert response.status_code == 201
+    
+    benchmark(post)
@@ -0,0 +1,34 @@
+"""Worker cold start: interpreter boot, app import and create_app()"""
+import json
+import os
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR
+
+# Modules that must stay out of worker startup; they load on first use
+HEAVY_MODULES = ('numpy', 'pandas', 'pyarrow', 'sklearn')
+
+STARTUP_SCRIPT = f"""
+import json, sys
+from app import create_app
+create_app('benchmark')
+print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))
+"""
+
+
+def _start_worker():
+    result = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_create_app_cold_start(benchmark):
+    loaded = benchmark.pedantic(_start_worker, rounds=5, iterations=1, warmup_rounds=1)
+    assert loaded == []
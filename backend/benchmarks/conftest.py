@@ -0,0 +1,168 @@
+"""Shared fixtures for the benchmark suite
+
+Run from backend/benchmarks:
+    
+    pip install -r requirements.txt
+    pytest                                # 10k readings per hot device
+    BENCH_READINGS=1000000 pytest         # 1M readings per hot device
+
+Results are saved as JSON under .benchmarks/ and can be compared with
+``pytest-benchmark compare 0001 0002``.
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+READINGS = int(os.getenv('BENCH_READINGS', 10000))
+STATUS_DEVICES = int(os.getenv('BENCH_STATUS_DEVICES', 1000))
+CHAIN_LENGTH = int(os.getenv('BENCH_CHAIN_LENGTH', 10000))
+SEED = int(os.getenv('BENCH_SEED', 42))
+
+# Config reads DATABASE_URL at import time
+_db_dir = tempfile.mkdtemp(prefix='trustscale-bench-')
+os.environ['DATABASE_URL'] = f"sqlite:///{Path(_db_dir) / 'bench.db'}"
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import BlockchainLog, Device, DeviceReading  # noqa: E402
+from app.services.blockchain_service import BlockchainService  # noqa: E402
+from app.services.data_simulator import DataSimulator  # noqa: E402
+
+
+def _seed_readings(device_id, device_type, count, span):
+    """Bulk insert simulated readings spread evenly over the last `span`"""
+    now = datetime.utcnow()
+    step = span / max(count, 1)
+    
+    if device_type == 'weighing_scale':
+        columns = DataSimulator.generate_weighing_scale_data(count, inject_tamper=True, seed=SEED, columnar=True)
+        values, reading_type, unit = columns['weight'], 'weight', 'kg'
+        extra = [{} for _ in range(count)]
+    elif device_type == 'energy_meter':
+        columns = DataSimulator.generate_energy_meter_data(count, inject_tamper=True, seed=SEED, columnar=True)
+        values, reading_type, unit = columns['power'], 'power', 'kW'
+        extra = [
+            {'voltage': v, 'current': c}
+            for v, c in zip(columns['voltage'].tolist(), columns['current'].tolist())
+        ]
+    else:
+        columns = DataSimulator.generate_fuel_dispenser_data(count, inject_tamper=True, seed=SEED, columnar=True)
+        values, reading_type, unit = columns['flow_rate'], 'flow_rate', 'L/min'
+        extra = [
+            {'totalizer': t, 'pulse_count': p, 'magnetic_field': m, 'pressure': pr}
+            for t, p, m, pr in zip(
+                columns['totalizer'].tolist(), columns['pulse_count'].tolist(),
+                columns['magnetic_field'].tolist(), columns['pressure'].tolist()
+            )
+        ]
+    
+    rows = []
+    for i, (value, is_anomaly, data) in enumerate(zip(values.tolist(), columns['is_anomaly'].tolist(), extra)):
+        rows.append({
+            'device_id': device_id,
+            'timestamp': now - span + step * i,
+            'reading_type': reading_type,
+            'value': value,
+            'unit': unit,
+            'is_anomaly': is_anomaly,
+            'extra_data': data,
+            **{field: data.get(field) for field in DeviceReading.TYPED_FIELDS}
+        })
+    
+    for start in range(0, len(rows), 50000):
+        db.session.execute(db.insert(DeviceReading), rows[start:start + 50000])
+    db.session.commit()
+
+
+def _seed_chain(device_id, length):
+    """Insert a valid hash chain of `length` blocks"""
+    previous_hash = '0' * 64
+    now = datetime.utcnow()
+    rows = []
+    
+    for block_number in range(1, length + 1):
+        timestamp = now - timedelta(seconds=length - block_number)
+        event_data = {'reading': block_number}
+        data_hash = BlockchainService.calculate_hash({
+            'block_number': block_number,
+            'device_id': device_id,
+            'event_type': 'reading',
+            'event_data': event_data,
+            'timestamp': timestamp.isoformat(),
+            'previous_hash': previous_hash
+        })
+        rows.append({
+            'block_number': block_number,
+            'device_id': device_id,
+            'event_type': 'reading',
+            'data_hash': data_hash,
+            'previous_hash': previous_hash,
+            'timestamp': timestamp,
+            'extra_data': event_data
+        })
+        previous_hash = data_hash
+    
+    db.session.execute(db.insert(BlockchainLog), rows)
+    db.session.commit()
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app('benchmark')
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    ctx.pop()
+
+
+@pytest.fixture(scope='session')
+def fleet(app):
+    """Hot devices with READINGS readings each, plus STATUS_DEVICES idle scales"""
+    hot = {}
+    for device_type in ('weighing_scale', 'energy_meter', 'fuel_dispenser'):
+        device = Device(device_type=device_type, device_id=f'BENCH-{device_type}', location='bench',
+                        last_calibration=datetime.utcnow())
+        db.session.add(device)
+        db.session.commit()
+        # Spread over 6 days so /analytics' 7-day window sees everything
+        _seed_readings(device.id, device_type, READINGS, timedelta(days=6))
+        hot[device_type] = device.id
+    
+    db.session.execute(db.insert(Device), [
+        {'device_type': 'weighing_scale', 'device_id': f'BENCH-WS-{i:06d}', 'location': 'bench', 'status': 'active'}
+        for i in range(STATUS_DEVICES)
+    ])
+    db.session.commit()
+    
+    status_ids = [
+        row[0] for row in db.session.query(Device.id)
+        .filter(Device.device_id.like('BENCH-WS-%')).all()
+    ]
+    now = datetime.utcnow()
+    db.session.execute(db.insert(DeviceReading), [
+        {'device_id': device_id, 'timestamp': now, 'reading_type': 'weight', 'value': 50.0, 'unit': 'kg'}
+        for device_id in status_ids
+    ])
+    db.session.commit()
+    
+    _seed_chain(hot['fuel_dispenser'], CHAIN_LENGTH)
+    return hot
+
+
+@pytest.fixture(scope='session')
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def auth_headers(app):
+    return {'Authorization': f"Bearer {create_access_token(identity='bench')}"}
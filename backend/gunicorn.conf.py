@@ -0,0 +1,38 @@
+import os
+import shutil
+import tempfile
+
+# Shared directory for prometheus_client multiprocess mode; each worker
+# writes its metric samples here and /metrics merges them
+multiproc_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), 'trustscale-prometheus')
+)
+
+# Import the app once in the master and fork workers from it so they start
+# without re-importing Flask, SQLAlchemy and the blueprints
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true'
+
+
+def on_starting(server):
+    # Start every deployment with empty counters
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # Pooled connections opened in the master must not be shared with workers
+    if not server.cfg.preload_app:
+        return
+    
+    from run import app
+    from app.extensions import db
+    
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -1,5 +1,6 @@
 import os
 from app import create_app
+from app.extensions import db
 
 env = os.getenv('FLASK_ENV', 'development')
 app = create_app(env)
@@ -11,6 +12,10 @@ print(f"🔧 SQLALCHEMY_DATABASE_URI: {app.config.get('SQLALCHEMY_DATABASE_URI',
 print(f"🔧 CORS_ORIGINS: {app.config.get('CORS_ORIGINS')}")
 
 if __name__ == '__main__':
+    # Deployments run `flask schema upgrade` once; the dev server creates tables itself
+    with app.app_context():
+        db.create_all()
+    
     port = int(os.getenv('PORT', 5000))
     app.run(
         host='0.0.0.0',
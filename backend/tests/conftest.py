@@ -0,0 +1,91 @@
+"""Shared fixtures for the test suite
+
+Run from backend/:
+    
+    pytest tests
+"""
+import itertools
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Config reads DATABASE_URL at import time
+_db_dir = tempfile.mkdtemp(prefix='trustscale-test-')
+os.environ['DATABASE_URL'] = f"sqlite:///{Path(_db_dir) / 'test.db'}"
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db as _db  # noqa: E402
+from app.models import Device, User  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app('testing')
+    ctx = app.app_context()
+    ctx.push()
+    yield app
+    ctx.pop()
+
+
+@pytest.fixture
+def db(app):
+    """A freshly created schema for each test"""
+    _db.create_all()
+    yield _db
+    _db.session.remove()
+    _db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(db):
+    user = User(username='tester', password_hash='x', role='admin')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {'Authorization': f"Bearer {create_access_token(identity=str(user.id))}"}
+
+
+@pytest.fixture
+def make_device(db):
+    """Factory for committed devices, numbered per test unless device_id is given"""
+    serials = itertools.count(1)
+    
+    def make(device_type, **fields):
+        fields.setdefault('device_id', f'{device_type[:3].upper()}-TEST-{next(serials)}')
+        device = Device(device_type=device_type, **fields)
+        db.session.add(device)
+        db.session.commit()
+        return device
+    
+    return make
+
+
+@pytest.fixture
+def feed(db):
+    """Pass readings through observe(value, now) at a fixed interval, then commit
+    
+    Returns observe's results in reading order.
+    """
+    def run(observe, values, start=datetime(2026, 1, 1), step=10):
+        results = [observe(value, start + timedelta(seconds=step * k)) for k, value in enumerate(values)]
+        db.session.commit()
+        return results
+    
+    return run
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from app.models import TamperAlert
+
+
+@pytest.fixture
+def open_alerts(db, make_device):
+    device = make_device('weighing_scale', location='test', status='tampered')
+    other = make_device('energy_meter', location='test', status='tampered')
+    
+    db.session.add_all([
+        TamperAlert(device_id=device.id, alert_type='weight_drift', severity='high',
+                    timestamp=datetime(2026, 1, 1, 12, 0)),
+        TamperAlert(device_id=other.id, alert_type='voltage_spike', severity='medium',
+                    timestamp=datetime(2026, 1, 1, 14, 0))
+    ])
+    db.session.commit()
+    return device, other
+
+
+def _open_count():
+    return TamperAlert.query.filter_by(resolved=False).count()
+
+
+@pytest.mark.parametrize('payload', [
+    {'filters': {'foo': 1}},
+    {'filters': {'alert-type': 'weight_drift'}},
+    {'filters': {'device_id': None}},
+    {'filters': {'alert_type': ''}},
+    {'filters': {'device_id': [1]}},
+    {'filters': {'device_id': True}},
+    {'filters': {'severity': 'extreme'}},
+    {'filters': {'start_time': 'yesterday'}},
+    {'filters': 'all'},
+    {'filters': ['device_id']},
+    {'alert_ids': 1},
+    {'alert_ids': ['1']},
+])
+def test_bulk_resolve_rejects_filters_that_do_not_narrow(client, auth_headers, open_alerts, payload):
+    response = client.post('/api/alerts/bulk-resolve', json=payload, headers=auth_headers)
+    
+    assert response.status_code == 400
+    assert _open_count() == 2
+
+
+def test_bulk_resolve_by_device_id(client, auth_headers, open_alerts):
+    device, other = open_alerts
+    response = client.post('/api/alerts/bulk-resolve', json={'filters': {'device_id': device.id}},
+                           headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.get_json()['resolved_count'] == 1
+    assert response.get_json()['devices_reactivated'] == 1
+    assert TamperAlert.query.filter_by(device_id=other.id, resolved=False).count() == 1
+
+
+def test_bulk_resolve_converts_offsets_to_utc(client, auth_headers, open_alerts):
+    # 15:00+02:00 is 13:00 UTC: after the first alert, before the second
+    response = client.post('/api/alerts/bulk-resolve',
+                           json={'filters': {'end_time': '2026-01-01T15:00:00+02:00'}},
+                           headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.get_json()['resolved_count'] == 1
+    assert TamperAlert.query.filter_by(alert_type='voltage_spike', resolved=False).count() == 1
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.models import CalibrationLog, TamperAlert
+from app.services.calibration_service import CalibrationService
+
+NOW = datetime(2026, 6, 1)
+
+
+@pytest.fixture
+def scale(make_device):
+    return make_device(
+        'weighing_scale',
+        last_calibration=datetime(2025, 1, 1),
+        next_calibration_date=datetime(2026, 1, 1)
+    )
+
+
+def test_scan_raises_one_alert_per_overdue_device(db, make_device, scale):
+    make_device('energy_meter', next_calibration_date=NOW + timedelta(days=30))
+    
+    assert CalibrationService.scan(now=NOW)['alerts_raised'] == 1
+    db.session.commit()
+    # Already alerted: counted as another occurrence of the open incident
+    result = CalibrationService.scan(now=NOW + timedelta(days=1))
+    db.session.commit()
+    assert (result['alerts_raised'], result['alerts_updated']) == (0, 1)
+    
+    alert = TamperAlert.query.filter_by(alert_type='calibration_overdue').one()
+    assert alert.device_id == scale.id
+    assert alert.occurrence_count == 2
+    assert alert.last_seen == NOW + timedelta(days=1)
+
+
+def test_scan_statement_count_does_not_grow_with_the_fleet(db, make_device):
+    for _ in range(20):
+        make_device('weighing_scale', next_calibration_date=NOW - timedelta(days=1))
+    CalibrationService.scan(now=NOW)
+    db.session.commit()
+    for _ in range(20):
+        make_device('weighing_scale', next_calibration_date=NOW - timedelta(days=1))
+    
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = CalibrationService.scan(now=NOW)
+        db.session.flush()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    
+    assert (result['alerts_raised'], result['alerts_updated']) == (20, 20)
+    assert len(statements) == 3
+
+
+def test_passed_calibration_reschedules_and_resolves_overdue_alert(db, scale):
+    CalibrationService.scan(now=NOW)
+    db.session.commit()
+    
+    log = CalibrationService.record(scale, status='passed', calibration_date=NOW)
+    db.session.commit()
+    
+    interval = CalibrationService.interval_days('weighing_scale')
+    assert scale.last_calibration == NOW
+    assert scale.next_calibration_date == log.next_calibration_date == NOW + timedelta(days=interval)
+    assert TamperAlert.query.filter_by(alert_type='calibration_overdue', resolved=False).count() == 0
+
+
+def test_failed_calibration_makes_the_device_due_now(db, scale):
+    CalibrationService.record(scale, status='failed', calibration_date=NOW)
+    db.session.commit()
+    
+    assert scale.last_calibration == datetime(2025, 1, 1)
+    assert scale.next_calibration_date == NOW
+
+
+def test_backdated_calibration_is_only_logged(db, scale):
+    CalibrationService.record(scale, status='passed', calibration_date=datetime(2024, 6, 1))
+    db.session.commit()
+    
+    assert scale.last_calibration == datetime(2025, 1, 1)
+    assert scale.next_calibration_date == datetime(2026, 1, 1)
+    assert CalibrationLog.query.filter_by(device_id=scale.id).count() == 1
+
+
+def test_record_endpoint_converts_offsets_to_utc(client, auth_headers, scale):
+    response = client.post(f'/api/calibration/{scale.id}', json={
+        'calibration_date': '2026-06-01T02:00:00+02:00',
+        'next_calibration_date': '2027-06-01T00:00:00Z'
+    }, headers=auth_headers)
+    
+    assert response.status_code == 201
+    assert response.get_json()['calibration']['calibration_date'].startswith('2026-06-01T00:00:00')
+    assert client.post(
+        f'/api/calibration/{scale.id}', json={'calibration_date': 'last week'}, headers=auth_headers
+    ).status_code == 400
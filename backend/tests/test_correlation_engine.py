@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models import DetectorState, TamperAlert
+from app.services.correlation_engine import CorrelationEngine
+
+
+@pytest.fixture
+def meters(make_device):
+    return [make_device('energy_meter', location='SUB-1') for _ in range(3)]
+
+
+def _observe_all(devices):
+    """observe callable feeding one reading per device per step"""
+    return lambda values, now: [
+        CorrelationEngine.observe(device, value, False, now=now) for device, value in zip(devices, values)
+    ]
+
+
+def test_quiet_readings_do_not_touch_the_location_row(feed, meters):
+    # Constant readings never produce a z-score, so nothing is hot
+    feed(_observe_all(meters), [[1000.0] * 3] * 30)
+    
+    assert DetectorState.query.filter_by(detector=CorrelationEngine.DETECTOR).count() == 0
+    assert DetectorState.query.filter_by(detector=CorrelationEngine.DEVICE_DETECTOR).count() == 3
+
+
+def test_synchronized_spikes_raise_one_location_alert(db, feed, meters):
+    start = datetime(2026, 1, 1)
+    feed(_observe_all(meters), 1000 + np.random.default_rng(0).normal(0, 1, (60, 3)), start)
+    spike = start + timedelta(seconds=700)
+    
+    CorrelationEngine.observe(meters[0], 1200, False, now=spike)
+    hot = CorrelationEngine.observe(meters[1], 1210, False, now=spike + timedelta(seconds=30))
+    db.session.commit()
+    
+    assert {meters[0].id, meters[1].id} <= set(hot)
+    alerts = TamperAlert.query.filter_by(alert_type='coordinated_tamper').all()
+    assert len(alerts) == 1
+    assert alerts[0].location == 'SUB-1'
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_independent_noise_raises_no_alert(feed, meters, seed):
+    # Heavy-tailed noise so independent >3 sigma excursions are common
+    feed(_observe_all(meters), 1000 + np.random.default_rng(seed).standard_t(3, (600, 3)))
+    
+    assert TamperAlert.query.filter_by(alert_type='coordinated_tamper').count() == 0
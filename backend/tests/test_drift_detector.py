@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.models import TamperAlert
+from app.services.drift_detector import DriftDetector
+
+
+@pytest.fixture
+def scale(make_device):
+    return make_device('weighing_scale', last_calibration=datetime(2026, 1, 1))
+
+
+def _observe(feed, device, weights):
+    feed(lambda weight, now: DriftDetector.observe(device, float(weight)), weights)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_no_alarm_on_pure_noise(feed, scale, seed):
+    rng = np.random.default_rng(seed)
+    _observe(feed, scale, rng.normal(50, 0.3, DriftDetector.BASELINE_READINGS + 5000))
+    
+    assert DriftDetector.status(scale)['alarms'] == 0
+    assert TamperAlert.query.filter_by(alert_type='calibration_drift').count() == 0
+
+
+def test_alarms_on_gradual_drift(feed, scale):
+    rng = np.random.default_rng(7)
+    _observe(feed, scale, rng.normal(50, 0.3, DriftDetector.BASELINE_READINGS))
+    
+    # 20 g per reading
+    drift = 50 + rng.normal(0, 0.3, 100) + 0.02 * np.arange(100)
+    _observe(feed, scale, drift)
+    
+    assert DriftDetector.status(scale)['alarms'] > 0
+    assert TamperAlert.query.filter_by(device_id=scale.id, alert_type='calibration_drift').count() == 1
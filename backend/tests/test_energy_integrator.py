@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models import EnergyBucket, TamperAlert
+from app.services.energy_integrator import EnergyIntegrator
+
+
+@pytest.fixture
+def meter(make_device):
+    return make_device('energy_meter')
+
+
+def _at_power(meter):
+    return lambda power, now: EnergyIntegrator.observe(meter, power, now=now)
+
+
+def _buckets(meter):
+    return {
+        bucket.bucket_start: bucket
+        for bucket in EnergyBucket.query.filter_by(device_id=meter.id).all()
+    }
+
+
+def test_interval_is_split_at_the_hour_boundary(feed, meter):
+    feed(_at_power(meter), [1.0, 3.0], datetime(2026, 1, 1, 10, 55), step=600)
+    
+    buckets = _buckets(meter)
+    ten, eleven = buckets[datetime(2026, 1, 1, 10)], buckets[datetime(2026, 1, 1, 11)]
+    # Power is interpolated to 2 kW at 11:00
+    assert ten.energy_kwh == pytest.approx(1.5 * 300 / 3600)
+    assert eleven.energy_kwh == pytest.approx(2.5 * 300 / 3600)
+    assert ten.covered_seconds == eleven.covered_seconds == 300
+    assert ten.energy_kwh + eleven.energy_kwh == pytest.approx(2.0 * 600 / 3600)
+
+
+def test_long_gap_is_not_interpolated(feed, meter):
+    start = datetime(2026, 1, 1, 10)
+    feed(_at_power(meter), [2.0, 2.0], start, step=EnergyIntegrator.MAX_GAP_SECONDS + 60)
+    
+    bucket = _buckets(meter)[start]
+    assert bucket.energy_kwh == 0
+    assert bucket.covered_seconds == 0
+    assert bucket.reading_count == 2
+
+
+def _at_power_factor(meter, voltage=230.0, current=5.0):
+    """observe callable reporting power at the given power factor of V x I"""
+    return lambda pf, now: EnergyIntegrator.observe(
+        meter, pf * voltage * current / 1000, voltage=voltage, current=current, now=now
+    )
+
+
+def test_power_short_of_voltage_times_current_raises_bypass(feed, meter):
+    start = datetime(2026, 1, 1)
+    assert not any(feed(_at_power_factor(meter), [0.9] * EnergyIntegrator.PF_WARMUP_READINGS, start))
+    
+    # Half the load bypasses the measuring element
+    assert feed(_at_power_factor(meter), [0.45], start + timedelta(hours=1)) == [True]
+    
+    alert = TamperAlert.query.filter_by(device_id=meter.id, alert_type='power_bypass').one()
+    assert alert.peak_value == pytest.approx(0.9 * 1.15 - 0.45 * 1.15, abs=1e-3)
+
+
+def test_healthy_meter_raises_nothing(feed, meter):
+    rng = np.random.default_rng(0)
+    assert not any(feed(_at_power_factor(meter), 0.9 + rng.normal(0, 0.01, 500)))
+    assert TamperAlert.query.count() == 0
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models import TamperAlert
+from app.services.meter_reconciler import MeterReconciler
+
+PULSES_PER_LITRE = 10
+
+
+@pytest.fixture
+def dispenser(make_device):
+    return make_device('fuel_dispenser')
+
+
+def _dispense(feed, device, seconds, start, totalizer=1000.0, register=1.0, pulses=1.0, timed=True, seed=0):
+    """One reading per second; register and pulses scale what the totalizer and pulser count
+    
+    Untimed readings carry no device timestamp and are received 5 ms apart.
+    """
+    flow = 3.2 + np.random.default_rng(seed).normal(0, 0.2, seconds)
+    litres = flow / 60 * register
+    readings = zip(flow, totalizer + np.cumsum(litres), np.round(litres * PULSES_PER_LITRE * pulses).astype(int))
+    
+    def observe(reading, now):
+        flow_rate, total, pulse_count = reading
+        return MeterReconciler.observe(
+            device, flow_rate, total, pulse_count=int(pulse_count), reading_time=now if timed else None, now=now
+        )
+    
+    found = feed(observe, list(readings), start, step=1 if timed else 0.005)
+    return [alert for alerts in found for alert in alerts], totalizer + litres.sum()
+
+
+def test_clean_stream_raises_nothing(feed, dispenser):
+    found, _ = _dispense(feed, dispenser, 1800, datetime(2026, 1, 1))
+    
+    status = MeterReconciler.status(dispenser)
+    assert found == []
+    assert status['windows_checked'] > 3
+    assert status['windows_flagged'] == 0
+    assert TamperAlert.query.count() == 0
+
+
+def test_batched_delivery_without_device_time_is_not_alerted(feed, dispenser):
+    # Received 5 ms apart, so receive-time flow is a tiny fraction of the totalizer
+    found, _ = _dispense(feed, dispenser, 1800, datetime(2026, 1, 1), timed=False)
+    
+    status = MeterReconciler.status(dispenser)
+    assert found == []
+    assert status['windows_unverified'] == status['windows_checked'] > 0
+    assert TamperAlert.query.count() == 0
+
+
+def test_slowed_pulser_is_flagged(feed, dispenser):
+    start = datetime(2026, 1, 1)
+    _, totalizer = _dispense(feed, dispenser, 1800, start)
+    
+    # Pulser and totalizer under-register by 20% against metered flow
+    found, _ = _dispense(feed, dispenser, 900, start + timedelta(seconds=1800), totalizer, register=0.8, pulses=0.8, seed=1)
+    
+    assert 'meter_discrepancy' in found
+    assert 'pulser_mismatch' in found
+    assert TamperAlert.query.filter_by(device_id=dispenser.id, alert_type='meter_discrepancy').count() == 1
+
+
+def test_totalizer_rollback_is_flagged(db, dispenser):
+    at = datetime(2026, 1, 1)
+    MeterReconciler.observe(dispenser, 3.2, 1500.0, reading_time=at)
+    found = MeterReconciler.observe(dispenser, 3.2, 1400.0, reading_time=at + timedelta(seconds=1))
+    db.session.commit()
+    
+    assert found == ['totalizer_rollback']
+    alert = TamperAlert.query.filter_by(alert_type='totalizer_rollback').one()
+    assert alert.severity == 'critical'
+
+
+def test_gap_restarts_the_window_without_integrating_it(db, feed, dispenser):
+    start = datetime(2026, 1, 1)
+    _, totalizer = _dispense(feed, dispenser, 60, start)
+    
+    # The totalizer moved 50 L while offline; none of it is reconciled
+    resumed = start + timedelta(seconds=60 + MeterReconciler.MAX_GAP_SECONDS + 1)
+    found = MeterReconciler.observe(dispenser, 3.2, totalizer + 50, reading_time=resumed)
+    db.session.commit()
+    
+    status = MeterReconciler.status(dispenser)
+    assert found == []
+    assert status['window_flow_litres'] == 0
+    assert status['window_totalizer_litres'] == 0
+    assert TamperAlert.query.count() == 0
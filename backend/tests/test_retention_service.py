@@ -0,0 +1,18 @@
+from sqlalchemy import text
+
+from app.services.retention_service import RetentionService
+from app.services.schema_migrations import SchemaMigrations
+
+
+def test_partitioned_indexes_are_the_ones_schema_upgrade_expects(db):
+    # partition_table recreates the model's indexes on the new parent table
+    for index in RetentionService._model_indexes():
+        db.session.execute(text(f'DROP INDEX {index.name}'))
+    for statement in RetentionService._index_statements():
+        db.session.execute(text(statement))
+    db.session.commit()
+    
+    assert [index.name for index in RetentionService._model_indexes()] == [
+        'ix_device_readings_device_time', 'ix_device_readings_timestamp'
+    ]
+    assert SchemaMigrations.add_missing_indexes() == []
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models import TamperAlert
+from app.services.detector_state import DetectorStateStore
+from app.services.rule_engine import DEFAULT_RULES, RuleEngine
+
+
+@pytest.fixture
+def scale(make_device):
+    return make_device('weighing_scale')
+
+
+def _evaluate(feed, device, weights, start, step=10):
+    triggered = feed(lambda weight, now: RuleEngine.evaluate(device, {'weight': float(weight)}, now=now), weights, start, step)
+    return [rule for rules in triggered for rule in rules]
+
+
+def test_weight_jump_fires_against_the_rolling_median(feed, scale):
+    start = datetime(2026, 1, 1)
+    rng = np.random.default_rng(0)
+    assert _evaluate(feed, scale, rng.normal(50, 0.3, 60), start) == []
+    
+    triggered = _evaluate(feed, scale, [62.0], start + timedelta(seconds=600))
+    
+    assert [rule['rule'] for rule in triggered] == ['weight_drift']
+    assert TamperAlert.query.filter_by(device_id=scale.id, alert_type='weight_drift').count() == 1
+
+
+def test_window_covers_its_full_length_at_one_hertz(feed, scale):
+    start = datetime(2026, 1, 1)
+    # 25 minutes at 40 kg then 5 at 60 kg: the 30 minute median is still 40
+    _evaluate(feed, scale, [40.0] * 1500 + [60.0] * 300, start, step=1)
+    
+    assert _evaluate(feed, scale, [41.0], start + timedelta(seconds=1800)) == []
+
+
+def test_state_stays_bounded(feed, scale):
+    start = datetime(2026, 1, 1)
+    _evaluate(feed, scale, [50.0] * 7200, start, step=1)
+    
+    state = DetectorStateStore.peek(RuleEngine.DETECTOR, scale.id).state['weight_drift']
+    assert len(state['buckets']) <= RuleEngine.WINDOW_BUCKETS
+    assert len(state['open'][4]) <= RuleEngine.BUCKET_SAMPLES
+    
+    # Older than the 30 minute window: nothing of it is left
+    _evaluate(feed, scale, [50.0], start + timedelta(hours=4))
+    state = DetectorStateStore.peek(RuleEngine.DETECTOR, scale.id).state['weight_drift']
+    assert state['buckets'] == []
+    assert state['open'][1] == 1
+
+
+def test_validate_reports_truncated_median_windows(app):
+    weight_drift = next(rule for rule in DEFAULT_RULES if rule['name'] == 'weight_drift')
+    
+    assert RuleEngine.validate(weight_drift)['window']['truncated'] is False
+    
+    # 10 hour window: 20 minute buckets hold far more than BUCKET_SAMPLES readings at 1 Hz
+    window = RuleEngine.validate({**weight_drift, 'window_minutes': 600})['window']
+    assert window['bucket_seconds'] == 1200
+    assert window['truncated'] is True
+    assert 'warning' in window
+    
+    # Count/sum aggregates are exact at any rate
+    zscore = RuleEngine.validate({**weight_drift, 'condition': 'zscore', 'window_minutes': 600})
+    assert zscore['window']['truncated'] is False
+
+
+def test_effective_rules_show_the_window_plan(client, auth_headers, scale):
+    response = client.get(f'/api/rules/effective/{scale.id}', headers=auth_headers)
+    
+    rules = {rule['name']: rule for rule in response.get_json()['rules']}
+    assert rules['weight_drift']['window'] == {
+        'bucket_seconds': 60, 'buckets': 30, 'truncated': False, 'samples_per_bucket': RuleEngine.BUCKET_SAMPLES
+    }
@@ -0,0 +1,39 @@
+from sqlalchemy import text
+
+from app.models import DeviceReading
+from app.services.schema_migrations import SchemaMigrations
+
+
+def test_adds_not_null_column_with_its_server_default(db):
+    # A database from before occurrence_count, holding one alert
+    db.session.execute(text('ALTER TABLE tamper_alerts DROP COLUMN occurrence_count'))
+    db.session.execute(text(
+        "INSERT INTO tamper_alerts (device_id, alert_type, severity, resolved) VALUES (1, 'weight_drift', 'high', 0)"
+    ))
+    db.session.commit()
+    
+    added = SchemaMigrations.add_missing_columns()
+    
+    assert added == ['tamper_alerts.occurrence_count']
+    assert db.session.execute(text('SELECT occurrence_count FROM tamper_alerts')).scalar() == 1
+
+
+def test_scale_ingest_fills_the_typed_columns_the_backfill_would(db, client, auth_headers, make_device):
+    scale = make_device('weighing_scale')
+    response = client.post(f'/api/weighing-scale/readings/{scale.id}', headers=auth_headers, json={
+        'weight': 40.0,
+        'metadata': {'magnetic_field': 3.2, 'pressure': 'n/a', 'operator': 'night shift'}
+    })
+    assert response.status_code == 201
+    
+    reading = DeviceReading.query.one()
+    ingested = {field: getattr(reading, field) for field in DeviceReading.TYPED_FIELDS}
+    assert ingested == {'voltage': None, 'current': None, 'magnetic_field': 3.2, 'pressure': None, 'totalizer': None}
+    
+    # Clear the columns and let the backfill fill them from extra_data
+    DeviceReading.query.update({field: None for field in DeviceReading.TYPED_FIELDS})
+    db.session.commit()
+    SchemaMigrations.backfill_reading_columns()
+    db.session.refresh(reading)
+    
+    assert {field: getattr(reading, field) for field in DeviceReading.TYPED_FIELDS} == ingested